@@ -22,7 +22,7 @@ except Exception:
     google_id_token = None
     google_auth_requests = None
     _GOOGLE_AUTH_AVAILABLE = False
-from datetime import datetime
+from datetime import datetime, timedelta
 # Mejor configuración CORS: permitimos los encabezados comunes (Authorization, Content-Type)
 # y soportamos credenciales si es necesario. `CORS_ORIGINS` puede venir desde entorno.
 from flask_cors import CORS
@@ -164,6 +164,7 @@ CORS(app,
     resources={r"/api/*": {"origins": cors_origins_config}},
     supports_credentials=cors_supports_credentials,
     allow_headers=["Content-Type", "Authorization"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag"],
     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 
 
@@ -342,8 +343,11 @@ def options_google_signin():
     app.logger.debug('OPTIONS /api/usuarios/google_signin handled by explicit route')
     return _build_preflight_response()
 
-from werkzeug.security import generate_password_hash, check_password_hash
+from backend.passwords import PasswordHashBusy, hash_password, needs_rehash, verify_password
 from backend.auth import generate_token, jwt_required
+from backend.pagination import PaginationError, apply_keyset, page_response, parse_page_args, project, row_serializer
+from backend.cache import build_cache_from_env, cached_response, conditional_get
+from backend.ratelimit import build_lockout_from_env, build_rate_limiter_from_env
 from sqlalchemy import text
 import traceback
 
@@ -390,6 +394,35 @@ def _safe_entrenador_by_id(entrenador_id):
         return None
 
 
+# Caché de respuestas del catálogo público (ver backend/cache.py). Toda escritura
+# que cambie lo que ven los listados públicos debe llamar a _bump_catalogo()
+# después de su commit.
+response_cache = build_cache_from_env()
+
+
+def _bump_catalogo(reason):
+    # versión persistida (la ven todos los workers) en su propia transacción corta
+    try:
+        with db.engine.begin() as conn:
+            catalogo.bump_version(conn)
+    except Exception:
+        app.logger.exception('catalogo version bump failed (%s)', reason)
+    try:
+        response_cache.bump(reason=reason)
+    except Exception:
+        app.logger.exception('response cache bump failed (%s)', reason)
+
+
+def _catalogo_fingerprint():
+    """Versión persistida del catálogo (una lectura por clave primaria).
+
+    Se usa en los ETag cuando la caché es por proceso: _bump_catalogo la
+    incrementa en la base de datos, así que un worker ve las escrituras
+    hechas en cualquier otro, ediciones de perfil incluidas.
+    """
+    return (catalogo.current_version(db.session),)
+
+
 @app.route('/api/usuarios/register', methods=['POST'])
 def register_usuario():
     # Allow explicit disabling of public registration in production via ALLOW_REGISTRATION
@@ -421,7 +454,7 @@ def register_usuario():
     if existing:
         return jsonify({'error': 'user exists'}), 409
 
-    hashed = generate_password_hash(password)
+    hashed = hash_password(password)
     user = Usuario(email=email, nombre=nombre, hashed_password=hashed)
     db.session.add(user)
     db.session.commit()
@@ -434,6 +467,46 @@ def register_usuario():
     return jsonify({'message': 'user created', 'id': user.id}), 201
 
 
+# Con PASSWORD_HASH_POOL el hashing corre en un pool acotado
+# (backend/passwords.py); si está lleno se responde 503 en vez de encolar.
+def _hash_busy_response(e):
+    resp = jsonify({'error': 'server busy, retry later', 'retry_after': e.retry_after})
+    resp.headers['Retry-After'] = str(e.retry_after)
+    return resp, 503
+
+
+@app.errorhandler(PasswordHashBusy)
+def handle_hash_busy(e):
+    return _hash_busy_response(e)
+
+
+# Bloqueo por intentos fallidos: ventana deslizante fuera de `usuarios`
+# (backend/ratelimit.py), así un login correcto no escribe en la base.
+login_lockout = build_lockout_from_env()
+
+# Token buckets por IP y por email para login / forgot / google_signin
+# (backend/ratelimit.py): se cortan antes de calcular hashes o verificar tokens.
+rate_limiter = build_rate_limiter_from_env()
+RATE_LIMIT_PROXY_HOPS = int(os.getenv('RATE_LIMIT_PROXY_HOPS', '0'))
+
+
+def _client_ip():
+    if RATE_LIMIT_PROXY_HOPS and request.access_route:
+        route = request.access_route
+        return route[-RATE_LIMIT_PROXY_HOPS] if len(route) >= RATE_LIMIT_PROXY_HOPS else route[0]
+    return request.remote_addr
+
+
+def _rate_limited(route, email=None):
+    """Respuesta 429 si la ruta superó su límite para esta IP/email; si no, None."""
+    retry_after = rate_limiter.check(route, ip=_client_ip(), email=email)
+    if not retry_after:
+        return None
+    resp = jsonify({'error': 'too many requests', 'retry_after': retry_after})
+    resp.headers['Retry-After'] = str(retry_after)
+    return resp, 429
+
+
 @app.route('/api/usuarios/login', methods=['POST'])
 def login_usuario():
     try:
@@ -442,48 +515,57 @@ def login_usuario():
         password = data.get('password')
         if not email or not password:
             return jsonify({'error': 'email and password required'}), 400
-
-        user = Usuario.query.filter_by(email=email).first()
-        if not user:
-            return jsonify({'error': 'invalid credentials'}), 401
-
-        # Account lockout disabled: do not block users based on failed attempts.
-        # If password is incorrect, simply return invalid credentials without
-        # incrementing failed attempt counters or setting lockout timestamps.
-        if not check_password_hash(user.hashed_password, password):
+        limited = _rate_limited('login', email)
+        if limited:
+            return limited
+
+        # Rechaza antes de consultar la base o calcular el hash si la cuenta
+        # acumula demasiados fallos recientes desde esta IP.
+        lock_key = login_lockout.key_for(email, _client_ip())
+        retry_after = login_lockout.retry_after(lock_key)
+        if retry_after:
+            resp = jsonify({'error': 'too many failed attempts', 'retry_after': retry_after})
+            resp.headers['Retry-After'] = str(retry_after)
+            return resp, 429
+
+        # usuario + roles en una sola consulta (backend/roles.py)
+        user, roles = user_with_roles(db.session, email=email)
+        if not user or not verify_password(user.hashed_password, password):
+            login_lockout.register_failure(lock_key)
             return jsonify({'error': 'invalid credentials'}), 401
+        login_lockout.register_success(lock_key)
 
         # Determina rol según relaciones (Cliente / Entrenador)
-        ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@test.local')
-        if user.email == ADMIN_EMAIL:
-            role = 'admin'
-        else:
-            role = 'usuario'
+        role = roles.primary()
+
+        # Sólo se escribe si hay algo que actualizar (el caso normal es sólo
+        # lectura): contadores heredados de la antigua implementación del
+        # bloqueo, o un hash hecho con otro método/coste, que se rehace con la
+        # contraseña recién verificada (backend/passwords.py).
+        user_id, nombre = user.id, user.nombre
+        dirty = False
+        if getattr(user, 'failed_attempts', None) or getattr(user, 'locked_until', None):
+            user.failed_attempts = 0
+            user.locked_until = None
+            dirty = True
+        if needs_rehash(user.hashed_password):
             try:
-                row = db.session.execute(text('SELECT 1 FROM entrenadores WHERE usuario_id = :uid LIMIT 1'), {'uid': user.id}).fetchone()
-                if row:
-                    role = 'entrenador'
-                else:
-                    row2 = db.session.execute(text('SELECT 1 FROM clientes WHERE usuario_id = :uid LIMIT 1'), {'uid': user.id}).fetchone()
-                    if row2:
-                        role = 'cliente'
+                user.hashed_password = hash_password(password)
+                dirty = True
+            except PasswordHashBusy:
+                pass  # se rehace en el próximo login
+        if dirty:
+            try:
+                db.session.commit()
             except Exception:
-                role = getattr(user, '_role_fallback', 'usuario')
-
-        # Reset failed attempts on successful login (no-op if fields don't exist)
-        try:
-            if hasattr(user, 'failed_attempts'):
-                user.failed_attempts = 0
-            if hasattr(user, 'locked_until'):
-                user.locked_until = None
-            db.session.add(user)
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
+                db.session.rollback()
+                app.logger.exception('login_usuario: failed to update user %s', user_id)
 
         # Generar token JWT con user info (incluye jti desde backend.auth)
-        token = generate_token({'user_id': user.id, 'role': role, 'nombre': user.nombre})
-        return jsonify({'message': 'ok', 'user_id': user.id, 'role': role, 'nombre': user.nombre, 'token': token}), 200
+        token = generate_token({'user_id': user_id, 'role': role, 'nombre': nombre})
+        return jsonify({'message': 'ok', 'user_id': user_id, 'role': role, 'nombre': nombre, 'token': token}), 200
+    except PasswordHashBusy as e:
+        return _hash_busy_response(e)
     except Exception:
         # Persist traceback to a file so we can inspect the exact error on the deployed server
         try:
@@ -526,6 +608,9 @@ def forgot_password():
         email = data.get('email')
         if not email:
             return jsonify({'error': 'email required'}), 400
+        limited = _rate_limited('forgot', email)
+        if limited:
+            return limited
 
         from database.database import Usuario, PasswordResetToken, db as _db
         user = Usuario.query.filter_by(email=email).first()
@@ -584,6 +669,9 @@ def google_signin():
             app.logger.exception('google_signin: logging helper failed')
         if not raw_token:
             return jsonify({'error': 'id_token required'}), 400
+        limited = _rate_limited('google_signin')
+        if limited:
+            return limited
 
         audience = os.getenv('GOOGLE_CLIENT_ID')
         if not audience:
@@ -616,9 +704,10 @@ def google_signin():
             app.logger.exception('failed to import Entrenador model in google_signin; attempting fallback import')
             from database.database import Usuario, Cliente, db as _db
 
-        user = Usuario.query.filter_by(email=email).first()
+        user, roles = user_with_roles(db.session, email=email)
         if not user:
             # Create the user without passing unknown keyword arguments (some DBs lack google_sub column)
+            roles = UserRoles(is_admin=email == ADMIN_EMAIL)
             user = Usuario(email=email, nombre=nombre, hashed_password='')
             _db.session.add(user)
             _db.session.commit()
@@ -639,6 +728,8 @@ def google_signin():
                 if preferred_name and user.nombre != preferred_name:
                     user.nombre = preferred_name
                     _db.session.add(user)
+                    # el nombre del entrenador está copiado en catalogo_publico
+                    catalogo.sync_usuarios(_db.session, [user.id])
                     _db.session.commit()
                 # If the DB has a google_sub column, ensure it's stored/updated
                 try:
@@ -651,62 +742,27 @@ def google_signin():
             except Exception:
                 _db.session.rollback()
 
-        # Crear entidad según el rol deseado
-        if desired_role == 'entrenador':
-            row = db.session.execute(text('SELECT 1 FROM entrenadores WHERE usuario_id = :uid LIMIT 1'), {'uid': user.id}).fetchone()
-            if not row:
-                try:
-                    ent = Entrenador(usuario_id=user.id)
-                    _db.session.add(ent)
-                    _db.session.commit()
-                except Exception:
-                    _db.session.rollback()
-            row_cliente = db.session.execute(text('SELECT 1 FROM clientes WHERE usuario_id = :uid LIMIT 1'), {'uid': user.id}).fetchone()
-            if not row_cliente:
-                try:
-                    cliente = Cliente(usuario_id=user.id)
-                    _db.session.add(cliente)
-                    _db.session.commit()
-                except Exception:
-                    _db.session.rollback()
-        else:
-            # default cliente si no se especifica o se pide cliente
-            row_cliente = db.session.execute(text('SELECT 1 FROM clientes WHERE usuario_id = :uid LIMIT 1'), {'uid': user.id}).fetchone()
-            if not row_cliente:
-                try:
-                    cliente = Cliente(usuario_id=user.id)
-                    _db.session.add(cliente)
-                    _db.session.commit()
-                except Exception:
-                    _db.session.rollback()
-            # crea entrenador sólo si pidió entrenador
-            if desired_role == 'entrenador':
-                row = db.session.execute(text('SELECT 1 FROM entrenadores WHERE usuario_id = :uid LIMIT 1'), {'uid': user.id}).fetchone()
-                if not row:
-                    try:
-                        ent = Entrenador(usuario_id=user.id)
-                        _db.session.add(ent)
-                        _db.session.commit()
-                    except Exception:
-                        _db.session.rollback()
-
-        ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@test.local')
-        role = 'admin' if user.email == ADMIN_EMAIL else 'usuario'
-        if role != 'admin':
+        # Crear entidad según el rol deseado: Cliente siempre, Entrenador sólo si lo pidió
+        entrenador_id, cliente_id = roles.entrenador_id, roles.cliente_id
+        if desired_role == 'entrenador' and entrenador_id is None:
             try:
-                row_ent = db.session.execute(text('SELECT 1 FROM entrenadores WHERE usuario_id = :uid LIMIT 1'), {'uid': user.id}).fetchone()
-                row_cli = db.session.execute(text('SELECT 1 FROM clientes WHERE usuario_id = :uid LIMIT 1'), {'uid': user.id}).fetchone()
-                if desired_role == 'entrenador' and row_ent:
-                    role = 'entrenador'
-                elif desired_role == 'cliente' and row_cli:
-                    role = 'cliente'
-                else:
-                    if row_ent:
-                        role = 'entrenador'
-                    elif row_cli:
-                        role = 'cliente'
+                ent = Entrenador(usuario_id=user.id)
+                _db.session.add(ent)
+                _db.session.commit()
+                entrenador_id = ent.id
+            except Exception:
+                _db.session.rollback()
+        if cliente_id is None:
+            try:
+                cliente = Cliente(usuario_id=user.id)
+                _db.session.add(cliente)
+                _db.session.commit()
+                cliente_id = cliente.id
             except Exception:
-                role = getattr(user, '_role_fallback', 'usuario')
+                _db.session.rollback()
+
+        roles = UserRoles(is_admin=roles.is_admin, entrenador_id=entrenador_id, cliente_id=cliente_id)
+        role = roles.primary(prefer=desired_role)
 
         token = generate_token({'user_id': user.id, 'role': role, 'nombre': user.nombre})
 
@@ -747,8 +803,7 @@ def reset_password():
             return jsonify({'error': 'user not found'}), 404
 
         # Update password
-        from werkzeug.security import generate_password_hash
-        user.hashed_password = generate_password_hash(password)
+        user.hashed_password = hash_password(password)
         pr.used = True
 
         _db.session.add(user)
@@ -756,6 +811,8 @@ def reset_password():
         _db.session.commit()
 
         return jsonify({'message': 'password updated'}), 200
+    except PasswordHashBusy as e:
+        return _hash_busy_response(e)
     except Exception as e:
         app.logger.exception('reset_password failed')
         try:
@@ -789,14 +846,16 @@ def change_password():
         if not user:
             return jsonify({'error': 'user not found'}), 404
 
-        if not check_password_hash(getattr(user, 'hashed_password', ''), old):
+        if not verify_password(getattr(user, 'hashed_password', ''), old):
             return jsonify({'error': 'invalid current password'}), 401
 
-        user.hashed_password = generate_password_hash(new)
+        user.hashed_password = hash_password(new)
         _db.session.add(user)
         _db.session.commit()
 
         return jsonify({'message': 'password changed'}), 200
+    except PasswordHashBusy as e:
+        return _hash_busy_response(e)
     except Exception as e:
         app.logger.exception('change_password failed')
         try:
@@ -839,10 +898,12 @@ def set_password():
         if not user:
             return jsonify({'error': 'user not found'}), 404
 
-        user.hashed_password = generate_password_hash(new)
+        user.hashed_password = hash_password(new)
         _db.session.add(user)
         _db.session.commit()
         return jsonify({'message': 'password updated'}), 200
+    except PasswordHashBusy as e:
+        return _hash_busy_response(e)
     except Exception as e:
         app.logger.exception('set_password failed')
         try:
@@ -878,8 +939,10 @@ else:
     # Si no se encuentra la variable (estás en tu PC), usa SQLite (Modo Desarrollo)
     # Construimos una ruta absoluta al archivo dentro del repo para evitar
     # problemas dependientes del directorio de trabajo.
+    # SQLITE_PATH permite otro archivo (tests, benchmarks); debe fijarse antes de
+    # importar la app porque init_app crea el engine con esta URI.
     repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    db_file = os.path.join(repo_root, 'database', 'entrenapro.db')
+    db_file = os.getenv('SQLITE_PATH') or os.path.join(repo_root, 'database', 'entrenapro.db')
     # SQLite URIs en Windows necesitan / separadores, y triple slash para ruta absoluta
     # Avoid using backslashes inside f-string expressions (causes SyntaxError in some parsers).
     replaced_db_file = db_file.replace('\\', '/')
@@ -892,7 +955,23 @@ app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_URI
 # Opcional pero recomendado para producción:
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+from backend.roles import ADMIN_EMAIL, UserRoles, user_with_roles, users_with_roles
+from backend.visibility import visible_entrenadores
+from backend import catalogo
 from database.database import db as db_instance
+from database import content_stats
+from database.database import CatalogoPublico
+from database.aceptados import aceptados_por_entrenador, entrenadores_con_nombre
+from database.metrics import compute_metrics, read_snapshot, refresh_snapshot, history as metrics_history
+from database.pool import engine_options_from_env, pool_status
+from database.purge import (create_job as create_purge_job, job_status as purge_job_status, purge_usuarios,
+                            retry_job as retry_purge_job, run_job as run_purge_job)
+from database.schema_sync import sync_schema
+from database.repositories import follow_rutina, followed_rutinas, unfollow_rutina
+
+# Pool de conexiones (tamaño, recycle, pre-ping, statement timeout) desde el
+# entorno, con métricas en /api/admin/metrics/pool (database/pool.py).
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_env(SQLALCHEMY_URI)
 
 # Inicializa tu ORM (instancia compartida)
 db_instance.init_app(app)
@@ -905,13 +984,20 @@ with app.app_context():
     from database.database import Rutina  # noqa: F401
     from backend.auth import jwt_required
 
-    # --- Seed: crear usuario administrador por defecto si no existe ---
-    ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@test.local')
-    ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')
+
+# --- Seed: crear usuario administrador por defecto si no existe ---
+# (ADMIN_EMAIL se lee una vez en backend/roles.py)
+ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')
+
+
+def _seed_admin():
+    """Crea el admin por defecto (con filas Cliente y Entrenador) si no existe.
+    Requiere app context; se ejecuta al arrancar, después de sincronizar el esquema.
+    """
     try:
         admin_exists = Usuario.query.filter_by(email=ADMIN_EMAIL).first()
         if not admin_exists:
-            hashed = generate_password_hash(ADMIN_PASSWORD)
+            hashed = hash_password(ADMIN_PASSWORD)
             admin_user = Usuario(email=ADMIN_EMAIL, nombre='Administrador', hashed_password=hashed)
             db.session.add(admin_user)
             db.session.commit()
@@ -928,67 +1014,7 @@ with app.app_context():
             print(f"Admin creado: {ADMIN_EMAIL} (cliente+entrenador creados)")
     except Exception:
         # Si la base de datos aún no está migrada o hay un error, no interrumpimos el arranque
-        pass
-
-# CREAR TABLAS AUTOMÁTICAMENTE EN DESARROLLO (NO EJECUTAR EN PRODUCCIÓN)
-if not DATABASE_URL:
-    try:
-        with app.app_context():
-            db.create_all()
-            print('DB: create_all executed (development mode)')
-            # Ensure development-only columns that might be missing are added.
-            # Some older dev DBs may lack the `activo` column on usuarios which
-            # causes OperationalError when admin endpoints try to read it.
-            try:
-                # SQLite supports simple ADD COLUMN; wrap in try/except to ignore
-                # if the column already exists. This is safe in development only.
-                db.session.execute(text("ALTER TABLE usuarios ADD COLUMN activo BOOLEAN DEFAULT 1"))
-                db.session.commit()
-            except Exception:
-                # ignore failures (e.g., column exists or DB doesn't support ALTER)
-                db.session.rollback()
-            # Also attempt to add entrenador profile columns in dev
-                try:
-                    # bio and telefono are optional; attempt to add if missing
-                    db.session.execute(text("ALTER TABLE entrenadores ADD COLUMN bio TEXT"))
-                    db.session.execute(text("ALTER TABLE entrenadores ADD COLUMN telefono VARCHAR(50)"))
-                    # instagram_url and youtube_url for trainer profile
-                    try:
-                        db.session.execute(text("ALTER TABLE entrenadores ADD COLUMN instagram_url VARCHAR(255)"))
-                    except Exception:
-                        db.session.rollback()
-                    try:
-                        db.session.execute(text("ALTER TABLE entrenadores ADD COLUMN youtube_url VARCHAR(255)"))
-                    except Exception:
-                        db.session.rollback()
-                    db.session.commit()
-                except Exception:
-                    # ignore failures; these ALTERs are best-effort in dev
-                    db.session.rollback()
-
-            # Ensure new development columns/tables for security features
-            try:
-                # add failed_attempts and locked_until if missing
-                db.session.execute(text("ALTER TABLE usuarios ADD COLUMN failed_attempts INTEGER DEFAULT 0"))
-                db.session.execute(text("ALTER TABLE usuarios ADD COLUMN locked_until TIMESTAMP"))
-                # create revoked_tokens table if not exists (SQLite/Postgres compatible)
-                db.session.execute(text("CREATE TABLE IF NOT EXISTS revoked_tokens (id INTEGER PRIMARY KEY AUTOINCREMENT, jti VARCHAR(128) UNIQUE NOT NULL, revoked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-            # Attempt to add new rutina description section columns in development DBs
-            try:
-                db.session.execute(text("ALTER TABLE rutinas ADD COLUMN objetivo_principal TEXT"))
-                db.session.execute(text("ALTER TABLE rutinas ADD COLUMN enfoque_rutina TEXT"))
-                db.session.execute(text("ALTER TABLE rutinas ADD COLUMN cualidades_clave TEXT"))
-                db.session.execute(text("ALTER TABLE rutinas ADD COLUMN duracion_frecuencia TEXT"))
-                db.session.execute(text("ALTER TABLE rutinas ADD COLUMN material_requerido TEXT"))
-                db.session.execute(text("ALTER TABLE rutinas ADD COLUMN instrucciones_estructurales TEXT"))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-    except Exception as e:
-        print('DB create_all failed:', e)
+        db.session.rollback()
 
 
 # Asegura que la carpeta database exista cuando uses SQLite en desarrollo
@@ -1001,36 +1027,35 @@ if not DATABASE_URL:
         pass
 
 
-# --- Reparaciones ligeras de esquema en producción ---
-# Algunos despliegues (p. ej. al restaurar una DB antigua) pueden carecer de
-# columnas que el código asume presentes. Hacemos un intento seguro y no fatal
-# de añadir las columnas mínimas usadas en tiempo de ejecución para evitar
-# errores como `column usuarios.activo does not exist`.
-if DATABASE_URL:
+# --- Sincronización de esquema al arrancar ---
+# Una pasada por proceso (database/schema_sync.py): compara el esquema real con
+# los modelos y crea las tablas, columnas e índices que falten, en desarrollo y
+# en producción. Los handlers ya no reparan el esquema en mitad de una request.
+# Con SCHEMA_SYNC_ON_STARTUP=0 el arranque no ejecuta DDL y la sincronización
+# se lanza a mano con `python -m backend.manage migrate` (p. ej. en el release).
+SCHEMA_SYNC_ON_STARTUP = os.getenv('SCHEMA_SYNC_ON_STARTUP', '1').lower() in ('1', 'true', 'yes')
+if SCHEMA_SYNC_ON_STARTUP:
     try:
         with app.app_context():
-            try:
-                # Añadir columnas si faltan (Postgres soporta IF NOT EXISTS)
-                db.session.execute(text("ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS activo BOOLEAN DEFAULT true"))
-                db.session.execute(text("ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS failed_attempts INTEGER DEFAULT 0"))
-                db.session.execute(text("ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP"))
-                # Tabla para tokens revocados (si no existe)
-                # Use SERIAL para compatibilidad con Postgres; SQLite ignorará SERIAL
-                try:
-                    db.session.execute(text("CREATE TABLE IF NOT EXISTS revoked_tokens (id SERIAL PRIMARY KEY, jti VARCHAR(128) UNIQUE NOT NULL, revoked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"))
-                except Exception:
-                    # Fallback: portable create without SERIAL (use integer PK)
-                    try:
-                        db.session.execute(text("CREATE TABLE IF NOT EXISTS revoked_tokens (id INTEGER PRIMARY KEY, jti VARCHAR(128) UNIQUE NOT NULL, revoked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"))
-                    except Exception:
-                        pass
+            schema_report = sync_schema(db.engine, db.metadata)
+        print('DB schema sync:', schema_report.summary())
+        for msg in schema_report.errors:
+            app.logger.warning('schema sync: %s', msg)
+        if 'content_stats' in schema_report.tables_created:
+            # tabla nueva sobre datos existentes: llenarla una vez
+            with app.app_context():
+                print('content_stats rebuilt:', content_stats.rebuild(db.session), 'rows')
+                db.session.commit()
+        if 'catalogo_publico' in schema_report.tables_created:
+            with app.app_context():
+                print('catalogo_publico rebuilt:', catalogo.rebuild(db.session), 'rows')
                 db.session.commit()
-            except Exception:
-                db.session.rollback()
     except Exception:
-        # No bloquear el arranque por fallos en estas reparaciones; dejamos que
-        # el app.logger capture detalles en los logs de Render.
-        app.logger.exception('production schema repair failed')
+        # No bloquear el arranque; los detalles quedan en los logs
+        app.logger.exception('schema sync failed')
+
+with app.app_context():
+    _seed_admin()
 
 
 # Ruta de prueba rápida
@@ -1103,6 +1128,27 @@ def diag_google():
         return jsonify({'error': 'diag failed'}), 500
 
 
+@app.route('/api/_diag/auth', methods=['GET'])
+def diag_auth():
+    """Per-worker counters for the JWT decode memo and revocation cache/index.
+
+    Counters are process-local: under gunicorn each call reports the worker
+    that served it (`pid` is included to tell them apart).
+    """
+    try:
+        from backend.auth import decode_memo, revocation_cache, revocation_index
+        return jsonify({
+            'pid': os.getpid(),
+            'response_cache': response_cache.stats(),
+            'decode_memo': decode_memo.stats(),
+            'revocation_cache': revocation_cache.stats(),
+            'revocation_index': revocation_index.stats(),
+        }), 200
+    except Exception:
+        app.logger.exception('diag_auth failed')
+        return jsonify({'error': 'diag failed'}), 500
+
+
 @app.route('/api/mediciones', methods=['POST'])
 @jwt_required
 def crear_medicion():
@@ -1224,15 +1270,9 @@ def crear_rutina():
         try:
             db.session.flush()
         except Exception:
-            # If flush fails, attempt to create tables and retry once
-            try:
-                with app.app_context():
-                    db.create_all()
-                db.session.flush()
-            except Exception:
-                db.session.rollback()
-                app.logger.exception('crear_rutina: flush failed')
-                return jsonify({'error': 'db error', 'detail': 'flush failed'}), 500
+            db.session.rollback()
+            app.logger.exception('crear_rutina: flush failed')
+            return jsonify({'error': 'db error', 'detail': 'flush failed'}), 500
 
         # Attempt to create ContentReview in a nested transaction (savepoint).
         review_created = False
@@ -1276,78 +1316,29 @@ def crear_rutina():
         try:
             db.session.commit()
         except Exception as e:
-            app.logger.exception('crear_rutina: commit failed, attempting resilient save')
-            # Ensure session is clean before any repair attempts
+            app.logger.exception('crear_rutina: commit failed')
             try:
                 db.session.rollback()
             except Exception:
                 pass
-
-            err_str = str(e)
-            # If the error indicates missing columns, attempt idempotent ALTER TABLEs for rutinas
-            if 'UndefinedColumn' in err_str or ('column' in err_str and 'does not exist' in err_str) or 'seccion_descripcion' in err_str:
-                app.logger.info('crear_rutina: detected missing rutinas column(s), attempting lightweight repair')
-                try:
-                    with app.app_context():
-                        alter_stmts = [
-                            "ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS seccion_descripcion TEXT",
-                            "ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS objetivo_principal TEXT",
-                            "ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS enfoque_rutina TEXT",
-                            "ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS cualidades_clave TEXT",
-                            "ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS duracion_frecuencia VARCHAR(255)",
-                            "ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS material_requerido TEXT",
-                            "ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS instrucciones_estructurales TEXT",
-                            "ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS link_url VARCHAR(1024)",
-                            "ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS nivel VARCHAR(50)",
-                            "ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS es_publica BOOLEAN DEFAULT FALSE",
-                            "ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS creado_en TIMESTAMP"
-                        ]
-                        for s in alter_stmts:
-                            try:
-                                db.session.execute(text(s))
-                            except Exception:
-                                app.logger.debug('crear_rutina: non-fatal ALTER failed: %s', s)
-                        try:
-                            db.session.commit()
-                        except Exception:
-                            db.session.rollback()
-                except Exception:
-                    app.logger.exception('crear_rutina: schema repair attempt failed')
-
-                # After repair attempt, try the insert again in a fresh transaction
-                try:
-                    db.session.add(rutina)
-                    db.session.commit()
-                except Exception as e2:
-                    app.logger.exception('crear_rutina: retry after schema repair failed')
+            # Columnas que falten las añade la sincronización de esquema al arrancar
+            # (database/schema_sync.py); aquí solo se registra el fallo.
+            try:
+                logs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
+                os.makedirs(logs_dir, exist_ok=True)
+                with open(os.path.join(logs_dir, 'crear_rutina_error.log'), 'a', encoding='utf-8') as fh:
+                    fh.write('----\n')
+                    fh.write(f'TIME: {datetime.utcnow().isoformat()}\n')
+                    fh.write('TRACEBACK:\n')
+                    fh.write(traceback.format_exc())
+                    fh.write('\nPAYLOAD:\n')
                     try:
-                        db.session.rollback()
+                        fh.write(repr(data) + '\n')
                     except Exception:
                         pass
-                    
-                    return jsonify({'error': 'db error', 'detail': str(e2)}), 500
-            else:
-                # Non-schema related commit failure: return 500 after rollback and logging
-                try:
-                    db.session.rollback()
-                except Exception:
-                    pass
-                try:
-                    logs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
-                    os.makedirs(logs_dir, exist_ok=True)
-                    with open(os.path.join(logs_dir, 'crear_rutina_error.log'), 'a', encoding='utf-8') as fh:
-                        fh.write('----\n')
-                        fh.write(f'TIME: {datetime.utcnow().isoformat()}\n')
-                        fh.write('TRACEBACK:\n')
-                        fh.write(traceback.format_exc())
-                        fh.write('\nPAYLOAD:\n')
-                        try:
-                            fh.write(repr(data) + '\n')
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-                return jsonify({'error': 'db error', 'detail': str(e)}), 500
+            except Exception:
+                pass
+            return jsonify({'error': 'db error', 'detail': str(e)}), 500
 
         # Return success payload after creating rutina
         return jsonify({'message': 'rutina creada', 'rutina': {'id': rutina.id, 'nombre': rutina.nombre, 'descripcion': rutina.descripcion, 'link_url': getattr(rutina, 'link_url', None), 'objetivo_principal': rutina.objetivo_principal, 'enfoque_rutina': rutina.enfoque_rutina, 'cualidades_clave': rutina.cualidades_clave, 'duracion_frecuencia': rutina.duracion_frecuencia, 'material_requerido': rutina.material_requerido, 'instrucciones_estructurales': rutina.instrucciones_estructurales, 'nivel': rutina.nivel, 'es_publica': rutina.es_publica, 'creado_en': rutina.creado_en.isoformat()}}), 201
@@ -1389,57 +1380,12 @@ def listar_rutinas(entrenador_usuario_id):
         if not entrenador:
             return jsonify({'error': 'entrenador not found'}), 404
 
-        # Ejecutar la consulta de forma resiliente: si faltan columnas en la tabla
-        # (problema observado en despliegues), intentamos reparar el esquema y reintentar.
         try:
             rutinas = Rutina.query.filter_by(entrenador_id=entrenador.id).order_by(Rutina.creado_en.desc()).all()
         except Exception as e:
-            err_str = str(e)
-            app.logger.exception('listar_rutinas: query failed, attempting repair')
-            # Intentar reparaciones simples cuando la excepción sugiere columna faltante
-            if 'UndefinedColumn' in err_str or ('column' in err_str and 'does not exist' in err_str) or 'no such column' in err_str:
-                try:
-                    with app.app_context():
-                        db.create_all()
-                        expected_cols = {
-                            'entrenador_id': 'INTEGER',
-                            'nombre': 'VARCHAR(200)',
-                            'descripcion': 'TEXT',
-                            'seccion_descripcion': 'TEXT',
-                            'objetivo_principal': 'TEXT',
-                            'enfoque_rutina': 'TEXT',
-                            'cualidades_clave': 'TEXT',
-                            'duracion_frecuencia': 'VARCHAR(255)',
-                            'material_requerido': 'TEXT',
-                            'instrucciones_estructurales': 'TEXT',
-                            'link_url': 'VARCHAR(1024)',
-                            'nivel': 'VARCHAR(50)',
-                            'es_publica': 'BOOLEAN',
-                            'creado_en': 'TIMESTAMP'
-                        }
-                        for c, ttype in expected_cols.items():
-                            try:
-                                db.session.execute(text(f"ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS {c} {ttype}"))
-                            except Exception:
-                                pass
-                        try:
-                            has = db.session.execute(text("SELECT conname FROM pg_constraint WHERE conname='fk_rutinas_entrenador' LIMIT 1")).fetchone()
-                            if not has:
-                                db.session.execute(text('ALTER TABLE rutinas ADD CONSTRAINT fk_rutinas_entrenador FOREIGN KEY (entrenador_id) REFERENCES entrenadores(id)'))
-                        except Exception:
-                            db.session.rollback()
-                        try:
-                            db.session.commit()
-                        except Exception:
-                            db.session.rollback()
-                except Exception:
-                    db.session.rollback()
-            # Reintentar la consulta una vez
-            try:
-                rutinas = Rutina.query.filter_by(entrenador_id=entrenador.id).order_by(Rutina.creado_en.desc()).all()
-            except Exception as e2:
-                app.logger.exception('listar_rutinas: still failing after repair')
-                return jsonify({'error': 'db error', 'detail': str(e2)}), 500
+            db.session.rollback()
+            app.logger.exception('listar_rutinas: query failed')
+            return jsonify({'error': 'db error', 'detail': str(e)}), 500
 
         result = []
         for r in rutinas:
@@ -1456,88 +1402,70 @@ def listar_rutinas(entrenador_usuario_id):
         return jsonify({'error': 'internal', 'detail': str(exc)}), 500
 
 
+def _public_rutina_columns():
+    """Claves de /api/rutinas/public -> columna de catalogo_publico."""
+    c = CatalogoPublico
+    return {
+        'id': c.content_id,
+        'nombre': c.nombre,
+        'descripcion': c.descripcion,
+        'objetivo_principal': c.objetivo_principal,
+        'enfoque_rutina': c.enfoque_rutina,
+        'cualidades_clave': c.cualidades_clave,
+        'duracion_frecuencia': c.duracion_frecuencia,
+        'material_requerido': c.material_requerido,
+        'instrucciones_estructurales': c.instrucciones_estructurales,
+        'seccion_descripcion': c.seccion_descripcion,
+        'nivel': c.nivel,
+        # el catálogo sólo tiene rutinas publicadas
+        'es_publica': db.true(),
+        'creado_en': c.creado_en,
+        'entrenador_nombre': c.entrenador_nombre,
+        'entrenador_id': c.entrenador_id,
+        'entrenador_usuario_id': c.entrenador_usuario_id,
+        'link_url': c.link_url,
+    }
+
+
+def _public_rutinas_select(page, nivel=None):
+    """SELECT sobre catalogo_publico (sin joins) para el listado público.
+
+    El catálogo ya excluye rutinas no publicadas y las de dueños inactivos o
+    admin (backend/catalogo.py). Devuelve (claves, stmt) según la proyección de `page`.
+    """
+    keys, cols = project(_public_rutina_columns(), page.fields, CatalogoPublico.content_id, CatalogoPublico.creado_en)
+    stmt = db.select(*cols).where(CatalogoPublico.tipo == 'rutina')
+    if nivel:
+        stmt = stmt.where(CatalogoPublico.nivel == nivel)
+    return keys, apply_keyset(stmt, page, CatalogoPublico.content_id, CatalogoPublico.creado_en)
+
+
 @app.route('/api/rutinas/public', methods=['GET'])
+@conditional_get(response_cache, fingerprint=_catalogo_fingerprint)
+@cached_response(response_cache)
 def listar_rutinas_publicas():
     """Devuelve rutinas públicas (es_publica == True) ordenadas por creación.
-    Endpoint público: no requiere JWT. Se intenta ser resiliente ante fallos
-    de esquema similar a `listar_rutinas`.
+    Endpoint público: no requiere JWT. Una sola consulta a catalogo_publico
+    alimenta un serializador en streaming, así el coste en queries no depende
+    del número de rutinas. Acepta `limit`/`cursor`/`fields` (ver backend/pagination.py).
     """
+    # Support optional filtering by nivel (e.g. ?nivel=principiante)
+    nivel = request.args.get('nivel')
     try:
-        try:
-            # Support optional filtering by nivel (e.g. ?nivel=principiante)
-            nivel = request.args.get('nivel')
-            q = Rutina.query.filter_by(es_publica=True)
-            if nivel:
-                q = q.filter(Rutina.nivel == nivel)
-            rutinas = q.order_by(Rutina.creado_en.desc()).all()
-        except Exception as e:
-            # intento de reparación ligera
-            err_str = str(e)
-            app.logger.exception('listar_rutinas_publicas: query failed, attempting repair')
-            if 'UndefinedColumn' in err_str or ('column' in err_str and 'does not exist' in err_str) or 'no such column' in err_str:
-                try:
-                    with app.app_context():
-                        db.create_all()
-                        expected_cols = {
-                            'entrenador_id': 'INTEGER',
-                            'nombre': 'VARCHAR(200)',
-                            'descripcion': 'TEXT',
-                            'nivel': 'VARCHAR(50)',
-                            'es_publica': 'BOOLEAN',
-                            'creado_en': 'TIMESTAMP'
-                        }
-                        for c, ttype in expected_cols.items():
-                            try:
-                                db.session.execute(text(f"ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS {c} {ttype}"))
-                            except Exception:
-                                pass
-                        try:
-                            db.session.commit()
-                        except Exception:
-                            db.session.rollback()
-                except Exception:
-                    db.session.rollback()
-            # reintentar una vez
-            try:
-                rutinas = Rutina.query.filter_by(es_publica=True).order_by(Rutina.creado_en.desc()).all()
-            except Exception as e2:
-                app.logger.exception('listar_rutinas_publicas: still failing after repair')
-                return jsonify({'error': 'db error', 'detail': str(e2)}), 500
-
-        result = []
-        for r in rutinas:
-            creado_val = None
-            try:
-                creado_val = r.creado_en.isoformat() if getattr(r, 'creado_en', None) else None
-            except Exception:
-                creado_val = None
-            # intentar obtener nombre del entrenador si existe y sólo mostrar si el usuario está activo
-            entrenador_nombre = None
-            try:
-                ent = _safe_entrenador_by_id(r.entrenador_id)
-                # skip rutinas if entrenador was deleted or its usuario is missing
-                if not ent or not getattr(ent, 'usuario_id', None):
-                    continue
-                # Query Usuario.nombre directly to avoid touching Entrenador relationship
-                try:
-                    urow = db.session.execute(text('SELECT nombre, activo FROM usuarios WHERE id = :uid'), {'uid': ent.usuario_id}).fetchone()
-                    if not urow:
-                        continue
-                    keys = getattr(urow, 'keys', lambda: [])()
-                    activo_val = urow['activo'] if 'activo' in keys else (urow[1] if len(urow) > 1 else None)
-                    if activo_val is False:
-                        continue
-                    entrenador_nombre = urow['nombre'] if 'nombre' in keys else (urow[0] if len(urow) > 0 else None)
-                except Exception:
-                    entrenador_nombre = None
-            except Exception:
-                entrenador_nombre = None
-            result.append({'id': r.id, 'nombre': r.nombre, 'descripcion': r.descripcion, 'objetivo_principal': getattr(r, 'objetivo_principal', None), 'enfoque_rutina': getattr(r, 'enfoque_rutina', None), 'cualidades_clave': getattr(r, 'cualidades_clave', None), 'duracion_frecuencia': getattr(r, 'duracion_frecuencia', None), 'material_requerido': getattr(r, 'material_requerido', None), 'instrucciones_estructurales': getattr(r, 'instrucciones_estructurales', None), 'seccion_descripcion': getattr(r, 'seccion_descripcion', None), 'nivel': r.nivel, 'es_publica': r.es_publica, 'creado_en': creado_val, 'entrenador_nombre': entrenador_nombre, 'entrenador_id': r.entrenador_id, 'entrenador_usuario_id': getattr(ent, 'usuario_id', None) if ent else None, 'link_url': getattr(r, 'link_url', None)})
-        return jsonify(result), 200
+        page = parse_page_args(request.args, _public_rutina_columns())
+        keys, stmt = _public_rutinas_select(page, nivel)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    stmt = stmt.execution_options(yield_per=500)
+    try:
+        rows = db.session.execute(stmt)
     except Exception as e:
-        app.logger.exception('listar_rutinas_publicas: unexpected failure')
+        db.session.rollback()
+        app.logger.exception('listar_rutinas_publicas: query failed')
         return jsonify({'error': 'db error', 'detail': str(e)}), 500
 
+    return page_response(rows, page, row_serializer(keys))
+
 
 @app.route('/api/rutinas/<int:rutina_id>', methods=['GET'])
 def obtener_rutina_publica(rutina_id):
@@ -1561,7 +1489,7 @@ def obtener_rutina_publica(rutina_id):
                 if auth_header.startswith('Bearer '):
                     token = auth_header.split(' ', 1)[1]
                     try:
-                        from auth import decode_token
+                        from backend.auth import decode_token
                         token_payload = decode_token(token)
                     except Exception:
                         token_payload = None
@@ -1636,6 +1564,7 @@ def obtener_rutina_publica(rutina_id):
 # Ruta pública alternativa y explícita para detalle de rutina, evita conflicto con
 # rutas que aceptan `entrenador_usuario_id` en la misma posición de URL.
 @app.route('/api/rutinas/public/<int:rutina_id>', methods=['GET'])
+@cached_response(response_cache, cacheable=lambda resp: (resp.get_json(silent=True) or {}).get('es_publica') is True)
 def obtener_rutina_publica_explicit(rutina_id):
     try:
         rutina = Rutina.query.filter_by(id=rutina_id).first()
@@ -1650,7 +1579,7 @@ def obtener_rutina_publica_explicit(rutina_id):
                 if auth_header.startswith('Bearer '):
                     token = auth_header.split(' ', 1)[1]
                     try:
-                        from auth import decode_token
+                        from backend.auth import decode_token
                         token_payload = decode_token(token)
                     except Exception:
                         token_payload = None
@@ -1729,50 +1658,35 @@ def obtener_rutina_publica_public_id_guard(rutina_id):
 @jwt_required
 def seguir_rutina(rutina_id):
     """Asocia la rutina al cliente autenticado (guardar/seguir rutina).
-    Crea una tabla ligera `cliente_rutina` si no existe y añade la relación
-    evitando duplicados. Requiere token JWT y que el usuario tenga una fila
-    `Cliente` asociada a su `usuario_id`.
+    Un único INSERT ... SELECT idempotente (database/repositories.py). Si no
+    inserta nada se averigua por qué: rutina inexistente (404), usuario sin
+    fila `Cliente` (se crea y se reintenta) o rutina ya guardada (200).
     """
     token_user_id = request.jwt_payload.get('user_id')
     if not token_user_id:
         return jsonify({'error': 'authentication required'}), 401
 
     try:
-        cliente = Cliente.query.filter_by(usuario_id=token_user_id).first()
-    except Exception:
-        cliente = None
-    # If the authenticated user doesn't yet have a Cliente row, create it automatically.
-    # This makes the UX smoother for users who registered but whose Cliente row wasn't provisioned.
-    if not cliente:
-        try:
-            cliente = Cliente(usuario_id=token_user_id)
-            db.session.add(cliente)
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            app.logger.exception('seguir_rutina: failed creating Cliente row')
-            return jsonify({'error': 'cliente not found and could not be created', 'detail': str(e)}), 500
-
-    try:
-        rutina = Rutina.query.filter_by(id=rutina_id).first()
-    except Exception:
-        rutina = None
-    if not rutina:
-        return jsonify({'error': 'rutina not found'}), 404
+        inserted = follow_rutina(db.session, token_user_id, rutina_id)
+        if inserted:
+            content_stats.bump(db.session, 'rutina', rutina_id, saved_count=1)
+        db.session.commit()
+        if inserted:
+            return jsonify({'message': 'rutina guardada'}), 200
 
-    try:
-        # Ensure lightweight join table exists. Use DB-native CREATE TABLE IF NOT EXISTS
-        # to avoid needing full migrations in many environments.
-        with app.app_context():
+        if not db.session.query(Rutina.id).filter_by(id=rutina_id).first():
+            return jsonify({'error': 'rutina not found'}), 404
+        if not db.session.query(Cliente.id).filter_by(usuario_id=token_user_id).first():
+            # If the authenticated user doesn't yet have a Cliente row, create it automatically.
             try:
-                db.session.execute(text('CREATE TABLE IF NOT EXISTS cliente_rutina (cliente_id INTEGER NOT NULL, rutina_id INTEGER NOT NULL, PRIMARY KEY (cliente_id, rutina_id))'))
-            except Exception:
-                # table creation might fail on restricted DBs; continue and attempt insert
-                pass
-
-            # Insert only if not exists (works in Postgres and SQLite via SELECT-WHERE NOT EXISTS pattern)
-            insert_sql = text('INSERT INTO cliente_rutina (cliente_id, rutina_id) SELECT :cid, :rid WHERE NOT EXISTS (SELECT 1 FROM cliente_rutina WHERE cliente_id = :cid AND rutina_id = :rid)')
-            db.session.execute(insert_sql, {'cid': cliente.id, 'rid': rutina.id})
+                db.session.add(Cliente(usuario_id=token_user_id))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                app.logger.exception('seguir_rutina: failed creating Cliente row')
+                return jsonify({'error': 'cliente not found and could not be created', 'detail': str(e)}), 500
+            if follow_rutina(db.session, token_user_id, rutina_id):
+                content_stats.bump(db.session, 'rutina', rutina_id, saved_count=1)
             db.session.commit()
         return jsonify({'message': 'rutina guardada'}), 200
     except Exception as e:
@@ -1792,143 +1706,46 @@ def dejar_de_seguir_rutina(rutina_id):
         return jsonify({'error': 'authentication required'}), 401
 
     try:
-        cliente = Cliente.query.filter_by(usuario_id=token_user_id).first()
-    except Exception:
-        cliente = None
-
-    if not cliente:
-        return jsonify({'error': 'cliente not found'}), 404
-
-    try:
-        # Attempt to delete the row from cliente_rutina; be lenient if table missing
-        try:
-            delete_sql = text('DELETE FROM cliente_rutina WHERE cliente_id = :cid AND rutina_id = :rid')
-            db.session.execute(delete_sql, {'cid': cliente.id, 'rid': rutina_id})
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
-            # If the table doesn't exist or deletion failed, return success (idempotent)
-            return jsonify({'message': 'no-op'}), 200
-
-        return jsonify({'message': 'rutina eliminada de guardadas'}), 200
+        deleted = unfollow_rutina(db.session, token_user_id, rutina_id)
+        if deleted:
+            content_stats.bump(db.session, 'rutina', rutina_id, saved_count=-1)
+        db.session.commit()
+        if not deleted and not db.session.query(Cliente.id).filter_by(usuario_id=token_user_id).first():
+            return jsonify({'error': 'cliente not found'}), 404
+        return jsonify({'message': 'rutina eliminada de guardadas' if deleted else 'no-op'}), 200
     except Exception as e:
         db.session.rollback()
         app.logger.exception('dejar_de_seguir_rutina failed')
         return jsonify({'error': 'db error', 'detail': str(e)}), 500
 
 
+_MIS_RUTINAS_KEYS = (
+    'id', 'nombre', 'descripcion', 'nivel', 'es_publica', 'creado_en', 'link_url',
+    'seccion_descripcion', 'objetivo_principal', 'enfoque_rutina', 'cualidades_clave',
+    'duracion_frecuencia', 'material_requerido', 'instrucciones_estructurales',
+)
+
+
 @app.route('/api/rutinas/mis', methods=['GET'])
 @jwt_required
 def listar_mis_rutinas():
     """Devuelve las rutinas guardadas por el cliente autenticado.
-    Requiere JWT. Intenta ser resiliente ante ausencia de la tabla cliente_rutina.
+    Requiere JWT. Una sola consulta (cliente_rutina ⋈ rutinas, con el cliente
+    resuelto dentro de la consulta); un usuario sin cliente recibe [].
+    Las solicitudes se listan aparte en /api/solicitudes/mis.
     """
     token_user_id = request.jwt_payload.get('user_id')
     if not token_user_id:
         return jsonify({'error': 'authentication required'}), 401
 
     try:
-        cliente = Cliente.query.filter_by(usuario_id=token_user_id).first()
+        columns = [getattr(Rutina, k).label(k) for k in _MIS_RUTINAS_KEYS]
+        rows = followed_rutinas(db.session, token_user_id, columns)
+        serialize = row_serializer(_MIS_RUTINAS_KEYS)
+        return jsonify([serialize(r) for r in rows]), 200
     except Exception:
-        cliente = None
-
-    if not cliente:
-        # create cliente row for the user if missing to keep behavior consistent
-        try:
-            cliente = Cliente(usuario_id=token_user_id)
-            db.session.add(cliente)
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
-            return jsonify({'error': 'cliente not found'}), 404
-
-    try:
-        # Ensure join table exists (best-effort)
-        try:
-            db.session.execute(text('CREATE TABLE IF NOT EXISTS cliente_rutina (cliente_id INTEGER NOT NULL, rutina_id INTEGER NOT NULL, PRIMARY KEY (cliente_id, rutina_id))'))
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
-
-        # Try raw SQL join first (fast). If it fails (missing table/permission),
-        # fall back to an ORM-based query using SolicitudPlan -> Rutina.
-        try:
-            # Select all descriptive columns so frontend always receives full rutina data
-            q = text(
-                'SELECT r.id, r.nombre, r.descripcion, r.nivel, r.es_publica, r.creado_en, r.link_url as link_url, '
-                'r.seccion_descripcion, r.objetivo_principal, r.enfoque_rutina, r.cualidades_clave, '
-                'r.duracion_frecuencia, r.material_requerido, r.instrucciones_estructurales '
-                'FROM rutinas r JOIN cliente_rutina cr ON cr.rutina_id = r.id '
-                'WHERE cr.cliente_id = :cid ORDER BY r.creado_en DESC'
-            )
-            rows = db.session.execute(q, {'cid': cliente.id}).fetchall()
-            result = []
-            for r in rows:
-                creado_val = None
-                try:
-                    # r.creado_en may be a datetime or string
-                    creado_val = r['creado_en'].isoformat() if getattr(r['creado_en'], 'isoformat', None) else str(r['creado_en'])
-                except Exception:
-                    creado_val = None
-                # Build a safe dict even if some columns are missing
-                result.append({
-                    'id': r['id'],
-                    'nombre': r['nombre'],
-                    'descripcion': r['descripcion'],
-                    'nivel': r['nivel'] if 'nivel' in getattr(r, 'keys', lambda: [])() else (r.get('nivel') if hasattr(r, 'get') else None),
-                    'es_publica': r['es_publica'] if 'es_publica' in getattr(r, 'keys', lambda: [])() else None,
-                    'creado_en': creado_val,
-                    'link_url': r['link_url'] if 'link_url' in getattr(r, 'keys', lambda: [])() else None,
-                    'seccion_descripcion': r['seccion_descripcion'] if 'seccion_descripcion' in getattr(r, 'keys', lambda: [])() else None,
-                    'objetivo_principal': r['objetivo_principal'] if 'objetivo_principal' in getattr(r, 'keys', lambda: [])() else None,
-                    'enfoque_rutina': r['enfoque_rutina'] if 'enfoque_rutina' in getattr(r, 'keys', lambda: [])() else None,
-                    'cualidades_clave': r['cualidades_clave'] if 'cualidades_clave' in getattr(r, 'keys', lambda: [])() else None,
-                    'duracion_frecuencia': r['duracion_frecuencia'] if 'duracion_frecuencia' in getattr(r, 'keys', lambda: [])() else None,
-                    'material_requerido': r['material_requerido'] if 'material_requerido' in getattr(r, 'keys', lambda: [])() else None,
-                    'instrucciones_estructurales': r['instrucciones_estructurales'] if 'instrucciones_estructurales' in getattr(r, 'keys', lambda: [])() else None
-                })
-            return jsonify(result), 200
-        except Exception:
-            # Log and attempt an ORM fallback: use SolicitudPlan entries to infer rutinas
-            app.logger.exception('listar_mis_rutinas: raw SQL failed, attempting ORM fallback')
-            db.session.rollback()
-            try:
-                from database.database import SolicitudPlan
-                # Get rutina_ids from solicitudes for this cliente as a reasonable fallback
-                sols = SolicitudPlan.query.filter_by(cliente_id=cliente.id).order_by(SolicitudPlan.creado_en.desc()).all()
-                rutina_ids = [s.rutina_id for s in sols if getattr(s, 'rutina_id', None)]
-                result = []
-                if rutina_ids:
-                        rutinas = Rutina.query.filter(Rutina.id.in_(rutina_ids)).order_by(Rutina.creado_en.desc()).all()
-                        for r in rutinas:
-                            creado_val = None
-                            try:
-                                creado_val = r.creado_en.isoformat() if getattr(r, 'creado_en', None) else None
-                            except Exception:
-                                creado_val = None
-                            result.append({
-                                'id': r.id,
-                                'nombre': r.nombre,
-                                'descripcion': r.descripcion,
-                                'nivel': getattr(r, 'nivel', None),
-                                'es_publica': getattr(r, 'es_publica', None),
-                                'creado_en': creado_val,
-                                'link_url': getattr(r, 'link_url', None),
-                                'seccion_descripcion': getattr(r, 'seccion_descripcion', None),
-                                'objetivo_principal': getattr(r, 'objetivo_principal', None),
-                                'enfoque_rutina': getattr(r, 'enfoque_rutina', None),
-                                'cualidades_clave': getattr(r, 'cualidades_clave', None),
-                                'duracion_frecuencia': getattr(r, 'duracion_frecuencia', None),
-                                'material_requerido': getattr(r, 'material_requerido', None),
-                                'instrucciones_estructurales': getattr(r, 'instrucciones_estructurales', None)
-                            })
-                # If no rutina_ids or the fallback produced nothing, return empty list instead of 500
-                return jsonify(result), 200
-            except Exception:
-                app.logger.exception('listar_mis_rutinas: ORM fallback also failed')
-                # Return an empty list to avoid surfacing a 500 to the frontend for this user-facing call
-    except Exception:
-        app.logger.exception('listar_mis_rutinas: ORM fallback also failed')
+        db.session.rollback()
+        app.logger.exception('listar_mis_rutinas failed')
         # Return an empty list to avoid surfacing a 500 to the frontend for this user-facing call
         return jsonify([]), 200
 
@@ -1959,7 +1776,9 @@ def listar_solicitudes_mis():
                 creado = None
             rutina = None
             try:
-                rutina = Rutina.query.filter_by(id=s.rutina_id).first()
+                # plan-based solicitudes have no rutina_id; `id IS NULL` would scan rutinas
+                if s.rutina_id is not None:
+                    rutina = Rutina.query.filter_by(id=s.rutina_id).first()
             except Exception:
                 rutina = None
             # Provide plan/rutina names defensively so the frontend doesn't show 'null'
@@ -2014,35 +1833,13 @@ def solicitar_plan(rutina_id):
         if not rutina:
             return jsonify({'error': 'rutina not found'}), 404
 
-        # create solicitudes_plan table if missing
-        try:
-            db.session.execute(text(
-                "CREATE TABLE IF NOT EXISTS solicitudes_plan ("
-                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
-                "cliente_id INTEGER NOT NULL, "
-                "rutina_id INTEGER, "
-                "plan_id INTEGER, "
-                "estado VARCHAR(50) DEFAULT 'pendiente', "
-                "nota TEXT, "
-                "creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
-            ))
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
-
-            # Ensure columns exist on older DBs: add plan_id and rutina_id if missing
-            try:
-                db.session.execute(text("ALTER TABLE solicitudes_plan ADD COLUMN plan_id INTEGER"))
-                db.session.execute(text("ALTER TABLE solicitudes_plan ADD COLUMN rutina_id INTEGER"))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-
         from database.database import SolicitudPlan
         # For rutina-based requests we auto-accept (estado 'aceptado') so the
         # cliente sees the solicitud active immediately (workflow: rutina -> plan)
-        s = SolicitudPlan(cliente_id=cliente.id, rutina_id=rutina.id, estado='aceptado')
+        s = SolicitudPlan(cliente_id=cliente.id, rutina_id=rutina.id, estado='aceptado',
+                          aceptado_en=datetime.utcnow())
         db.session.add(s)
+        content_stats.bump_estado(db.session, s, None, s.estado)
         db.session.commit()
         creado = None
         try:
@@ -2083,6 +1880,7 @@ def cancelar_solicitud(solicitud_id):
 
         # Mark the solicitud as canceled instead of deleting it to keep history
         try:
+            content_stats.bump_estado(db.session, s, s.estado, 'cancelado')
             s.estado = 'cancelado'
             db.session.add(s)
             db.session.commit()
@@ -2096,11 +1894,58 @@ def cancelar_solicitud(solicitud_id):
         return jsonify({'error': 'db error', 'detail': str(e)}), 500
 
 
+def _pendientes_columns():
+    """Claves de /api/solicitudes/pendientes -> columna (outer joins de _pendientes_select)."""
+    from database.database import SolicitudPlan, PlanAlimenticio
+    return {
+        'id': SolicitudPlan.id,
+        'rutina_id': SolicitudPlan.rutina_id,
+        'plan_id': SolicitudPlan.plan_id,
+        # nombre de la rutina, o del plan si la solicitud es de plan
+        'rutina_nombre': db.func.coalesce(Rutina.nombre, PlanAlimenticio.nombre, 'Sin nombre'),
+        'estado': SolicitudPlan.estado,
+        'nota': SolicitudPlan.nota,
+        'creado_en': SolicitudPlan.creado_en,
+        'cliente_id': SolicitudPlan.cliente_id,
+        'cliente_nombre': Usuario.nombre,
+    }
+
+
+def _pendientes_select(entrenador_id, page):
+    """Solicitudes pendientes sobre rutinas o planes del entrenador, en una consulta.
+
+    Un UNION de ids (una rama por rutinas y otra por planes, cada una por
+    índice) se une con outer joins a rutina/plan/cliente/usuario para sacar
+    los nombres sin consultas por fila.
+    """
+    from database.database import SolicitudPlan, PlanAlimenticio
+    ids = db.union(
+        db.select(SolicitudPlan.id)
+        .join(Rutina, Rutina.id == SolicitudPlan.rutina_id)
+        .where(Rutina.entrenador_id == entrenador_id, SolicitudPlan.estado == 'pendiente'),
+        db.select(SolicitudPlan.id)
+        .join(PlanAlimenticio, PlanAlimenticio.id == SolicitudPlan.plan_id)
+        .where(PlanAlimenticio.entrenador_id == entrenador_id, SolicitudPlan.estado == 'pendiente'),
+    ).subquery('pendientes')
+    keys, cols = project(_pendientes_columns(), page.fields, SolicitudPlan.id, SolicitudPlan.creado_en)
+    stmt = (
+        db.select(*cols)
+        .select_from(SolicitudPlan)
+        .join(ids, ids.c.id == SolicitudPlan.id)
+        .outerjoin(Rutina, Rutina.id == SolicitudPlan.rutina_id)
+        .outerjoin(PlanAlimenticio, PlanAlimenticio.id == SolicitudPlan.plan_id)
+        .outerjoin(Cliente, Cliente.id == SolicitudPlan.cliente_id)
+        .outerjoin(Usuario, Usuario.id == Cliente.usuario_id)
+    )
+    return keys, apply_keyset(stmt, page, SolicitudPlan.id, SolicitudPlan.creado_en)
+
+
 @app.route('/api/solicitudes/pendientes', methods=['GET'])
 @jwt_required
 def listar_solicitudes_pendientes():
     """Listado de solicitudes pendientes para el entrenador autenticado.
-    Devuelve solo solicitudes cuyo plan/rutina pertenece al entrenador.
+    Devuelve solo solicitudes cuyo plan/rutina pertenece al entrenador, más
+    recientes primero, con `limit`/`cursor`/`fields` (ver backend/pagination.py).
     """
     token_user_id = request.jwt_payload.get('user_id')
     if not token_user_id:
@@ -2114,70 +1959,17 @@ def listar_solicitudes_pendientes():
         return jsonify({'error': 'forbidden: not entrenador'}), 403
 
     try:
-        from database.database import SolicitudPlan, PlanAlimenticio, Rutina
-        # Find solicitudes with estado 'pendiente' where the related plan or rutina
-        # belongs to this entrenador.
-        # We'll query both sides defensively.
-        result = []
-
-        # solicitudes that reference plans owned by this entrenador
-        try:
-            plan_sols = db.session.query(SolicitudPlan).join(PlanAlimenticio, SolicitudPlan.plan_id == PlanAlimenticio.id).filter(PlanAlimenticio.entrenador_id == entrenador.id, SolicitudPlan.estado == 'pendiente').all()
-        except Exception:
-            plan_sols = []
-
-        # solicitudes that reference rutinas owned by this entrenador
-        try:
-            rutina_sols = db.session.query(SolicitudPlan).join(Rutina, SolicitudPlan.rutina_id == Rutina.id).filter(Rutina.entrenador_id == entrenador.id, SolicitudPlan.estado == 'pendiente').all()
-        except Exception:
-            rutina_sols = []
-
-        todos = list({s.id: s for s in (plan_sols + rutina_sols)}.values())
-        for s in todos:
-            creado = None
-            try:
-                creado = s.creado_en.isoformat() if getattr(s, 'creado_en', None) else None
-            except Exception:
-                creado = None
-            rutina_nombre = None
-            plan_nombre = None
-            cliente_nombre = None
-            try:
-                if getattr(s, 'rutina_id', None):
-                    r = Rutina.query.filter_by(id=s.rutina_id).first()
-                    if r:
-                        rutina_nombre = getattr(r, 'nombre', None)
-            except Exception:
-                rutina_nombre = None
-            if not rutina_nombre and getattr(s, 'plan_id', None):
-                try:
-                    p = PlanAlimenticio.query.filter_by(id=s.plan_id).first()
-                    if p:
-                        plan_nombre = getattr(p, 'nombre', None)
-                except Exception:
-                    plan_nombre = None
-            # attempt to include the cliente's usuario.nombre for clarity
-            try:
-                # prefer relationship if present
-                if getattr(s, 'cliente', None) and getattr(s.cliente, 'usuario', None):
-                    cliente_nombre = getattr(s.cliente.usuario, 'nombre', None)
-                else:
-                    # fallback: query Cliente -> Usuario
-                    from database.database import Cliente, Usuario
-                    c = Cliente.query.filter_by(id=getattr(s, 'cliente_id', None)).first()
-                    if c:
-                        u = Usuario.query.filter_by(id=getattr(c, 'usuario_id', None)).first()
-                        if u:
-                            cliente_nombre = getattr(u, 'nombre', None)
-            except Exception:
-                cliente_nombre = None
-            display_nombre = rutina_nombre or plan_nombre or 'Sin nombre'
-            result.append({'id': s.id, 'rutina_id': s.rutina_id, 'plan_id': s.plan_id, 'rutina_nombre': display_nombre, 'estado': s.estado, 'nota': s.nota, 'creado_en': creado, 'cliente_id': s.cliente_id, 'cliente_nombre': cliente_nombre})
-
-        return jsonify(result), 200
+        page = parse_page_args(request.args, _pendientes_columns())
+        keys, stmt = _pendientes_select(entrenador.id, page)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        rows = db.session.execute(stmt)
     except Exception as e:
+        db.session.rollback()
         app.logger.exception('listar_solicitudes_pendientes failed')
         return jsonify({'error': 'db error', 'detail': str(e)}), 500
+    return page_response(rows, page, row_serializer(keys))
 
 
 @app.route('/api/solicitudes/<int:solicitud_id>', methods=['PUT'])
@@ -2228,6 +2020,9 @@ def actualizar_solicitud_estado(solicitud_id):
         if not owner_ok:
             return jsonify({'error': 'forbidden: not owner'}), 403
 
+        content_stats.bump_estado(db.session, s, s.estado, new_estado)
+        if new_estado == 'aceptado' and s.estado != 'aceptado':
+            s.aceptado_en = datetime.utcnow()
         s.estado = new_estado
         db.session.add(s)
         db.session.commit()
@@ -2284,7 +2079,12 @@ def crear_plan():
         from database.database import PlanAlimenticio
         plan = PlanAlimenticio(entrenador_id=entrenador.id, nombre=nombre, descripcion=descripcion, contenido=contenido, es_publico=es_publico)
         db.session.add(plan)
+        if es_publico:
+            db.session.flush()
+            catalogo.sync(db.session, 'plan', plan.id)
         db.session.commit()
+        if es_publico:
+            _bump_catalogo('crear_plan')
         # Create a ContentReview entry so admins can review this new plan
         try:
             from database.database import ContentReview
@@ -2390,56 +2190,47 @@ Ejemplo de comidas:
     return jsonify({'nombre': nombre, 'contenido': contenido, 'calorias': calorias, 'objetivo': objetivo}), 200
 
 
+def _public_plan_columns():
+    c = CatalogoPublico
+    return {
+        'id': c.content_id,
+        'nombre': c.nombre,
+        'descripcion': c.descripcion,
+        'contenido': c.contenido,
+        'es_publico': db.true(),
+        'creado_en': c.creado_en,
+        'entrenador_nombre': c.entrenador_nombre,
+        'entrenador_id': c.entrenador_id,
+    }
+
+
 @app.route('/api/planes', methods=['GET'])
+@conditional_get(response_cache, fingerprint=_catalogo_fingerprint)
+@cached_response(response_cache)
 def listar_planes_publicos():
-    try:
-        planes = []
-        try:
-            # import model lazily to avoid circular imports during app init
-            from database.database import PlanAlimenticio
-            planes = PlanAlimenticio.query.filter_by(es_publico=True).order_by(PlanAlimenticio.creado_en.desc()).all()
-        except Exception:
-            # attempt to create table if missing
-            try:
-                with app.app_context():
-                    db.create_all()
-            except Exception:
-                pass
-            try:
-                planes = PlanAlimenticio.query.filter_by(es_publico=True).order_by(PlanAlimenticio.creado_en.desc()).all()
-            except Exception as e:
-                app.logger.exception('listar_planes_publicos failed')
-                return jsonify({'error': 'db error', 'detail': str(e)}), 500
+    """Planes públicos con el nombre del entrenador, en una sola consulta.
 
-        result = []
-        for p in planes:
-            creado = None
-            try:
-                creado = p.creado_en.isoformat() if getattr(p, 'creado_en', None) else None
-            except Exception:
-                creado = None
-            entrenador_nombre = None
-            try:
-                ent = _safe_entrenador_by_id(p.entrenador_id)
-                # skip plans if entrenador was deleted or its usuario is missing/inactive
-                if not ent or not getattr(ent, 'usuario_id', None):
-                    continue
-                try:
-                    from database.database import Usuario
-                    u = Usuario.query.filter_by(id=ent.usuario_id).first()
-                    if not u or getattr(u, 'activo', True) is False:
-                        continue
-                    entrenador_nombre = getattr(u, 'nombre', None)
-                except Exception:
-                    entrenador_nombre = None
-            except Exception:
-                entrenador_nombre = None
-            result.append({'id': p.id, 'nombre': p.nombre, 'descripcion': p.descripcion, 'contenido': p.contenido, 'es_publico': p.es_publico, 'creado_en': creado, 'entrenador_nombre': entrenador_nombre, 'entrenador_id': p.entrenador_id})
-        return jsonify(result), 200
+    Igual que /api/rutinas/public: lee sólo catalogo_publico (sin planes de
+    entrenadores borrados, inactivos o del admin) y acepta `limit`/`cursor`/`fields`.
+    """
+    try:
+        page = parse_page_args(request.args, _public_plan_columns())
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    keys, cols = project(_public_plan_columns(), page.fields, CatalogoPublico.content_id, CatalogoPublico.creado_en)
+    stmt = db.select(*cols).where(CatalogoPublico.tipo == 'plan')
+    try:
+        stmt = apply_keyset(stmt, page, CatalogoPublico.content_id, CatalogoPublico.creado_en)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    stmt = stmt.execution_options(yield_per=500)
+    try:
+        rows = db.session.execute(stmt)
     except Exception as e:
-        app.logger.exception('listar_planes_publicos unexpected')
+        db.session.rollback()
+        app.logger.exception('listar_planes_publicos failed')
         return jsonify({'error': 'db error', 'detail': str(e)}), 500
-
+    return page_response(rows, page, row_serializer(keys))
 
 
 @app.route('/api/planes/<int:plan_id>', methods=['GET'])
@@ -2465,7 +2256,7 @@ def obtener_plan_publico(plan_id):
                 if auth_header.startswith('Bearer '):
                     token = auth_header.split(' ', 1)[1]
                     try:
-                        from auth import decode_token
+                        from backend.auth import decode_token
                         token_payload = decode_token(token)
                     except Exception:
                         token_payload = None
@@ -2606,7 +2397,9 @@ def actualizar_plan(plan_id):
             plan.es_publico = bool(data.get('es_publico'))
 
         db.session.add(plan)
+        catalogo.sync(db.session, 'plan', plan.id)
         db.session.commit()
+        _bump_catalogo('actualizar_plan')
         return jsonify({'message': 'plan actualizado', 'id': plan.id}), 200
     except Exception as e:
         db.session.rollback()
@@ -2638,7 +2431,10 @@ def eliminar_plan(plan_id):
             return jsonify({'error': 'forbidden: not owner'}), 403
 
         db.session.delete(plan)
+        content_stats.forget(db.session, 'plan', plan_id)
+        catalogo.sync(db.session, 'plan', plan_id)
         db.session.commit()
+        _bump_catalogo('eliminar_plan')
         return jsonify({'message': 'plan eliminado', 'id': plan_id}), 200
     except Exception as e:
         db.session.rollback()
@@ -2662,32 +2458,13 @@ def solicitar_plan_por_plan(plan_id):
             db.session.add(cliente)
             db.session.commit()
         except Exception:
-            db.session.rollback()
-            return jsonify({'error': 'cliente not found'}), 404
-
-    try:
-        # Ensure the model is imported in this scope (avoid NameError when not lazily imported)
-        from database.database import PlanAlimenticio
-        plan = PlanAlimenticio.query.filter_by(id=plan_id).first()
-        # Ensure solicitudes_plan table exists and has expected columns (compat with older test DBs)
-        try:
-            with app.app_context():
-                # portable create for SQLite testing and Postgres
-                try:
-                    db.session.execute(text("CREATE TABLE IF NOT EXISTS solicitudes_plan (id INTEGER PRIMARY KEY AUTOINCREMENT, cliente_id INTEGER NOT NULL, rutina_id INTEGER, plan_id INTEGER, estado VARCHAR(50) DEFAULT 'pendiente', nota TEXT, creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"))
-                    db.session.commit()
-                except Exception:
-                    db.session.rollback()
-                # try to add missing columns in case table was created with older schema
-                try:
-                    db.session.execute(text("ALTER TABLE solicitudes_plan ADD COLUMN plan_id INTEGER"))
-                    db.session.execute(text("ALTER TABLE solicitudes_plan ADD COLUMN rutina_id INTEGER"))
-                    db.session.commit()
-                except Exception:
-                    db.session.rollback()
-        except Exception:
-            # non-fatal; we'll try the ORM insert and handle errors
-            pass
+            db.session.rollback()
+            return jsonify({'error': 'cliente not found'}), 404
+
+    try:
+        # Ensure the model is imported in this scope (avoid NameError when not lazily imported)
+        from database.database import PlanAlimenticio
+        plan = PlanAlimenticio.query.filter_by(id=plan_id).first()
         if not plan:
             return jsonify({'error': 'plan not found'}), 404
         from database.database import SolicitudPlan
@@ -2695,32 +2472,8 @@ def solicitar_plan_por_plan(plan_id):
         # must accept or reject it via the pending solicitudes endpoint.
         s = SolicitudPlan(cliente_id=cliente.id, plan_id=plan.id, estado='pendiente')
         db.session.add(s)
-        try:
-            db.session.commit()
-        except Exception as commit_exc:
-            # If the existing DB schema has rutina_id NOT NULL or is missing plan_id,
-            # attempt a lightweight table rebuild to correct the schema, then retry.
-            db.session.rollback()
-            app.logger.exception('solicitar_plan_por_plan: commit failed, attempting table rebuild')
-            try:
-                with app.app_context():
-                    # create new table with correct nullable columns
-                    db.session.execute(text("CREATE TABLE IF NOT EXISTS solicitudes_plan_new (id INTEGER PRIMARY KEY AUTOINCREMENT, cliente_id INTEGER NOT NULL, rutina_id INTEGER, plan_id INTEGER, estado VARCHAR(50) DEFAULT 'pendiente', nota TEXT, creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"))
-                    # copy minimal columns to new table, setting rutina_id/plan_id to NULL where needed
-                    try:
-                        db.session.execute(text("INSERT INTO solicitudes_plan_new (id, cliente_id, rutina_id, plan_id, estado, nota, creado_en) SELECT id, cliente_id, NULL AS rutina_id, NULL AS plan_id, estado, nota, creado_en FROM solicitudes_plan"))
-                    except Exception:
-                        # If copy fails (schema mismatch), ignore and continue — new table will be empty
-                        pass
-                    # replace old table
-                    db.session.execute(text('DROP TABLE IF EXISTS solicitudes_plan'))
-                    db.session.execute(text('ALTER TABLE solicitudes_plan_new RENAME TO solicitudes_plan'))
-                    db.session.commit()
-            except Exception:
-                db.session.rollback()
-            # retry insert once more
-            db.session.add(s)
-            db.session.commit()
+        content_stats.bump_estado(db.session, s, None, s.estado)
+        db.session.commit()
         creado = None
         try:
             creado = s.creado_en.isoformat() if getattr(s, 'creado_en', None) else None
@@ -2783,7 +2536,9 @@ def actualizar_rutina(rutina_id):
         rutina.es_publica = bool(es_publica)
 
     try:
+        catalogo.sync(db.session, 'rutina', rutina.id)
         db.session.commit()
+        _bump_catalogo('actualizar_rutina')
         return jsonify({'message': 'rutina actualizada', 'rutina': {'id': rutina.id, 'nombre': rutina.nombre, 'descripcion': rutina.descripcion, 'nivel': rutina.nivel, 'es_publica': rutina.es_publica, 'creado_en': rutina.creado_en.isoformat()}}), 200
     except Exception as e:
         db.session.rollback()
@@ -2806,7 +2561,10 @@ def eliminar_rutina(rutina_id):
 
     try:
         db.session.delete(rutina)
+        content_stats.forget(db.session, 'rutina', rutina_id)
+        catalogo.sync(db.session, 'rutina', rutina_id)
         db.session.commit()
+        _bump_catalogo('eliminar_rutina')
         return jsonify({'message': 'rutina eliminada'}), 200
     except Exception as e:
         db.session.rollback()
@@ -2826,25 +2584,18 @@ def admin_list_users():
     try:
         from database.database import Usuario
         try:
-            users = Usuario.query.order_by(Usuario.creado_en.desc()).all()
+            # usuarios con sus roles en una sola consulta (backend/roles.py)
+            users = users_with_roles(db.session, order_by=Usuario.creado_en.desc())
         except Exception as qe:
-            # If the error is due to missing columns (e.g., usuarios.activo), try a safe repair
+            # Missing columns are added by the startup schema sync, not here;
+            # clear the failed transaction before the retry/fallback below.
             try:
-                from sqlalchemy.exc import ProgrammingError
-                err_str = str(qe)
-                if 'column usuarios.activo does not exist' in err_str or 'activo' in err_str or isinstance(qe, ProgrammingError):
-                    # Attempt to add the missing column and retry once
-                    try:
-                        db.session.execute(text("ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS activo BOOLEAN DEFAULT true"))
-                        db.session.execute(text("ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS failed_attempts INTEGER DEFAULT 0"))
-                        db.session.execute(text("ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP"))
-                        db.session.commit()
-                    except Exception:
-                        db.session.rollback()
+                app.logger.warning('admin_list_users: ORM query failed: %s', qe)
+                db.session.rollback()
 
                 # Retry the ORM query once
                 try:
-                    users = Usuario.query.order_by(Usuario.creado_en.desc()).all()
+                    users = users_with_roles(db.session, order_by=Usuario.creado_en.desc())
                 except Exception as qe2:
                     # As a robust fallback, perform a raw SQL select that only references known-safe tables/columns
                     # This helps the admin UI survive partial schema drift.
@@ -2882,33 +2633,15 @@ def admin_list_users():
                                 u.creado_en = None
                                 u.activo = True
                                 u._role_fallback = 'usuario'
-                            users.append(u)
+                            users.append((u, None))
                     except Exception:
                         # If even the fallback fails, re-raise the original error so it is logged and surfaced.
                         raise
             except Exception:
                 # Re-raise the original for outer handler
                 raise
-        ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@test.local')
         result = []
-
-        # Avoid accessing relationship attributes (u.entrenador / u.cliente)
-        # because lazy-loading them can trigger SELECTs that reference
-        # columns that may be missing (e.g. entrenadores.bio). Instead,
-        # fetch the lists of usuario_id from entrenadores and clientes
-        # using raw SQL and use those sets to compute roles safely.
-        try:
-            ent_rows = db.session.execute(text('SELECT usuario_id FROM entrenadores')).fetchall()
-            entrenador_user_ids = set([r[0] for r in ent_rows if r and r[0] is not None])
-        except Exception:
-            entrenador_user_ids = set()
-        try:
-            cli_rows = db.session.execute(text('SELECT usuario_id FROM clientes')).fetchall()
-            cliente_user_ids = set([r[0] for r in cli_rows if r and r[0] is not None])
-        except Exception:
-            cliente_user_ids = set()
-
-        for u in users:
+        for u, roles in users:
             try:
                 uid = getattr(u, 'id', None)
             except Exception:
@@ -2918,12 +2651,10 @@ def admin_list_users():
             except Exception:
                 uemail = None
 
-            if uemail == ADMIN_EMAIL:
+            if roles is not None:
+                urole = roles.primary()
+            elif uemail == ADMIN_EMAIL:
                 urole = 'admin'
-            elif uid in entrenador_user_ids:
-                urole = 'entrenador'
-            elif uid in cliente_user_ids:
-                urole = 'cliente'
             else:
                 # When we created fallback rows they may include _role_fallback
                 urole = getattr(u, '_role_fallback', 'usuario')
@@ -2956,103 +2687,13 @@ def admin_entrenadores_aceptados():
         return jsonify({'error': 'forbidden: admin only'}), 403
 
     try:
-        from database.database import Rutina, PlanAlimenticio, SolicitudPlan, Cliente, Usuario
+        report = aceptados_por_entrenador(db.session, with_saved_users=True)
         result = []
-        # Avoid selecting all columns from entrenadores (some deployments miss columns).
-        try:
-            rows = db.session.execute(text('SELECT id, usuario_id FROM entrenadores')).fetchall()
-        except Exception:
-            rows = []
-        for rw in rows:
-            try:
-                keys = getattr(rw, 'keys', lambda: [])()
-                ent_id = rw['id'] if 'id' in keys else rw[0]
-                usuario_id = rw['usuario_id'] if 'usuario_id' in keys else (rw[1] if len(rw) > 1 else None)
-                ent_obj = {'entrenador_id': ent_id, 'usuario_id': usuario_id, 'nombre': None, 'rutinas': [], 'planes': []}
-                try:
-                    if usuario_id:
-                        u = Usuario.query.filter_by(id=usuario_id).first()
-                        if u:
-                            ent_obj['nombre'] = getattr(u, 'nombre', None)
-                except Exception:
-                    ent_obj['nombre'] = None
-            except Exception:
-                continue
-
-            # Rutinas
-            try:
-                rutinas = Rutina.query.filter_by(entrenador_id=ent.id).order_by(Rutina.creado_en.desc()).all()
-            except Exception:
-                rutinas = []
-
-            for r in rutinas:
-                # accepted solicitudes for this rutina
-                try:
-                    accepted_sols = SolicitudPlan.query.filter_by(rutina_id=r.id, estado='aceptado').all()
-                except Exception:
-                    accepted_sols = []
-
-                accepted_clients = []
-                for s in accepted_sols:
-                    try:
-                        c = Cliente.query.filter_by(id=s.cliente_id).first()
-                        if c:
-                            u = Usuario.query.filter_by(id=getattr(c, 'usuario_id', None)).first()
-                            accepted_clients.append({'cliente_id': c.id, 'usuario_id': getattr(u, 'id', None) if u else None, 'nombre': getattr(u, 'nombre', None) if u else None})
-                    except Exception:
-                        pass
-
-                # count how many clientes have saved/followed this rutina (cliente_rutina table)
-                try:
-                    row = db.session.execute(text('SELECT COUNT(*) as cnt FROM cliente_rutina WHERE rutina_id = :rid'), {'rid': r.id}).fetchone()
-                    saved_count = int(row['cnt'] if row and 'cnt' in row.keys() else (row[0] if row else 0))
-                except Exception:
-                    saved_count = 0
-
-                # list of users who saved via cliente_rutina
-                saved_users = []
-                try:
-                    rows = db.session.execute(text('SELECT cr.cliente_id AS cliente_id, u.id AS usuario_id, u.nombre AS nombre FROM cliente_rutina cr JOIN clientes c ON cr.cliente_id = c.id JOIN usuarios u ON c.usuario_id = u.id WHERE cr.rutina_id = :rid'), {'rid': r.id}).fetchall()
-                    for rw in rows:
-                        try:
-                            saved_users.append({'cliente_id': rw['cliente_id'], 'usuario_id': rw['usuario_id'], 'nombre': rw['nombre']})
-                        except Exception:
-                            # fallback for tuple-like rows
-                            try:
-                                saved_users.append({'cliente_id': rw[0], 'usuario_id': rw[1], 'nombre': rw[2]})
-                            except Exception:
-                                pass
-                except Exception:
-                    saved_users = []
-
-                ent_obj['rutinas'].append({'id': r.id, 'nombre': r.nombre, 'accepted_count': len(accepted_sols), 'accepted_clients': accepted_clients, 'saved_count': saved_count, 'saved_users': saved_users, 'link_url': getattr(r, 'link_url', None)})
-
-            # Planes
-            try:
-                planes = PlanAlimenticio.query.filter_by(entrenador_id=ent.id).order_by(PlanAlimenticio.creado_en.desc()).all()
-            except Exception:
-                planes = []
-
-            for p in planes:
-                try:
-                    accepted_sols = SolicitudPlan.query.filter_by(plan_id=p.id, estado='aceptado').all()
-                except Exception:
-                    accepted_sols = []
-                accepted_clients = []
-                for s in accepted_sols:
-                    try:
-                        c = Cliente.query.filter_by(id=s.cliente_id).first()
-                        if c:
-                            u = Usuario.query.filter_by(id=getattr(c, 'usuario_id', None)).first()
-                            accepted_clients.append({'cliente_id': c.id, 'usuario_id': getattr(u, 'id', None) if u else None, 'nombre': getattr(u, 'nombre', None) if u else None})
-                    except Exception:
-                        pass
-
-                # For plans we don't have a cliente_plan join table; use accepted solicitudes as proxy for 'seleccionada'
-                ent_obj['planes'].append({'id': p.id, 'nombre': p.nombre, 'accepted_count': len(accepted_sols), 'accepted_clients': accepted_clients})
-
-            result.append(ent_obj)
-
+        # only id/usuario_id from entrenadores (some deployments miss columns)
+        for ent_id, usuario_id, nombre in entrenadores_con_nombre(db.session):
+            items = report.get(ent_id, {'rutinas': [], 'planes': []})
+            result.append({'entrenador_id': ent_id, 'usuario_id': usuario_id, 'nombre': nombre,
+                           'rutinas': items['rutinas'], 'planes': items['planes']})
         return jsonify(result), 200
     except Exception as e:
         app.logger.exception('admin_entrenadores_aceptados failed')
@@ -3077,6 +2718,7 @@ def admin_promote_usuario(usuario_id):
         entrenador = Entrenador(usuario_id=user.id)
         db.session.add(entrenador)
         db.session.commit()
+        _bump_catalogo('admin_promote_usuario')
         return jsonify({'message': 'promoted to entrenador', 'entrenador_id': entrenador.id}), 201
     except Exception as e:
         db.session.rollback()
@@ -3099,72 +2741,20 @@ def admin_delete_usuario(usuario_id):
         if not user:
             return jsonify({'error': 'user not found'}), 404
 
-        # Hard delete: remove user and all owned content
+        # Hard delete: remove user and all owned content in one transaction
+        # (database/purge.py). ?dry_run=1 only reports the rows per table.
         if mode == 'hard':
+            dry_run = (request.args.get('dry_run') or '').lower() in ('1', 'true', 'yes')
             try:
-                # Run the hard-delete in a single transaction and don't swallow
-                # intermediate errors. If anything fails, the whole operation
-                # will roll back and a descriptive error will be returned.
-                entrenador = _safe_entrenador_by_usuario_id(user.id)
-
-                # Execute each delete statement in an independent short-lived
-                # transaction/connection. Using separate connections avoids a
-                # single statement failure leaving the connection in an
-                # aborted state which would make subsequent statements fail.
-                statements = []
-                if entrenador:
-                    ent_id = entrenador.id
-                    statements.extend([
-                        ("DELETE FROM solicitudes_plan WHERE plan_id IN (SELECT id FROM planes_alimenticios WHERE entrenador_id = :eid)", {'eid': ent_id}),
-                        ("DELETE FROM solicitudes_plan WHERE rutina_id IN (SELECT id FROM rutinas WHERE entrenador_id = :eid)", {'eid': ent_id}),
-                        ("DELETE FROM cliente_rutina WHERE rutina_id IN (SELECT id FROM rutinas WHERE entrenador_id = :eid)", {'eid': ent_id}),
-                        ("DELETE FROM content_review WHERE tipo = 'plan' AND content_id IN (SELECT id FROM planes_alimenticios WHERE entrenador_id = :eid)", {'eid': ent_id}),
-                        ("DELETE FROM content_review WHERE tipo = 'rutina' AND content_id IN (SELECT id FROM rutinas WHERE entrenador_id = :eid)", {'eid': ent_id}),
-                        ("DELETE FROM planes_alimenticios WHERE entrenador_id = :eid", {'eid': ent_id}),
-                        ("DELETE FROM rutinas WHERE entrenador_id = :eid", {'eid': ent_id}),
-                        ("DELETE FROM entrenadores WHERE usuario_id = :uid", {'uid': user.id}),
-                    ])
-
-                statements.extend([
-                    ("DELETE FROM solicitudes_plan WHERE cliente_id IN (SELECT id FROM clientes WHERE usuario_id = :uid)", {'uid': user.id}),
-                    ("DELETE FROM cliente_rutina WHERE cliente_id IN (SELECT id FROM clientes WHERE usuario_id = :uid)", {'uid': user.id}),
-                    # Remove measurements and other client-owned rows before deleting cliente
-                    ("DELETE FROM mediciones WHERE cliente_id IN (SELECT id FROM clientes WHERE usuario_id = :uid)", {'uid': user.id}),
-                    ("DELETE FROM clientes WHERE usuario_id = :uid", {'uid': user.id}),
-                    ("DELETE FROM password_reset_tokens WHERE usuario_id = :uid", {'uid': user.id}),
-                    ("DELETE FROM usuarios WHERE id = :uid", {'uid': user.id}),
-                ])
-
-                for sql, params in statements:
-                    try:
-                        with db.engine.connect() as conn:
-                            trans = conn.begin()
-                            try:
-                                conn.execute(text(sql), params or {})
-                                trans.commit()
-                            except Exception as e:
-                                trans.rollback()
-                                msg = str(e).lower()
-                                # Ignore missing-table errors (migrations may be partial)
-                                if 'does not exist' in msg or 'undefinedtable' in msg or 'password_reset_tokens' in msg:
-                                    app.logger.info('admin_delete_usuario: ignored missing table for statement: %s', sql)
-                                    continue
-                                # Log and re-raise other errors so outer handler reports 500
-                                app.logger.exception('admin_delete_usuario statement failed: %s', sql)
-                                raise
-                    except Exception:
-                        raise
-
-                # Expire the session identity map so further ORM queries see DB changes
-                try:
-                    db.session.expire_all()
-                except Exception:
-                    pass
-
-                # If we reach here the transaction committed
-                return jsonify({'message': 'usuario eliminado (hard)'}), 200
+                result = purge_usuarios(db.session, [user.id], dry_run=dry_run)
+                if dry_run:
+                    db.session.rollback()
+                    return jsonify({'message': 'dry run', 'rows': result['rows']}), 200
+                db.session.commit()
+                _bump_catalogo('admin_delete_usuario hard')
+                return jsonify({'message': 'usuario eliminado (hard)', 'rows': result['rows']}), 200
             except Exception as e:
-                # Transaction will be rolled back automatically by session.begin() on exception
+                db.session.rollback()
                 app.logger.exception('admin_delete_usuario hard delete failed')
                 return jsonify({'error': 'db error', 'detail': str(e)}), 500
 
@@ -3184,7 +2774,9 @@ def admin_delete_usuario(usuario_id):
                     db.session.rollback()
 
             db.session.add(user)
+            catalogo.sync_usuarios(db.session, [user.id])
             db.session.commit()
+            _bump_catalogo('admin_delete_usuario soft')
             return jsonify({'message': 'usuario desactivado (soft), contenido no público'}), 200
         except Exception as e:
             db.session.rollback()
@@ -3195,6 +2787,130 @@ def admin_delete_usuario(usuario_id):
         return jsonify({'error': 'db error', 'detail': str(e)}), 500
 
 
+# Purga masiva en segundo plano (database/purge.py). PURGE_JOBS_RUNNER:
+# 'thread' (por defecto, un hilo del proceso web), 'inline' (dentro de la
+# request, para tests) u 'off' (sólo `python -m backend.manage run_purge_jobs`,
+# p. ej. desde un cron). Un job interrumpido se retoma con ese mismo comando.
+PURGE_JOBS_RUNNER = os.getenv('PURGE_JOBS_RUNNER', 'thread').lower()
+
+
+def _run_purge_job(job_id):
+    with app.app_context():
+        try:
+            job = run_purge_job(db.session, job_id)
+            if job is not None and job.eliminados:
+                _bump_catalogo('purge_job')
+        except Exception:
+            app.logger.exception('purge job %s failed', job_id)
+
+
+def _start_purge_job(job_id):
+    if PURGE_JOBS_RUNNER == 'inline':
+        _run_purge_job(job_id)
+    elif PURGE_JOBS_RUNNER == 'thread':
+        import threading
+        threading.Thread(target=_run_purge_job, args=(job_id,), name=f'purge-job-{job_id}', daemon=True).start()
+
+
+def _purge_filter_ids(filtro):
+    """Ids de usuarios según {activo, creado_antes}; None si el filtro no es válido."""
+    from database.database import Usuario
+    query = db.session.query(Usuario.id)
+    conditions = 0
+    if 'activo' in filtro:
+        query = query.filter(Usuario.activo.is_(bool(filtro['activo'])))
+        conditions += 1
+    if filtro.get('creado_antes'):
+        query = query.filter(Usuario.creado_en < datetime.strptime(filtro['creado_antes'], '%Y-%m-%d'))
+        conditions += 1
+    # un filtro vacío borraría a todos
+    return [row[0] for row in query.all()] if conditions else None
+
+
+@app.route('/api/admin/purge_jobs', methods=['POST'])
+@jwt_required
+def admin_purge_job_create():
+    """Encola el hard delete de muchos usuarios; responde 202 con el job.
+
+    Body: { "usuario_ids": [..] } o { "filter": {"activo": false, "creado_antes": "YYYY-MM-DD"} },
+    opcional "batch_size". El admin nunca se incluye. Progreso en GET /api/admin/purge_jobs/<id>.
+    """
+    role = request.jwt_payload.get('role')
+    if role != 'admin':
+        return jsonify({'error': 'forbidden: admin only'}), 403
+    data = request.get_json() or {}
+    try:
+        if data.get('usuario_ids') is not None:
+            ids = [int(i) for i in data['usuario_ids']]
+        elif isinstance(data.get('filter'), dict):
+            ids = _purge_filter_ids(data['filter'])
+            if ids is None:
+                return jsonify({'error': 'invalid filter', 'detail': 'use activo and/or creado_antes'}), 400
+        else:
+            return jsonify({'error': 'usuario_ids or filter required'}), 400
+        batch_size = int(data.get('batch_size') or 100)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': 'invalid request', 'detail': str(e)}), 400
+    try:
+        from database.database import Usuario
+        protected = {row[0] for row in db.session.query(Usuario.id).filter(Usuario.email == ADMIN_EMAIL).all()}
+        protected.add(request.jwt_payload.get('user_id'))
+        job = create_purge_job(db.session, [i for i in ids if i not in protected],
+                               creado_por=request.jwt_payload.get('user_id'), batch_size=batch_size)
+        db.session.commit()
+        job_id = job.id
+    except Exception as e:
+        db.session.rollback()
+        app.logger.exception('admin_purge_job_create failed')
+        return jsonify({'error': 'db error', 'detail': str(e)}), 500
+    _start_purge_job(job_id)
+    from database.database import PurgeJob
+    db.session.expire_all()
+    return jsonify(purge_job_status(db.session.get(PurgeJob, job_id))), 202
+
+
+@app.route('/api/admin/purge_jobs/<int:job_id>', methods=['GET'])
+@jwt_required
+def admin_purge_job_status(job_id):
+    """Estado y progreso de un job de purga."""
+    role = request.jwt_payload.get('role')
+    if role != 'admin':
+        return jsonify({'error': 'forbidden: admin only'}), 403
+    try:
+        from database.database import PurgeJob
+        job = db.session.get(PurgeJob, job_id)
+        if job is None:
+            return jsonify({'error': 'job not found'}), 404
+        return jsonify(purge_job_status(job)), 200
+    except Exception as e:
+        app.logger.exception('admin_purge_job_status failed')
+        return jsonify({'error': 'db error', 'detail': str(e)}), 500
+
+
+@app.route('/api/admin/purge_jobs/<int:job_id>/retry', methods=['POST'])
+@jwt_required
+def admin_purge_job_retry(job_id):
+    """Reanuda un job fallido desde su último lote confirmado; responde 202 con el job."""
+    role = request.jwt_payload.get('role')
+    if role != 'admin':
+        return jsonify({'error': 'forbidden: admin only'}), 403
+    try:
+        from database.database import PurgeJob
+        job = db.session.get(PurgeJob, job_id)
+        if job is None:
+            return jsonify({'error': 'job not found'}), 404
+        if not retry_purge_job(db.session, job_id):
+            return jsonify({'error': 'job not failed', 'estado': job.estado}), 409
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        app.logger.exception('admin_purge_job_retry failed')
+        return jsonify({'error': 'db error', 'detail': str(e)}), 500
+    _start_purge_job(job_id)
+    db.session.expire_all()
+    return jsonify(purge_job_status(db.session.get(PurgeJob, job_id))), 202
+
+
 @app.route('/api/admin/usuarios/<int:usuario_id>/create_cliente', methods=['POST'])
 @jwt_required
 def admin_create_cliente(usuario_id):
@@ -3254,7 +2970,9 @@ def admin_reactivar_usuario(usuario_id):
         try:
             user.activo = True
             db.session.add(user)
+            catalogo.sync_usuarios(db.session, [user.id])
             db.session.commit()
+            _bump_catalogo('admin_reactivar_usuario')
             return jsonify({'message': 'usuario reactivado'}), 200
         except Exception as e:
             db.session.rollback()
@@ -3285,20 +3003,21 @@ def admin_set_user_role(usuario_id):
 
     try:
         from database.database import Usuario, Cliente, Entrenador
-        user = Usuario.query.filter_by(id=usuario_id).first()
+        # usuario + roles actuales en una sola consulta (backend/roles.py)
+        user, user_roles = user_with_roles(db.session, usuario_id=usuario_id)
         if not user:
             return jsonify({'error': 'user not found'}), 404
 
         # Switch behaviour
         if desired == 'entrenador':
-            existing = _safe_entrenador_by_usuario_id(user.id)
-            if existing:
+            if user_roles.entrenador_id is not None:
                 return jsonify({'message': 'already entrenador'}), 200
             # create entrenador row
             ent = Entrenador(usuario_id=user.id)
             db.session.add(ent)
             try:
                 db.session.commit()
+                _bump_catalogo('admin_set_user_role')
                 return jsonify({'message': 'usuario promovido a entrenador'}), 201
             except Exception as e:
                 db.session.rollback()
@@ -3307,8 +3026,7 @@ def admin_set_user_role(usuario_id):
 
         if desired == 'cliente':
             # ensure cliente exists
-            existing_c = Cliente.query.filter_by(usuario_id=user.id).first()
-            if not existing_c:
+            if user_roles.cliente_id is None:
                 try:
                     c = Cliente(usuario_id=user.id)
                     db.session.add(c)
@@ -3318,11 +3036,14 @@ def admin_set_user_role(usuario_id):
                     app.logger.exception('admin_set_user_role: failed creating cliente')
                     return jsonify({'error': 'db error', 'detail': str(e)}), 500
             # remove entrenador if exists (raw DELETE to avoid ORM selecting all columns)
-            try:
-                db.session.execute(text('DELETE FROM entrenadores WHERE usuario_id = :uid'), {'uid': user.id})
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
+            if user_roles.entrenador_id is not None:
+                try:
+                    db.session.execute(text('DELETE FROM entrenadores WHERE usuario_id = :uid'), {'uid': user.id})
+                    catalogo.sync_usuarios(db.session, [user.id])
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+            _bump_catalogo('admin_set_user_role')
             return jsonify({'message': 'usuario establecido como cliente (entrenador eliminado si existía)'}), 200
 
         if desired == 'usuario':
@@ -3330,7 +3051,9 @@ def admin_set_user_role(usuario_id):
             try:
                 db.session.execute(text('DELETE FROM entrenadores WHERE usuario_id = :uid'), {'uid': user.id})
                 Cliente.query.filter_by(usuario_id=user.id).delete()
+                catalogo.sync_usuarios(db.session, [user.id])
                 db.session.commit()
+                _bump_catalogo('admin_set_user_role')
                 return jsonify({'message': 'usuario convertido a usuario simple (sin roles)'}), 200
             except Exception as e:
                 db.session.rollback()
@@ -3358,60 +3081,8 @@ def entrenador_aceptados():
         return jsonify({'error': 'forbidden: not entrenador'}), 403
 
     try:
-        from database.database import Rutina, PlanAlimenticio, SolicitudPlan, Cliente, Usuario
-        result = {'rutinas': [], 'planes': []}
-
-        # Rutinas del entrenador
-        try:
-            rutinas = Rutina.query.filter_by(entrenador_id=entrenador.id).order_by(Rutina.creado_en.desc()).all()
-        except Exception:
-            rutinas = []
-
-        for r in rutinas:
-            try:
-                accepted_sols = SolicitudPlan.query.filter_by(rutina_id=r.id, estado='aceptado').all()
-            except Exception:
-                accepted_sols = []
-            accepted_clients = []
-            for s in accepted_sols:
-                try:
-                    c = Cliente.query.filter_by(id=s.cliente_id).first()
-                    u = Usuario.query.filter_by(id=getattr(c, 'usuario_id', None)).first() if c else None
-                    accepted_clients.append({'cliente_id': c.id if c else None, 'usuario_id': getattr(u, 'id', None) if u else None, 'nombre': getattr(u, 'nombre', None) if u else None})
-                except Exception:
-                    pass
-
-            # saved count from cliente_rutina
-            try:
-                row = db.session.execute(text('SELECT COUNT(*) as cnt FROM cliente_rutina WHERE rutina_id = :rid'), {'rid': r.id}).fetchone()
-                saved_count = int(row['cnt'] if row and 'cnt' in row.keys() else (row[0] if row else 0))
-            except Exception:
-                saved_count = 0
-
-            result['rutinas'].append({'id': r.id, 'nombre': r.nombre, 'accepted_count': len(accepted_sols), 'accepted_clients': accepted_clients, 'saved_count': saved_count, 'link_url': getattr(r, 'link_url', None)})
-
-        # Planes del entrenador
-        try:
-            planes = PlanAlimenticio.query.filter_by(entrenador_id=entrenador.id).order_by(PlanAlimenticio.creado_en.desc()).all()
-        except Exception:
-            planes = []
-
-        for p in planes:
-            try:
-                accepted_sols = SolicitudPlan.query.filter_by(plan_id=p.id, estado='aceptado').all()
-            except Exception:
-                accepted_sols = []
-            accepted_clients = []
-            for s in accepted_sols:
-                try:
-                    c = Cliente.query.filter_by(id=s.cliente_id).first()
-                    u = Usuario.query.filter_by(id=getattr(c, 'usuario_id', None)).first() if c else None
-                    accepted_clients.append({'cliente_id': c.id if c else None, 'usuario_id': getattr(u, 'id', None) if u else None, 'nombre': getattr(u, 'nombre', None) if u else None})
-                except Exception:
-                    pass
-
-            result['planes'].append({'id': p.id, 'nombre': p.nombre, 'accepted_count': len(accepted_sols), 'accepted_clients': accepted_clients})
-
+        report = aceptados_por_entrenador(db.session, entrenador_id=entrenador.id)
+        result = report.get(entrenador.id, {'rutinas': [], 'planes': []})
         return jsonify(result), 200
     except Exception as e:
         app.logger.exception('entrenador_aceptados failed')
@@ -3434,14 +3105,13 @@ def obtener_usuario_perfil(usuario_id):
 
     try:
         from database.database import Usuario, Cliente, Entrenador, Rutina
-        user = Usuario.query.filter_by(id=usuario_id).first()
+        # usuario + roles en una sola consulta (backend/roles.py)
+        user, user_roles = user_with_roles(db.session, usuario_id=usuario_id)
         if not user:
             return jsonify({'error': 'user not found'}), 404
 
-        # determine roles
-        is_admin = (user.email == os.getenv('ADMIN_EMAIL', 'admin@test.local'))
-        has_entrenador = True if _safe_entrenador_by_usuario_id(user.id) else False
-        has_cliente = True if Cliente.query.filter_by(usuario_id=user.id).first() else False
+        has_entrenador = user_roles.entrenador_id is not None
+        has_cliente = user_roles.cliente_id is not None
 
         perfil = {
             'id': user.id,
@@ -3449,18 +3119,12 @@ def obtener_usuario_perfil(usuario_id):
             'nombre': user.nombre,
             'activo': getattr(user, 'activo', True),
             'creado_en': user.creado_en.isoformat() if getattr(user, 'creado_en', None) else None,
-            'roles': []
+            'roles': user_roles.roles
         }
-        if is_admin:
-            perfil['roles'].append('admin')
-        if has_entrenador:
-            perfil['roles'].append('entrenador')
-        if has_cliente:
-            perfil['roles'].append('cliente')
 
         # include entrenador details (if any)
         if has_entrenador:
-            ent = _safe_entrenador_by_usuario_id(user.id)
+            entrenador_id = user_roles.entrenador_id
             # attempt to read speciality via a minimal raw select (may be NULL/missing)
             speciality = None
             try:
@@ -3469,17 +3133,17 @@ def obtener_usuario_perfil(usuario_id):
                     speciality = srow['speciality'] if 'speciality' in getattr(srow, 'keys', lambda: [])() else (srow[0] if len(srow) > 0 else None)
             except Exception:
                 speciality = None
-            perfil['entrenador'] = {'id': ent.id, 'speciality': speciality}
+            perfil['entrenador'] = {'id': entrenador_id, 'speciality': speciality}
             # include simple list of rutinas
             try:
-                rutinas = Rutina.query.filter_by(entrenador_id=ent.id).order_by(Rutina.creado_en.desc()).limit(20).all()
+                rutinas = Rutina.query.filter_by(entrenador_id=entrenador_id).order_by(Rutina.creado_en.desc()).limit(20).all()
                 perfil['rutinas'] = [{'id': r.id, 'nombre': r.nombre} for r in rutinas]
             except Exception:
                 perfil['rutinas'] = []
 
         # include cliente details
         if has_cliente:
-            cli = Cliente.query.filter_by(usuario_id=user.id).first()
+            cli = db.session.get(Cliente, user_roles.cliente_id)
             perfil['cliente'] = {'id': cli.id, 'edad': getattr(cli, 'edad', None), 'peso': getattr(cli, 'peso', None), 'altura': getattr(cli, 'altura', None)}
 
         return jsonify(perfil), 200
@@ -3503,6 +3167,10 @@ def logout_usuario():
         revoked = RevokedToken(jti=jti)
         db.session.add(revoked)
         db.session.commit()
+        # keep this worker's revocation cache/index in sync; other workers
+        # pick the row up on their next index refresh
+        from backend.auth import note_revoked
+        note_revoked(jti)
         return jsonify({'message': 'token revoked'}), 200
     except Exception as e:
         db.session.rollback()
@@ -3604,6 +3272,7 @@ def update_entrenador_perfil():
         if updated:
             try:
                 db.session.commit()
+                _bump_catalogo('update_entrenador_perfil')
             except Exception:
                 db.session.rollback()
         return jsonify({'message': 'perfil actualizado'}), 200
@@ -3613,52 +3282,52 @@ def update_entrenador_perfil():
         return jsonify({'error': 'db error', 'detail': str(e)}), 500
 
 
+def _public_entrenador_columns(include_entrenador_id=True):
+    cols = {
+        'usuario_id': Usuario.id,
+        'nombre': Usuario.nombre,
+        'speciality': Entrenador.speciality,
+        'bio': Entrenador.bio,
+        'telefono': Entrenador.telefono,
+        'instagram_url': Entrenador.instagram_url,
+        'youtube_url': Entrenador.youtube_url,
+    }
+    if include_entrenador_id:
+        cols['entrenador_id'] = Entrenador.id
+    return cols
+
+
+def _public_entrenadores_rows(page, include_entrenador_id=True):
+    """Entrenadores con usuario activo (excluye la cuenta admin), una consulta.
+
+    `entrenadores` no tiene `creado_en`, así que el keyset es sólo `id` DESC
+    (el orden que ya usaban estos listados).
+    """
+    keys, cols = project(_public_entrenador_columns(include_entrenador_id), page.fields, Entrenador.id)
+    stmt = visible_entrenadores(db.select(*cols).select_from(Entrenador))
+    stmt = apply_keyset(stmt, page, Entrenador.id).execution_options(yield_per=500)
+    return keys, db.session.execute(stmt)
+
+
 @app.route('/api/entrenadores', methods=['GET'])
+@conditional_get(response_cache, fingerprint=_catalogo_fingerprint)
+@cached_response(response_cache)
 def listar_entrenadores_publicos():
     """Listado público de entrenadores activos. Devuelve usuarios que tienen
     una fila Entrenador y cuyo Usuario.activo != False.
     """
     try:
-        from database.database import Usuario
-        trainers = []
-        # Try a wide select first (may fail if some columns missing like `bio`),
-        # fallback to a minimal select of id and usuario_id.
-        try:
-            rows = db.session.execute(text('SELECT id, usuario_id, speciality, telefono, instagram_url, youtube_url, bio FROM entrenadores ORDER BY id DESC')).fetchall()
-        except Exception:
-            try:
-                rows = db.session.execute(text('SELECT id, usuario_id FROM entrenadores ORDER BY id DESC')).fetchall()
-            except Exception:
-                rows = []
-
-        ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@test.local')
-        for rw in rows:
-            try:
-                keys = getattr(rw, 'keys', lambda: [])()
-                ent_id = rw['id'] if 'id' in keys else rw[0]
-                usuario_id = rw['usuario_id'] if 'usuario_id' in keys else (rw[1] if len(rw) > 1 else None)
-                # optional fields (may not exist in the minimal fallback)
-                speciality = rw['speciality'] if 'speciality' in keys else (rw[2] if len(rw) > 2 else None) if len(rw) > 2 else None
-                bio = rw['bio'] if 'bio' in keys else (rw[6] if len(rw) > 6 else None) if len(rw) > 6 else None
-                telefono = rw['telefono'] if 'telefono' in keys else (rw[3] if len(rw) > 3 else None) if len(rw) > 3 else None
-                instagram_url = rw['instagram_url'] if 'instagram_url' in keys else (rw[4] if len(rw) > 4 else None) if len(rw) > 4 else None
-                youtube_url = rw['youtube_url'] if 'youtube_url' in keys else (rw[5] if len(rw) > 5 else None) if len(rw) > 5 else None
-
-                user = Usuario.query.filter_by(id=usuario_id).first()
-                if not user or getattr(user, 'activo', True) is False:
-                    continue
-                # Exclude the configured admin account from trainer lists
-                if getattr(user, 'email', None) and getattr(user, 'email') == ADMIN_EMAIL:
-                    continue
-                trainers.append({'usuario_id': user.id, 'nombre': getattr(user, 'nombre', None), 'speciality': speciality, 'bio': bio, 'telefono': telefono, 'instagram_url': instagram_url, 'youtube_url': youtube_url, 'entrenador_id': ent_id})
-            except Exception:
-                continue
-
-        return jsonify(trainers), 0 or 200
-    except Exception as e:
+        page = parse_page_args(request.args, _public_entrenador_columns())
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        keys, rows = _public_entrenadores_rows(page)
+        return page_response(rows, page, row_serializer(keys))
+    except Exception:
         # Don't break the client UI: log the error but return an empty list so
         # the client can still render the page. This favors availability for
         # the public trainers list even when the DB has schema issues.
+        db.session.rollback()
         app.logger.exception('listar_entrenadores_publicos failed; returning empty list to preserve UX')
         return jsonify([]), 200
 
@@ -3673,47 +3342,24 @@ def listar_entrenadores_publicos_options():
 # These always return safe JSON (empty lists or 404) and avoid any complex DB logic
 # so the frontend can rely on them even if more advanced handlers fail.
 @app.route('/api/public/entrenadores', methods=['GET', 'OPTIONS'])
+@conditional_get(response_cache, fingerprint=_catalogo_fingerprint)
+@cached_response(response_cache)
 def public_list_entrenadores():
 
     if request.method == 'OPTIONS':
         return ('', 200)
     try:
-        from database.database import Usuario
-        trainers = []
-        ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@test.local')
-        try:
-            rows = db.session.execute(text('SELECT id, usuario_id, speciality, telefono, instagram_url, youtube_url, bio FROM entrenadores ORDER BY id DESC')).fetchall()
-        except Exception:
-            try:
-                rows = db.session.execute(text('SELECT id, usuario_id FROM entrenadores ORDER BY id DESC')).fetchall()
-            except Exception:
-                rows = []
-
-        for rw in rows:
-            try:
-                keys = getattr(rw, 'keys', lambda: [])()
-                ent_id = rw['id'] if 'id' in keys else rw[0]
-                usuario_id = rw['usuario_id'] if 'usuario_id' in keys else (rw[1] if len(rw) > 1 else None)
-                speciality = rw['speciality'] if 'speciality' in keys else (rw[2] if len(rw) > 2 else None) if len(rw) > 2 else None
-                bio = rw['bio'] if 'bio' in keys else (rw[6] if len(rw) > 6 else None) if len(rw) > 6 else None
-                telefono = rw['telefono'] if 'telefono' in keys else (rw[3] if len(rw) > 3 else None) if len(rw) > 3 else None
-                instagram_url = rw['instagram_url'] if 'instagram_url' in keys else (rw[4] if len(rw) > 4 else None) if len(rw) > 4 else None
-                youtube_url = rw['youtube_url'] if 'youtube_url' in keys else (rw[5] if len(rw) > 5 else None) if len(rw) > 5 else None
-
-                user = Usuario.query.filter_by(id=usuario_id).first()
-                if not user or getattr(user, 'activo', True) is False:
-                    continue
-                # Exclude the configured admin account from public trainer listings
-                if getattr(user, 'email', None) and getattr(user, 'email') == ADMIN_EMAIL:
-                    continue
-                trainers.append({'usuario_id': user.id, 'nombre': getattr(user, 'nombre', None), 'speciality': speciality, 'bio': bio, 'telefono': telefono, 'instagram_url': instagram_url, 'youtube_url': youtube_url})
-            except Exception:
-                continue
-        return jsonify(trainers), 200
+        page = parse_page_args(request.args, _public_entrenador_columns(include_entrenador_id=False))
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        keys, rows = _public_entrenadores_rows(page, include_entrenador_id=False)
+        return page_response(rows, page, row_serializer(keys))
     except Exception as e:
         # Log full exception and return diagnostic info in development to help
         # identify the root cause. This will be visible in the frontend JSON
         # when a 500 occurs so you can paste it here for debugging.
+        db.session.rollback()
         app.logger.exception('public_list_entrenadores failed')
         # Return error details in development (not for production)
         is_prod = bool(os.getenv('DATABASE_URL'))
@@ -3786,6 +3432,8 @@ def public_get_entrenador(usuario_id):
 
 
 @app.route('/api/entrenadores/<int:usuario_id>', methods=['GET'])
+@conditional_get(response_cache, fingerprint=_catalogo_fingerprint)
+@cached_response(response_cache)
 def obtener_entrenador_publico(usuario_id):
     """Devuelve el perfil público de un entrenador (por usuario.id) incluyendo
     sus rutinas públicas y planes públicos. Público: no requiere autenticación.
@@ -3860,6 +3508,13 @@ def obtener_entrenador_publico_options(usuario_id):
     return ('', 200)
 
 
+# Fuente por defecto de /api/admin/metrics: 'live' (una consulta agregada) o
+# 'snapshot' (fila precalculada en metrics_snapshot, se recalcula si tiene más
+# de ADMIN_METRICS_SNAPSHOT_MAX_AGE segundos). ?source= lo cambia por petición.
+ADMIN_METRICS_SOURCE = os.getenv('ADMIN_METRICS_SOURCE', 'live').lower()
+ADMIN_METRICS_SNAPSHOT_MAX_AGE = int(os.getenv('ADMIN_METRICS_SNAPSHOT_MAX_AGE', '300'))
+
+
 @app.route('/api/admin/metrics', methods=['GET'])
 @jwt_required
 def admin_metrics():
@@ -3867,46 +3522,103 @@ def admin_metrics():
     if role != 'admin':
         return jsonify({'error': 'forbidden: admin only'}), 403
 
-    # Make metrics resilient: count each table separately and don't return 500
-    # Compute clearer metrics and disambiguate user roles.
     # Definitions returned:
     # - total_users: number of Usuario rows
-    # - total_clientes: number of distinct usuarios that have a Cliente row
-    # - total_entrenadores: number of distinct usuarios that have an Entrenador row
+    # - total_clientes / total_entrenadores: usuarios with a Cliente / Entrenador row
     # - both_roles: usuarios that appear as both Cliente and Entrenador
     # - clientes_only / entrenadores_only: derived counts
+    # - rutinas, planes, solicitudes (por estado), mediciones_7d
+    source = (request.args.get('source') or ADMIN_METRICS_SOURCE).lower()
+    if source not in ('live', 'snapshot'):
+        return jsonify({'error': 'invalid source', 'detail': 'use live or snapshot'}), 400
+    try:
+        result = None
+        if source == 'snapshot':
+            result = read_snapshot(db.session, max_age=timedelta(seconds=ADMIN_METRICS_SNAPSHOT_MAX_AGE))
+            if result is None:
+                result = refresh_snapshot(db.session)
+                db.session.commit()
+        else:
+            result = compute_metrics(db.session)
+        result['source'] = source
+        return jsonify(result), 200
+    except Exception as e:
+        db.session.rollback()
+        app.logger.exception('admin_metrics: failed computing metrics')
+        return jsonify({'error': 'db error', 'detail': str(e)}), 500
+
+
+@app.route('/api/admin/metrics/refresh', methods=['POST'])
+@jwt_required
+def admin_metrics_refresh():
+    """Recalcula el snapshot de métricas ahora (el panel lo lee con ?source=snapshot)."""
+    role = request.jwt_payload.get('role')
+    if role != 'admin':
+        return jsonify({'error': 'forbidden: admin only'}), 403
     try:
-        from database.database import Usuario, Cliente, Entrenador, Medicion, Rutina
-        from sqlalchemy import func
+        result = refresh_snapshot(db.session)
+        db.session.commit()
+        result['source'] = 'snapshot'
+        return jsonify(result), 200
+    except Exception as e:
+        db.session.rollback()
+        app.logger.exception('admin_metrics_refresh failed')
+        return jsonify({'error': 'db error', 'detail': str(e)}), 500
 
-        # total usuarios
-        total_users = db.session.query(func.count(Usuario.id)).scalar() or 0
 
-        # distinct usuario counts in Cliente and Entrenador
-        total_client_user_count = db.session.query(func.count(func.distinct(Cliente.usuario_id))).scalar() or 0
-        total_entrenador_user_count = db.session.query(func.count(func.distinct(Entrenador.usuario_id))).scalar() or 0
+def _parse_day(value, default):
+    if not value:
+        return default
+    return datetime.strptime(value, '%Y-%m-%d').date()
 
-        # users that have both cliente AND entrenador
-        both_count = db.session.query(func.count(func.distinct(Usuario.id))).join(Cliente, Cliente.usuario_id == Usuario.id).join(Entrenador, Entrenador.usuario_id == Usuario.id).scalar() or 0
 
-        clientes_only = max(0, int(total_client_user_count) - int(both_count))
-        entrenadores_only = max(0, int(total_entrenador_user_count) - int(both_count))
+@app.route('/api/admin/metrics/history', methods=['GET'])
+@jwt_required
+def admin_metrics_history():
+    """Serie diaria/semanal desde metrics_daily (nunca lee las tablas crudas).
 
-        result = {
-            'total_users': int(total_users),
-            'total_clientes': int(total_client_user_count),
-            'total_entrenadores': int(total_entrenador_user_count),
-            'both_roles': int(both_count),
-            'clientes_only': int(clientes_only),
-            'entrenadores_only': int(entrenadores_only)
-        }
+    Query: from, to (YYYY-MM-DD, por defecto los últimos 30 días), bucket=day|week.
+    Los días se agregan con `python -m backend.manage rollup_metrics`.
+    """
+    role = request.jwt_payload.get('role')
+    if role != 'admin':
+        return jsonify({'error': 'forbidden: admin only'}), 403
 
-        return jsonify(result), 200
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in ('day', 'week'):
+        return jsonify({'error': 'invalid bucket', 'detail': 'use day or week'}), 400
+    try:
+        end = _parse_day(request.args.get('to'), datetime.utcnow().date())
+        start = _parse_day(request.args.get('from'), end - timedelta(days=30))
+    except ValueError:
+        return jsonify({'error': 'invalid date', 'detail': 'use YYYY-MM-DD'}), 400
+    if start > end:
+        return jsonify({'error': 'invalid range', 'detail': 'from is after to'}), 400
+    try:
+        series = metrics_history(db.session, start, end, bucket)
+        return jsonify({'from': start.isoformat(), 'to': end.isoformat(), 'bucket': bucket, 'series': series}), 200
     except Exception as e:
-        app.logger.exception('admin_metrics: failed computing metrics')
+        app.logger.exception('admin_metrics_history failed')
         return jsonify({'error': 'db error', 'detail': str(e)}), 500
 
 
+@app.route('/api/admin/metrics/pool', methods=['GET'])
+@jwt_required
+def admin_metrics_pool():
+    """Estado del pool de conexiones de este proceso (ver database/pool.py).
+
+    Checked-out / overflow actuales y, con DB_POOL_METRICS, tiempos de espera
+    al pedir conexión, eventos de overflow, timeouts e invalidaciones.
+    """
+    role = request.jwt_payload.get('role')
+    if role != 'admin':
+        return jsonify({'error': 'forbidden: admin only'}), 403
+    try:
+        return jsonify(pool_status(db.engine)), 200
+    except Exception as e:
+        app.logger.exception('admin_metrics_pool failed')
+        return jsonify({'error': 'internal', 'detail': str(e)}), 500
+
 
 @app.route('/api/admin/review', methods=['GET'])
 @jwt_required
@@ -4089,7 +3801,9 @@ def admin_approve_rutina(rutina_id):
                 # non-fatal: continue and commit rutina change even if creating review fails
                 app.logger.exception('admin_approve_rutina: failed creating ContentReview')
 
+        catalogo.sync(db.session, 'rutina', r.id)
         db.session.commit()
+        _bump_catalogo('admin_approve_rutina')
         return jsonify({'message': 'rutina publicada', 'id': r.id}), 200
     except Exception as e:
         db.session.rollback()
@@ -4110,7 +3824,10 @@ def admin_reject_rutina(rutina_id):
         if not r:
             return jsonify({'error': 'rutina not found'}), 404
         db.session.delete(r)
+        content_stats.forget(db.session, 'rutina', rutina_id)
+        catalogo.sync(db.session, 'rutina', rutina_id)
         db.session.commit()
+        _bump_catalogo('admin_reject_rutina')
         # Mark any related ContentReview as rejected
         try:
             from database.database import ContentReview
@@ -4160,7 +3877,9 @@ def admin_approve_plan(plan_id):
             except Exception:
                 app.logger.exception('admin_approve_plan: failed creating ContentReview')
 
+        catalogo.sync(db.session, 'plan', p.id)
         db.session.commit()
+        _bump_catalogo('admin_approve_plan')
         return jsonify({'message': 'plan publicado', 'id': p.id}), 200
     except Exception as e:
         db.session.rollback()
@@ -4181,7 +3900,10 @@ def admin_reject_plan(plan_id):
         if not p:
             return jsonify({'error': 'plan not found'}), 404
         db.session.delete(p)
+        content_stats.forget(db.session, 'plan', plan_id)
+        catalogo.sync(db.session, 'plan', plan_id)
         db.session.commit()
+        _bump_catalogo('admin_reject_plan')
         # Mark review row rejected if exists
         try:
             from database.database import ContentReview
@@ -4228,7 +3950,7 @@ def admin_create_user():
         if existing:
             return jsonify({'error': 'user exists'}), 409
 
-        hashed = generate_password_hash(password)
+        hashed = hash_password(password)
         user = Usuario(email=email, nombre=nombre, hashed_password=hashed)
         db.session.add(user)
         # flush so user.id is available for FK relations
@@ -4258,9 +3980,10 @@ def admin_create_user():
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': 'db error', 'detail': str(e)}), 500
+        if 'entrenador' in created_rel:
+            _bump_catalogo('admin_create_user')
 
         # determine role string for response
-        ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@test.local')
         if user.email == ADMIN_EMAIL:
             resp_role = 'admin'
         elif 'entrenador' in created_rel:
@@ -4271,6 +3994,8 @@ def admin_create_user():
             resp_role = 'usuario'
 
         return jsonify({'message': 'user created', 'id': user.id, 'role': resp_role}), 201
+    except PasswordHashBusy as e:
+        return _hash_busy_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'db error', 'detail': str(e)}), 500
@@ -4279,39 +4004,23 @@ def admin_create_user():
 @app.route('/api/admin/fix_schema', methods=['POST'])
 @jwt_required
 def admin_fix_schema():
-    """Intenta arreglar problemas de esquema comunes en producción.
+    """Ejecuta la sincronización de esquema (database/schema_sync.py) a demanda.
 
-    - Ejecuta `db.create_all()` para crear tablas que falten.
-    - Intenta añadir la columna `entrenador_id` en `rutinas` si falta.
-    - Intenta añadir una FK simple hacia `entrenadores` (silenciosamente si ya existe).
+    Crea tablas, columnas e índices que falten según los modelos y devuelve el
+    informe. Es la misma pasada que se hace al arrancar; útil tras restaurar
+    una DB antigua sin reiniciar los workers.
 
-    Este endpoint requiere role == 'admin'. Está pensado para uso puntual
-    en despliegues donde la base de datos quedó desincronizada.
+    Este endpoint requiere role == 'admin'.
     """
     role = request.jwt_payload.get('role')
     if role != 'admin':
         return jsonify({'error': 'forbidden: admin only'}), 403
 
     try:
-        with app.app_context():
-            # crear tablas que falten (no altera tablas existentes)
-            db.create_all()
-            # añadir columna entrenador_id si no existe (Postgres supports IF NOT EXISTS)
-            try:
-                db.session.execute(text('ALTER TABLE rutinas ADD COLUMN IF NOT EXISTS entrenador_id INTEGER'))
-            except Exception:
-                # ignore
-                pass
-            # intentar añadir constraint FK (si ya existe fallará y lo ignoramos)
-            try:
-                db.session.execute(text('ALTER TABLE rutinas ADD CONSTRAINT fk_rutinas_entrenador FOREIGN KEY (entrenador_id) REFERENCES entrenadores(id)'))
-            except Exception:
-                # ignore
-                pass
-            db.session.commit()
-        return jsonify({'message': 'schema fix attempted'}), 200
+        report = sync_schema(db.engine, db.metadata)
+        return jsonify({'message': 'schema sync done', 'report': report.as_dict()}), 200
     except Exception as e:
-        db.session.rollback()
+        app.logger.exception('admin_fix_schema failed')
         return jsonify({'error': 'schema fix failed', 'detail': str(e)}), 500
 
 
@@ -4537,6 +4246,7 @@ def dev_promote_entrenador():
         entrenador = Entrenador(usuario_id=user.id)
         db.session.add(entrenador)
         db.session.commit()
+        _bump_catalogo('dev_promote_entrenador')
         return jsonify({'message': 'entrenador creado', 'entrenador_id': entrenador.id}), 201
     except Exception as e:
         db.session.rollback()
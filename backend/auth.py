@@ -1,15 +1,31 @@
 import os
 import jwt
+import threading
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime
 from functools import wraps
 from flask import request, jsonify
 from datetime import datetime, timedelta
+from backend.revocation import RevocationCache, RevocationIndex
 
 JWT_SECRET = os.getenv('JWT_SECRET', 'dev-secret-change-me')
 JWT_ALGORITHM = 'HS256'
 # Seconds for token expiration. Make configurable via env var.
 JWT_EXPIRES_SECONDS = int(os.getenv('JWT_EXPIRES_SECONDS', '3600'))
+# revoked_tokens rows are kept for the max token lifetime plus a minute of clock skew.
+REVOKED_TOKEN_RETENTION_SECONDS = int(os.getenv('REVOKED_TOKEN_RETENTION_SECONDS', str(JWT_EXPIRES_SECONDS + 60)))
+
+# Per-process cache in front of the revoked_tokens lookup (see backend/revocation.py).
+# Negative entries default to the token lifetime; set REVOKED_CACHE_ENABLED=0 to
+# always hit the database.
+revocation_cache = RevocationCache(
+    max_revoked=int(os.getenv('REVOKED_CACHE_MAX', '10000')),
+    max_negative=int(os.getenv('REVOKED_NEGATIVE_CACHE_MAX', '50000')),
+    negative_ttl=int(os.getenv('REVOKED_NEGATIVE_CACHE_TTL', str(JWT_EXPIRES_SECONDS))),
+    enabled=os.getenv('REVOKED_CACHE_ENABLED', '1').lower() in ('1', 'true', 'yes'),
+)
 
 
 def generate_token(payload, expires_in: int | None = None):
@@ -27,16 +43,149 @@ def generate_token(payload, expires_in: int | None = None):
     return token
 
 
+class DecodeMemo:
+    """LRU of verified tokens: raw token string -> (payload, exp, secret).
+
+    The SPA re-sends the same bearer token on every call, so after the first
+    successful `jwt.decode` the payload is served from memory until the
+    token's `exp`. Entries remember the secret they were verified with and
+    are ignored once `JWT_SECRET` changes. Only valid tokens are stored.
+    """
+
+    def __init__(self, max_size=4096, enabled=True):
+        self.max_size = int(max_size)
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.decode_seconds = 0.0
+
+    def get(self, token, secret):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                payload, exp, entry_secret = entry
+                if entry_secret == secret and time.time() < exp:
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return dict(payload)
+                del self._entries[token]
+            self.misses += 1
+        return None
+
+    def put(self, token, payload, secret):
+        exp = payload.get('exp')
+        if not self.enabled or not isinstance(exp, (int, float)):
+            return
+        with self._lock:
+            self._entries[token] = (dict(payload), exp, secret)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            self.decode_seconds = 0.0
+
+    def stats(self):
+        with self._lock:
+            avg = self.decode_seconds / self.misses if self.misses else 0.0
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'avg_decode_ms': round(avg * 1000, 4),
+                # rough CPU saved: each hit would have cost one full decode
+                'estimated_saved_ms': round(self.hits * avg * 1000, 2),
+            }
+
+
+decode_memo = DecodeMemo(
+    max_size=int(os.getenv('JWT_DECODE_CACHE_MAX', '4096')),
+    enabled=os.getenv('JWT_DECODE_CACHE_ENABLED', '1').lower() in ('1', 'true', 'yes'),
+)
+
+
 def decode_token(token):
+    secret = JWT_SECRET
+    cached = decode_memo.get(token, secret)
+    if cached is not None:
+        return cached
+    started = time.perf_counter()
     try:
-        decoded = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return decoded
+        decoded = jwt.decode(token, secret, algorithms=[JWT_ALGORITHM])
     except jwt.ExpiredSignatureError:
         # token expired
         return None
     except jwt.PyJWTError:
         # invalid token
         return None
+    finally:
+        decode_memo.decode_seconds += time.perf_counter() - started
+    decode_memo.put(token, decoded, secret)
+    return decoded
+
+
+def _revoked_in_db(jti):
+    # A Bloom negative is definitive; only positives need the table.
+    if revocation_index.enabled and not revocation_index.might_contain(jti):
+        return False
+    from database.database import RevokedToken
+    from database.database import db as _db
+    return _db.session.query(RevokedToken.id).filter_by(jti=jti).first() is not None
+
+
+def _load_revoked(since):
+    """Rows `(jti, revoked_at)` for the revocation index, newer than `since`."""
+    from database.database import RevokedToken
+    from database.database import db as _db
+    stmt = _db.select(RevokedToken.jti, RevokedToken.revoked_at)
+    if since is not None:
+        stmt = stmt.where(RevokedToken.revoked_at >= since)
+    with _db.engine.connect() as conn:
+        return [(row[0], row[1]) for row in conn.execute(stmt)]
+
+
+def purge_expired_revocations(max_age_seconds=None):
+    """Delete revoked_tokens rows older than the longest JWT lifetime.
+
+    Such tokens fail `decode_token` on `exp` anyway, so the row is no longer
+    needed. Returns the number of rows deleted.
+    """
+    from database.database import RevokedToken
+    from database.database import db as _db
+    max_age = REVOKED_TOKEN_RETENTION_SECONDS if max_age_seconds is None else int(max_age_seconds)
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+    with _db.engine.begin() as conn:
+        result = conn.execute(_db.delete(RevokedToken).where(RevokedToken.revoked_at < cutoff))
+        return result.rowcount or 0
+
+
+# Bloom filter of revoked jtis shared by all requests of this worker. Tokens
+# revoked by other gunicorn workers show up after at most
+# REVOCATION_INDEX_REFRESH_SECONDS.
+revocation_index = RevocationIndex(
+    loader=_load_revoked,
+    purge=purge_expired_revocations,
+    refresh_interval=int(os.getenv('REVOCATION_INDEX_REFRESH_SECONDS', '30')),
+    rebuild_interval=int(os.getenv('REVOCATION_INDEX_REBUILD_SECONDS', '3600')),
+    purge_interval=int(os.getenv('REVOKED_PURGE_INTERVAL_SECONDS', '3600')),
+    error_rate=float(os.getenv('REVOCATION_INDEX_ERROR_RATE', '0.01')),
+    on_revoked=revocation_cache.mark_revoked,
+    enabled=os.getenv('REVOCATION_INDEX_ENABLED', '1').lower() in ('1', 'true', 'yes'),
+)
+
+
+def note_revoked(jti):
+    """Update this worker's cache and index after a revocation was committed."""
+    revocation_cache.mark_revoked(jti)
+    revocation_index.add(jti)
 
 
 def jwt_required(view_func):
@@ -60,13 +209,11 @@ def jwt_required(view_func):
 
         # Check revocation (RevokedToken) if DB is available. Import lazily
         try:
-            from database.database import RevokedToken
-            from database.database import db as _db
             jti = decoded.get('jti')
             if jti:
-                exists = _db.session.query(RevokedToken).filter_by(jti=jti).first()
-                if exists:
-                    return jsonify({'error': 'token revoked'}), 401
+                revocation_index.maybe_refresh()
+            if jti and revocation_cache.is_revoked(jti, _revoked_in_db, exp=decoded.get('exp')):
+                return jsonify({'error': 'token revoked'}), 401
         except Exception:
             # If DB not available yet (app init), skip revocation check
             pass
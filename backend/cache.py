@@ -0,0 +1,344 @@
+"""Versioned response cache for the public catalogue endpoints.
+
+Serialized JSON bodies are cached per endpoint path + query args together
+with the catalogue version they were produced under. Writes that can change
+what the public listings show (approve/reject, edits, deletes, profile
+updates, user deactivation...) call `bump()`, which increments the version;
+entries stored under an older version are treated as misses, so nothing has
+to be deleted key by key.
+
+Backends (RESPONSE_CACHE_BACKEND):
+
+- ``memory`` (default): per-process LRU. Fast, but under gunicorn each worker
+  has its own version counter, so a bump is only seen by the worker that
+  handled the write; other workers serve their copy until
+  RESPONSE_CACHE_TTL expires.
+- ``sqlite``: a local SQLite file (RESPONSE_CACHE_PATH) shared by all the
+  workers on the host, so a bump is visible to every worker immediately.
+- ``off``: disables caching.
+
+`conditional_get` adds strong ETags (If-None-Match -> 304) plus
+Cache-Control/Last-Modified on top of the same version counter. With the
+memory backend the ETag also covers a fingerprint, the catalogue version
+persisted in the database (backend/catalogo.py), which every worker's
+writes bump. Each cached entry keeps the ETag it was produced under, and an
+entry whose ETag no longer matches is a miss, so a body is never served
+under the ETag of newer content.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, current_app, g, request
+
+DEFAULT_NAMESPACE = 'catalogo'
+
+
+class MemoryBackend:
+    name = 'memory'
+
+    def __init__(self, max_entries=512):
+        self.max_entries = int(max_entries)
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, namespace):
+        with self._lock:
+            return self._versions.get(namespace, (0, None))
+
+    def bump(self, namespace):
+        with self._lock:
+            version = self._versions.get(namespace, (0, None))[0] + 1
+            self._versions[namespace] = (version, time.time())
+            return version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class SQLiteBackend:
+    """Cache shared by the worker processes of one host through a SQLite file."""
+
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries=2048):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute('CREATE TABLE IF NOT EXISTS response_cache (key TEXT PRIMARY KEY, version INTEGER NOT NULL, '
+                     'created REAL NOT NULL, mimetype TEXT, headers TEXT, body BLOB, etag TEXT)')
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(response_cache)')}
+        if 'etag' not in columns:
+            # ficheros creados antes de guardar el ETag de cada entrada
+            conn.execute('ALTER TABLE response_cache ADD COLUMN etag TEXT')
+        conn.execute('CREATE TABLE IF NOT EXISTS cache_versions (namespace TEXT PRIMARY KEY, '
+                     'version INTEGER NOT NULL, bumped_at REAL)')
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT version, created, mimetype, headers, body, etag FROM response_cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        return {'version': row[0], 'created': row[1], 'mimetype': row[2],
+                'headers': json.loads(row[3] or '{}'), 'body': bytes(row[4]), 'etag': row[5]}
+
+    def set(self, key, entry):
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO response_cache (key, version, created, mimetype, headers, body, etag) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (key, entry['version'], entry['created'], entry['mimetype'], json.dumps(entry['headers']), entry['body'],
+             entry.get('etag')))
+        # keep the file bounded: drop the oldest rows past max_entries
+        conn.execute('DELETE FROM response_cache WHERE key IN (SELECT key FROM response_cache '
+                     'ORDER BY created DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+    def get_version(self, namespace):
+        row = self._conn().execute(
+            'SELECT version, bumped_at FROM cache_versions WHERE namespace = ?', (namespace,)).fetchone()
+        return (row[0], row[1]) if row else (0, None)
+
+    def bump(self, namespace):
+        conn = self._conn()
+        now = time.time()
+        conn.execute('INSERT INTO cache_versions (namespace, version, bumped_at) VALUES (?, 1, ?) '
+                     'ON CONFLICT(namespace) DO UPDATE SET version = version + 1, bumped_at = excluded.bumped_at',
+                     (namespace, now))
+        # old entries can never match again; reclaim the space
+        conn.execute('DELETE FROM response_cache WHERE version < (SELECT version FROM cache_versions WHERE namespace = ?)',
+                     (namespace,))
+        return self.get_version(namespace)[0]
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute('DELETE FROM response_cache')
+        conn.execute('DELETE FROM cache_versions')
+
+
+class ResponseCache:
+    def __init__(self, backend=None, ttl=300, enabled=True):
+        self.backend = backend
+        self.ttl = float(ttl)
+        self.enabled = enabled and backend is not None
+        self.hits = 0
+        self.misses = 0
+        self.bumps = 0
+
+    def version(self, namespace=DEFAULT_NAMESPACE):
+        """(version, bumped_at epoch or None) of `namespace`."""
+        if not self.enabled:
+            return (0, None)
+        return self.backend.get_version(namespace)
+
+    def lookup(self, key, namespace=DEFAULT_NAMESPACE, etag=None):
+        """Entrada vigente para `key`; con `etag`, sólo si se guardó bajo ese mismo ETag."""
+        if not self.enabled:
+            return None
+        entry = self.backend.get(key)
+        version = self.backend.get_version(namespace)[0]
+        if (entry is None or entry['version'] != version or time.time() - entry['created'] > self.ttl
+                or (etag is not None and entry.get('etag') != etag)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(self, key, body, mimetype, headers=None, namespace=DEFAULT_NAMESPACE, version=None, etag=None):
+        if not self.enabled:
+            return
+        if version is None:
+            version = self.backend.get_version(namespace)[0]
+        self.backend.set(key, {'version': version, 'created': time.time(), 'mimetype': mimetype,
+                               'headers': dict(headers or {}), 'body': body, 'etag': etag})
+
+    def bump(self, namespace=DEFAULT_NAMESPACE, reason=None):
+        if not self.enabled:
+            return 0
+        version = self.backend.bump(namespace)
+        self.bumps += 1
+        try:
+            current_app.logger.debug('response cache %s bumped to %s (%s)', namespace, version, reason)
+        except Exception:
+            pass
+        return version
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+        self.hits = self.misses = self.bumps = 0
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'backend': getattr(self.backend, 'name', None),
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'bumps': self.bumps,
+            'version': self.version()[0] if self.enabled else None,
+        }
+
+
+# Response headers worth replaying from a cached entry (pagination links).
+_KEPT_HEADERS = ('X-Next-Cursor', 'Link')
+
+
+def request_cache_key():
+    args = sorted(request.args.items(multi=True))
+    query = '&'.join(f'{k}={v}' for k, v in args)
+    return f'{request.path}?{query}'
+
+
+def cached_response(cache, namespace=DEFAULT_NAMESPACE, cacheable=None):
+    """Serve GET 200 responses of the wrapped view from `cache`.
+
+    `cacheable(response)` can veto storing a particular response (e.g. a
+    detail view that only caches public content). Responses are keyed on the
+    path and query args only, so only wrap views whose output does not
+    depend on the caller. Under `conditional_get` the entry also records the
+    request's ETag, and is only served to requests with that same ETag.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or not cache.enabled:
+                return view_func(*args, **kwargs)
+            key = request_cache_key()
+            etag = g.get('catalogue_etag')
+            try:
+                entry = cache.lookup(key, namespace, etag=etag)
+            except Exception:
+                current_app.logger.exception('response cache lookup failed')
+                entry = None
+            if entry is not None:
+                resp = Response(entry['body'], status=200, mimetype=entry['mimetype'], headers=entry['headers'])
+                resp.headers['X-Cache'] = 'HIT'
+                return resp
+
+            # read the version before running the view: a bump that lands
+            # while we serialize makes this entry stale instead of hiding it
+            version = cache.version(namespace)[0]
+            resp = current_app.make_response(view_func(*args, **kwargs))
+            if resp.status_code == 200 and (cacheable is None or cacheable(resp)):
+                try:
+                    body = resp.get_data()
+                    headers = {h: resp.headers[h] for h in _KEPT_HEADERS if h in resp.headers}
+                    cache.store(key, body, resp.mimetype, headers, namespace, version=version, etag=etag)
+                except Exception:
+                    current_app.logger.exception('response cache store failed')
+            resp.headers['X-Cache'] = 'MISS'
+            return resp
+        return wrapper
+    return decorator
+
+
+def build_cache_from_env():
+    backend_name = os.getenv('RESPONSE_CACHE_BACKEND', 'memory').lower()
+    ttl = float(os.getenv('RESPONSE_CACHE_TTL', '300'))
+    max_entries = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+    if backend_name == 'sqlite':
+        default_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'response_cache.sqlite')
+        backend = SQLiteBackend(os.getenv('RESPONSE_CACHE_PATH', default_path), max_entries=max_entries)
+    elif backend_name in ('off', 'none', '0', 'false'):
+        backend = None
+    else:
+        backend = MemoryBackend(max_entries=max_entries)
+    return ResponseCache(backend, ttl=ttl)
+
+
+# --- Conditional GET -------------------------------------------------------
+
+CACHE_CONTROL = os.getenv('CATALOGUE_CACHE_CONTROL', 'public, max-age=0, must-revalidate')
+_STARTED_AT = time.time()
+
+
+def _etag_matches(header_value, etag):
+    if not header_value:
+        return False
+    for candidate in header_value.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def conditional_get(cache, fingerprint=None, namespace=DEFAULT_NAMESPACE):
+    """Strong ETag / If-None-Match support for catalogue reads.
+
+    The ETag is derived from the request path + args and the catalogue version
+    (plus `fingerprint()`, a version persisted in the database, when the
+    cache backend is per-process and therefore can't see bumps made by
+    other workers). A matching If-None-Match gets a 304 before the view, the
+    response cache or the ORM are touched. The ETag is left in
+    `g.catalogue_etag` for `cached_response`.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view_func(*args, **kwargs)
+            try:
+                version, bumped_at = cache.version(namespace)
+                parts = [request_cache_key(), str(version)]
+                if fingerprint is not None and getattr(cache.backend, 'name', None) != 'sqlite':
+                    parts.append(repr(fingerprint()))
+                etag = '"' + hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest() + '"'
+                g.catalogue_etag = etag
+            except Exception:
+                current_app.logger.exception('etag computation failed')
+                return view_func(*args, **kwargs)
+            last_modified = datetime.fromtimestamp(bumped_at or _STARTED_AT, tz=timezone.utc)
+
+            if _etag_matches(request.headers.get('If-None-Match'), etag):
+                resp = Response(status=304)
+            else:
+                resp = current_app.make_response(view_func(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.headers['ETag'] = etag
+            resp.headers['Cache-Control'] = CACHE_CONTROL
+            resp.last_modified = last_modified
+            return resp
+        return wrapper
+    return decorator
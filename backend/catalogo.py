@@ -0,0 +1,158 @@
+"""Denormalized public catalogue (`catalogo_publico`): upkeep and consistency check.
+
+The table has one row per published rutina (es_publica) or plan (es_publico)
+whose owner is visible (backend/visibility.py), carrying every column the
+public listings return, trainer name and usuario_id included. A row exists
+exactly when the item must be listed, so owner status needs no column and
+/api/rutinas/public and /api/planes read this one table through the
+(tipo, creado_en, content_id) index, without joins.
+
+Handlers keep it in step inside their own transaction, before the commit:
+
+- `sync(session, tipo, ids)` after content is created, edited, approved,
+  rejected or deleted. It deletes those items' rows and re-inserts them from
+  the source tables (INSERT ... SELECT with the visibility filter), so one
+  call covers publish, unpublish, edits and deletes.
+- `sync_usuarios(session, usuario_ids)` when the owner changes: deactivation,
+  reactivation, losing the entrenador row, a new nombre.
+
+Hard deletes go through database/purge.py, which deletes the rows by
+(tipo, content_id) like content_stats. Writes that bypass the app (bulk
+imports, manual SQL) leave the table behind until `rebuild()`
+(`python -m backend.manage rebuild_catalogo`). `check()` compares the table
+with what the source tables say it should hold
+(`python -m backend.manage check_catalogo`).
+
+`catalogo_version` holds one persisted counter. `bump_version()` increments
+it after every write that changes what the public listings show (through
+`_bump_catalogo` in backend/app.py, and the manage commands), trainer profile
+edits included. `current_version()` is a primary-key read, and the catalogue
+ETags include it, so every worker sees a write made on any other worker,
+whatever the response cache backend.
+"""
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+
+from backend.visibility import visible_content
+from database.database import CatalogoPublico, CatalogoVersion, Entrenador, PlanAlimenticio, Rutina, Usuario
+
+TIPOS = ('rutina', 'plan')
+
+# tipo -> (modelo, columna "publicado", campos propios copiados tal cual)
+_SOURCES = {
+    'rutina': (Rutina, Rutina.es_publica, (
+        'nombre', 'descripcion', 'seccion_descripcion', 'objetivo_principal', 'enfoque_rutina',
+        'cualidades_clave', 'duracion_frecuencia', 'material_requerido', 'instrucciones_estructurales',
+        'link_url', 'nivel', 'creado_en',
+    )),
+    'plan': (PlanAlimenticio, PlanAlimenticio.es_publico, ('nombre', 'descripcion', 'contenido', 'creado_en')),
+}
+
+VERSION_ID = 1
+
+_table = CatalogoPublico.__table__
+_version = CatalogoVersion.__table__
+
+
+def _source(tipo, content_ids=None, usuario_ids=None):
+    """(columns, SELECT) producing the catalogue rows `tipo` should have."""
+    model, published, fields = _SOURCES[tipo]
+    columns = {
+        'tipo': literal(tipo),
+        'content_id': model.id,
+        'entrenador_id': model.entrenador_id,
+        'entrenador_usuario_id': Entrenador.usuario_id,
+        'entrenador_nombre': Usuario.nombre,
+        **{name: getattr(model, name) for name in fields},
+    }
+    stmt = visible_content(select(*[c.label(k) for k, c in columns.items()]).select_from(model), model.entrenador_id)
+    stmt = stmt.where(published == True)  # noqa: E712
+    if content_ids is not None:
+        stmt = stmt.where(model.id.in_(content_ids))
+    if usuario_ids is not None:
+        stmt = stmt.where(Entrenador.usuario_id.in_(usuario_ids))
+    return list(columns), stmt
+
+
+def _refill(session, tipo, **filters):
+    columns, stmt = _source(tipo, **filters)
+    session.execute(insert(_table).from_select(columns, stmt))
+
+
+def _ids(values):
+    return sorted({int(v) for v in ([values] if isinstance(values, int) else values)})
+
+
+def sync(session, tipo, content_ids):
+    """Rewrite these items' rows from their current state (no commit)."""
+    ids = _ids(content_ids)
+    if not ids:
+        return
+    # los cambios pendientes del ORM (es_publica, borrados) deben verse en el SELECT
+    session.flush()
+    session.execute(delete(_table).where(_table.c.tipo == tipo, _table.c.content_id.in_(ids)))
+    _refill(session, tipo, content_ids=ids)
+
+
+def sync_usuarios(session, usuario_ids):
+    """Rewrite the rows of all content owned by these usuarios (no commit)."""
+    ids = _ids(usuario_ids)
+    if not ids:
+        return
+    session.flush()
+    session.execute(delete(_table).where(_table.c.entrenador_usuario_id.in_(ids)))
+    for tipo in TIPOS:
+        _refill(session, tipo, usuario_ids=ids)
+
+
+def rebuild(session):
+    """Rebuild catalogo_publico from scratch; returns the resulting row count."""
+    session.flush()
+    session.execute(delete(_table))
+    for tipo in TIPOS:
+        _refill(session, tipo)
+    return session.execute(select(func.count()).select_from(_table)).scalar()
+
+
+def current_version(session):
+    """Persisted catalogue version (0 if it was never bumped)."""
+    return session.execute(select(_version.c.version).where(_version.c.id == VERSION_ID)).scalar() or 0
+
+
+def bump_version(session, now=None):
+    """Increment the catalogue version (no commit); the row is created on first use.
+
+    `session` can also be a Connection inside a transaction.
+    """
+    values = {'version': _version.c.version + 1, 'actualizado_en': now or datetime.utcnow()}
+    if session.execute(update(_version).where(_version.c.id == VERSION_ID).values(values)).rowcount:
+        return
+    try:
+        with session.begin_nested():
+            session.execute(insert(_version).values(id=VERSION_ID, version=1, actualizado_en=values['actualizado_en']))
+    except IntegrityError:
+        # otro proceso creó la fila entre el UPDATE y el INSERT
+        session.execute(update(_version).where(_version.c.id == VERSION_ID).values(values))
+
+
+def check(session):
+    """Differences between catalogo_publico and the source tables.
+
+    Returns {'rows', 'missing', 'extra', 'stale'}: the table's row count and
+    the (tipo, content_id) pairs that should be listed but have no row, have
+    a row but should not be listed, or whose row differs from the source.
+    Both sides are loaded in memory, which is fine for a catalogue this size.
+    """
+    report = {'rows': 0, 'missing': [], 'extra': [], 'stale': []}
+    for tipo in TIPOS:
+        columns, stmt = _source(tipo)
+        expected = {r.content_id: tuple(r) for r in session.execute(stmt)}
+        actual_stmt = select(*[_table.c[k] for k in columns]).where(_table.c.tipo == tipo)
+        actual = {r.content_id: tuple(r) for r in session.execute(actual_stmt)}
+        report['rows'] += len(actual)
+        report['missing'] += [(tipo, i) for i in sorted(expected.keys() - actual.keys())]
+        report['extra'] += [(tipo, i) for i in sorted(actual.keys() - expected.keys())]
+        report['stale'] += [(tipo, i) for i in sorted(expected.keys() & actual.keys()) if expected[i] != actual[i]]
+    return report
@@ -4,7 +4,7 @@ from backend import app
 from database.database import db
 
 
-USAGE = '''Usage: python manage.py [create_tables|drop_tables]
+USAGE = '''Usage: python manage.py [create_tables|drop_tables|migrate|purge_revoked_tokens|rebuild_content_stats|rebuild_catalogo|check_catalogo|refresh_metrics|rollup_metrics|purge_usuarios ID... [--dry-run]|run_purge_jobs [--retry-failed]]
 '''
 
 
@@ -28,14 +28,14 @@ def create_user(email: str, password: str, nombre: str = 'Usuario'):
     except Exception:
         pass
 
-    from werkzeug.security import generate_password_hash
+    from backend.passwords import hash_password
     with app.app_context():
         from database.database import Usuario, Cliente
         existing = Usuario.query.filter_by(email=email).first()
         if existing:
             print('User already exists')
             return
-        hashed = generate_password_hash(password)
+        hashed = hash_password(password)
         user = Usuario(email=email, nombre=nombre, hashed_password=hashed)
         db.session.add(user)
         db.session.commit()
@@ -57,6 +57,116 @@ def drop_tables():
         print('Tablas eliminadas correctamente')
 
 
+def migrate():
+    # Sincroniza el esquema con los modelos (tablas, columnas e índices que falten)
+    from database.schema_sync import sync_schema
+    with app.app_context():
+        report = sync_schema(db.engine, db.metadata)
+    for kind in ('tables_created', 'columns_added', 'indexes_created', 'warnings', 'errors'):
+        for item in getattr(report, kind):
+            print(f'{kind}: {item}')
+    print('Esquema:', report.summary())
+    return report
+
+
+def purge_revoked_tokens(max_age_seconds=None):
+    # Borra tokens revocados más antiguos que la vida máxima de un JWT
+    from backend.auth import purge_expired_revocations
+    with app.app_context():
+        deleted = purge_expired_revocations(max_age_seconds)
+        print('Tokens revocados eliminados:', deleted)
+
+
+def rebuild_content_stats():
+    # Recalcula content_stats desde solicitudes_plan y cliente_rutina (corrige desvíos)
+    from database.content_stats import rebuild
+    with app.app_context():
+        rows = rebuild(db.session)
+        db.session.commit()
+        print('content_stats reconstruida:', rows, 'filas')
+    return rows
+
+
+def rebuild_catalogo():
+    # Recalcula catalogo_publico desde rutinas/planes (tras importaciones o SQL manual)
+    from backend.catalogo import bump_version, rebuild
+    with app.app_context():
+        rows = rebuild(db.session)
+        bump_version(db.session)
+        db.session.commit()
+        print('catalogo_publico reconstruido:', rows, 'filas')
+    return rows
+
+
+def check_catalogo():
+    # Compara catalogo_publico con las tablas fuente; no modifica nada
+    from backend.catalogo import check
+    with app.app_context():
+        report = check(db.session)
+    print('catalogo_publico:', report['rows'], 'filas')
+    for key in ('missing', 'extra', 'stale'):
+        items = report[key]
+        print(f'  {key}: {len(items)}', ' '.join(f'{t}:{i}' for t, i in items[:20]))
+    return report
+
+
+def refresh_metrics():
+    # Recalcula el snapshot de /api/admin/metrics (pensado para cron)
+    from database.metrics import refresh_snapshot
+    with app.app_context():
+        metrics = refresh_snapshot(db.session)
+        db.session.commit()
+        print('metrics_snapshot actualizado:', metrics['generated_at'])
+    return metrics
+
+
+def rollup_metrics():
+    # Agrega en metrics_daily los días completos posteriores al último ya agregado
+    from database.metrics import rollup_days
+    with app.app_context():
+        added = rollup_days(db.session)
+        db.session.commit()
+        print('metrics_daily: días añadidos', added)
+    return added
+
+
+def purge_usuarios(usuario_ids, dry_run=False):
+    # Hard delete de usuarios y su contenido en una transacción (database/purge.py)
+    from backend.catalogo import bump_version
+    from database.purge import purge_usuarios as _purge
+    with app.app_context():
+        result = _purge(db.session, usuario_ids, dry_run=dry_run)
+        if dry_run:
+            db.session.rollback()
+        else:
+            bump_version(db.session)
+            db.session.commit()
+    print('usuarios:', len(result['usuarios']), '(dry run)' if dry_run else '')
+    for table, n in result['rows'].items():
+        print(f'  {table}: {n}')
+    return result
+
+
+def run_purge_jobs(retry_failed=False):
+    # Ejecuta los jobs de purga pendientes y retoma los abandonados desde su checkpoint;
+    # con --retry-failed reanuda también los fallidos
+    from backend.catalogo import bump_version
+    from database.purge import failed_jobs, retry_job, run_job, runnable_jobs
+    with app.app_context():
+        if retry_failed:
+            for job_id in failed_jobs(db.session):
+                retry_job(db.session, job_id)
+            db.session.commit()
+        for job_id in runnable_jobs(db.session):
+            job = run_job(db.session, job_id)
+            if job is not None and job.eliminados:
+                bump_version(db.session)
+                db.session.commit()
+            if job is not None:
+                print(f'purge job {job.id}: {job.estado}, {job.procesados}/{job.total} procesados, '
+                      f'{job.eliminados} eliminados')
+
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         print(USAGE)
@@ -74,6 +184,30 @@ if __name__ == '__main__':
         create_user(email, password, nombre)
     elif cmd == 'drop_tables':
         drop_tables()
+    elif cmd == 'migrate':
+        report = migrate()
+        sys.exit(1 if report.errors else 0)
+    elif cmd == 'purge_revoked_tokens':
+        purge_revoked_tokens(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif cmd == 'rebuild_content_stats':
+        rebuild_content_stats()
+    elif cmd == 'rebuild_catalogo':
+        rebuild_catalogo()
+    elif cmd == 'check_catalogo':
+        report = check_catalogo()
+        sys.exit(1 if report['missing'] or report['extra'] or report['stale'] else 0)
+    elif cmd == 'refresh_metrics':
+        refresh_metrics()
+    elif cmd == 'rollup_metrics':
+        rollup_metrics()
+    elif cmd == 'run_purge_jobs':
+        run_purge_jobs(retry_failed='--retry-failed' in sys.argv[2:])
+    elif cmd == 'purge_usuarios':
+        ids = [a for a in sys.argv[2:] if a != '--dry-run']
+        if not ids:
+            print('Usage: python manage.py purge_usuarios ID [ID ...] [--dry-run]')
+            sys.exit(1)
+        purge_usuarios([int(i) for i in ids], dry_run='--dry-run' in sys.argv[2:])
     else:
         print(USAGE)
         sys.exit(1)
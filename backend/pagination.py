@@ -0,0 +1,203 @@
+"""Keyset pagination and field projection for the public listing endpoints.
+
+Query parameters understood by `parse_page_args`:
+
+- `limit`: page size (1..PUBLIC_LIST_MAX_LIMIT).
+- `cursor`: opaque token returned in the `X-Next-Cursor` header of the
+  previous page. It encodes the sort key of the last row sent
+  (`creado_en, id`, or just `id` for listings without `creado_en`), so the
+  next page is a `WHERE (creado_en, id) < (...)` range scan instead of an
+  OFFSET that grows with the catalogue.
+- `fields`: comma-separated subset of the response keys. Only the columns
+  needed for those keys are selected.
+
+Responses stay a plain JSON array so existing clients keep working; the next
+page is advertised through `X-Next-Cursor` and a `Link: <...>; rel="next"`
+header. Requests without `limit`/`cursor` return the full listing while
+PUBLIC_LIST_LEGACY_UNPAGINATED is on (the default); with it off they get
+the first PUBLIC_LIST_DEFAULT_LIMIT rows.
+"""
+import base64
+import json
+import os
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = int(os.getenv('PUBLIC_LIST_DEFAULT_LIMIT', '50'))
+MAX_LIMIT = int(os.getenv('PUBLIC_LIST_MAX_LIMIT', '200'))
+LEGACY_UNPAGINATED = os.getenv('PUBLIC_LIST_LEGACY_UNPAGINATED', '1').lower() in ('1', 'true', 'yes')
+
+
+class PaginationError(ValueError):
+    """Bad `limit`, `cursor` or `fields` value (reported as HTTP 400)."""
+
+
+class PageRequest:
+    def __init__(self, limit=None, after=None, fields=None):
+        self.limit = limit
+        self.after = after
+        self.fields = fields
+
+    @property
+    def paginated(self):
+        return self.limit is not None
+
+
+def encode_cursor(*values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise PaginationError('invalid cursor')
+    if not isinstance(values, list) or not values or not isinstance(values[-1], int):
+        raise PaginationError('invalid cursor')
+    return values
+
+
+def parse_page_args(args, allowed_fields):
+    """Read `limit`, `cursor` and `fields` from `args` (a request.args)."""
+    limit_raw = args.get('limit')
+    cursor_raw = args.get('cursor')
+    if limit_raw is None and cursor_raw is None:
+        limit = None if LEGACY_UNPAGINATED else DEFAULT_LIMIT
+    elif limit_raw is None:
+        limit = DEFAULT_LIMIT
+    else:
+        try:
+            limit = int(limit_raw)
+        except (TypeError, ValueError):
+            raise PaginationError('limit must be an integer')
+        if limit < 1:
+            raise PaginationError('limit must be >= 1')
+        limit = min(limit, MAX_LIMIT)
+
+    after = decode_cursor(cursor_raw) if cursor_raw else None
+
+    fields = None
+    fields_raw = args.get('fields')
+    if fields_raw:
+        fields = []
+        for name in fields_raw.split(','):
+            name = name.strip()
+            if not name or name in fields:
+                continue
+            if name not in allowed_fields:
+                raise PaginationError(f'unknown field: {name}')
+            fields.append(name)
+    return PageRequest(limit=limit, after=after, fields=fields)
+
+
+def apply_keyset(stmt, page, id_col, sort_col=None):
+    """Order `stmt` newest-first and, with a cursor, start after it.
+
+    Ordering is `sort_col DESC NULLS LAST, id_col DESC` (or `id_col DESC`
+    alone). NULLS LAST is explicit so SQLite and Postgres agree on where rows
+    without `creado_en` fall.
+    """
+    if sort_col is None:
+        stmt = stmt.order_by(id_col.desc())
+        if page.after is not None:
+            stmt = stmt.where(id_col < page.after[-1])
+    else:
+        stmt = stmt.order_by(sort_col.desc().nulls_last(), id_col.desc())
+        if page.after is not None:
+            if len(page.after) != 2:
+                raise PaginationError('invalid cursor')
+            sort_val, last_id = page.after
+            if sort_val is None:
+                stmt = stmt.where(and_(sort_col.is_(None), id_col < last_id))
+            else:
+                try:
+                    sort_val = datetime.fromisoformat(sort_val)
+                except (TypeError, ValueError):
+                    raise PaginationError('invalid cursor')
+                stmt = stmt.where(or_(
+                    sort_col < sort_val,
+                    and_(sort_col == sort_val, id_col < last_id),
+                    sort_col.is_(None),
+                ))
+    if page.limit is not None:
+        # one extra row tells us whether there is a next page
+        stmt = stmt.limit(page.limit + 1)
+    return stmt
+
+
+def stream_json_array(items, headers=None):
+    """Serialize an iterable of dicts as a JSON array, one element at a time.
+
+    Elements are encoded with `app.json` (same options as `jsonify`) while the
+    cursor is read, without building the whole list in memory.
+    """
+    def generate():
+        yield '['
+        first = True
+        for item in items:
+            if not first:
+                yield ','
+            first = False
+            yield current_app.json.dumps(item, separators=(',', ':'))
+        yield ']'
+    return Response(stream_with_context(generate()), status=200, mimetype='application/json', headers=headers)
+
+
+def page_response(rows, page, serialize):
+    """Build the listing response for `rows` (result of an `apply_keyset` stmt
+    whose columns came from `project`).
+
+    Unpaginated requests are streamed; paginated ones get `X-Next-Cursor` and
+    `Link` headers when more rows exist.
+    """
+    if not page.paginated:
+        return stream_json_array(serialize(r) for r in rows)
+    rows = list(rows)
+    has_more = len(rows) > page.limit
+    rows = rows[:page.limit]
+    resp = jsonify([serialize(r) for r in rows])
+    if has_more and rows:
+        last = rows[-1]._mapping
+        if 'keyset_sort' in last:
+            token = encode_cursor(last['keyset_sort'], last['keyset_id'])
+        else:
+            token = encode_cursor(last['keyset_id'])
+        args = [(k, v) for k, v in request.args.items(multi=True) if k != 'cursor']
+        args.append(('cursor', token))
+        if not any(k == 'limit' for k, _ in args):
+            args.append(('limit', str(page.limit)))
+        resp.headers['X-Next-Cursor'] = token
+        resp.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return resp
+
+
+def project(columns, fields, id_col, sort_col=None):
+    """Columns to SELECT for `fields` (every key of `columns` when None).
+
+    `columns` maps response key -> column expression. The keyset columns are
+    always added (as `keyset_id`/`keyset_sort`) so the cursor can be built
+    even when they are not requested.
+    """
+    keys = list(columns) if fields is None else list(fields)
+    selected = [columns[k].label(k) for k in keys]
+    selected.append(id_col.label('keyset_id'))
+    if sort_col is not None:
+        selected.append(sort_col.label('keyset_sort'))
+    return keys, selected
+
+
+def row_serializer(keys):
+    """Row -> dict for the projected `keys`; datetimes become ISO strings."""
+    def serialize(row):
+        m = row._mapping
+        out = {}
+        for k in keys:
+            v = m[k]
+            out[k] = v.isoformat() if isinstance(v, datetime) else v
+        return out
+    return serialize
@@ -0,0 +1,167 @@
+"""Password hashing with a configurable algorithm and cost.
+
+Every place that stores or checks a password (register, login, reset,
+change/set password, admin seed and admin-created users, manage create_user)
+goes through here instead of calling werkzeug with its defaults.
+
+Settings, read once at import:
+
+- PASSWORD_HASH_METHOD: ``scrypt`` (default) or ``pbkdf2[:hash_name]``. A
+  full werkzeug spec such as ``scrypt:16384:8:1`` or
+  ``pbkdf2:sha256:600000`` is accepted too.
+- PASSWORD_HASH_COST: scrypt N (CPU/memory cost, power of two) or PBKDF2
+  iterations. Overrides the cost inside PASSWORD_HASH_METHOD; empty keeps
+  werkzeug's default.
+- PASSWORD_SALT_LENGTH: salt characters (default 16).
+
+Stored hashes keep their parameters in the prefix (``method$salt$hash``), so
+old hashes still verify after the settings change. `needs_rehash()` tells
+whether a stored hash was made with other parameters; login uses it to
+rehash with the password it just verified, so the cost can be tuned
+without forcing resets. `scripts/bench_password_hash.py` reports
+hashes/sec per core for candidate settings.
+
+Pool de procesos (opcional). With PASSWORD_HASH_POOL=N > 0, hashing and
+verification run in a per-process pool of N worker processes instead of the
+request thread:
+
+- PASSWORD_HASH_QUEUE_MAX (default 2 x N): hash jobs allowed to wait on top
+  of the N running ones. When that is full the call raises
+  `PasswordHashBusy` right away; the app answers 503 with Retry-After
+  instead of piling requests up behind a login storm.
+- PASSWORD_HASH_TIMEOUT (default 10 s): longest wait for a result; a
+  timeout is treated as busy too.
+- PASSWORD_HASH_RETRY_AFTER (default 1 s): value sent in Retry-After.
+
+The pool caps the CPU a gunicorn worker spends on hashes at N cores. It
+assumes threaded workers, which is how the app is deployed (gthread, see
+render.yaml and README_DEPLOY.md): the other threads keep serving the
+catalogue while a login waits on its hash
+(`scripts/loadtest_login_flood.py`). Under sync workers the pool only makes
+floods fail fast. The login still holds its worker for the whole hash. The
+pool is created lazily in each worker process (never inherited across a
+fork) and its children only import werkzeug.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+SCRYPT_DEFAULT = (2 ** 15, 8, 1)
+
+
+def method_string(method='scrypt', cost=None):
+    """Spec completa de werkzeug, p. ej. 'scrypt:32768:8:1' o 'pbkdf2:sha256:600000'."""
+    parts = (method or 'scrypt').strip().lower().split(':')
+    if parts[0] == 'scrypt':
+        given = parts[1:4]
+        n, r, p = given + list(SCRYPT_DEFAULT[len(given):])
+        return f'scrypt:{int(cost or n)}:{int(r)}:{int(p)}'
+    if parts[0] == 'pbkdf2':
+        hash_name = parts[1] if len(parts) > 1 and parts[1] else 'sha256'
+        iterations = cost or (parts[2] if len(parts) > 2 else DEFAULT_PBKDF2_ITERATIONS)
+        return f'pbkdf2:{hash_name}:{int(iterations)}'
+    raise ValueError(f'unsupported password hash method: {method!r}')
+
+
+HASH_METHOD = method_string(os.getenv('PASSWORD_HASH_METHOD', 'scrypt'), os.getenv('PASSWORD_HASH_COST') or None)
+SALT_LENGTH = int(os.getenv('PASSWORD_SALT_LENGTH', '16'))
+
+
+class PasswordHashBusy(Exception):
+    """El pool de hashing está lleno (o no respondió a tiempo)."""
+
+    def __init__(self, retry_after=1):
+        super().__init__('password hashing busy')
+        self.retry_after = retry_after
+
+
+class HashPool:
+    """ProcessPoolExecutor con un límite de trabajos en vuelo."""
+
+    def __init__(self, workers, queue_max=None, timeout=10.0, retry_after=1):
+        self.workers = int(workers)
+        self.queue_max = self.workers * 2 if queue_max is None else int(queue_max)
+        self.timeout = float(timeout)
+        self.retry_after = int(retry_after)
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_max)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # forkserver: los hijos no heredan hilos ni locks del worker web
+                methods = multiprocessing.get_all_start_methods()
+                ctx = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+                self._pid = os.getpid()
+            return self._executor
+
+    def run(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashBusy(self.retry_after)
+        try:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        # el cupo se libera cuando el trabajo termina, aunque el caller ya no espere
+        future.add_done_callback(lambda _f: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise PasswordHashBusy(self.retry_after) from None
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+def build_pool_from_env():
+    workers = int(os.getenv('PASSWORD_HASH_POOL', '0'))
+    if workers <= 0:
+        return None
+    queue_max = os.getenv('PASSWORD_HASH_QUEUE_MAX')
+    return HashPool(workers, queue_max=int(queue_max) if queue_max else None,
+                    timeout=float(os.getenv('PASSWORD_HASH_TIMEOUT', '10')),
+                    retry_after=int(os.getenv('PASSWORD_HASH_RETRY_AFTER', '1')))
+
+
+hash_pool = build_pool_from_env()
+
+
+def _call(fn, *args, **kwargs):
+    if hash_pool is None:
+        return fn(*args, **kwargs)
+    return hash_pool.run(fn, *args, **kwargs)
+
+
+def hash_password(password):
+    """Hash con los parámetros configurados. Con pool puede lanzar PasswordHashBusy."""
+    return _call(generate_password_hash, password, method=HASH_METHOD, salt_length=SALT_LENGTH)
+
+
+def verify_password(stored, password):
+    """True si `password` corresponde al hash guardado (con sus propios parámetros)."""
+    if not stored or not password:
+        return False
+    try:
+        return _call(check_password_hash, stored, password)
+    except (ValueError, TypeError):
+        # hash con un formato/método que werkzeug no reconoce
+        return False
+
+
+def needs_rehash(stored):
+    """True si el hash guardado no usa el método, coste y largo de sal configurados."""
+    if not stored or stored.count('$') < 2:
+        return False
+    method, salt, _ = stored.split('$', 2)
+    return method != HASH_METHOD or len(salt) != SALT_LENGTH
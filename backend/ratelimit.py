@@ -0,0 +1,355 @@
+"""Login lockout and per-route rate limits, kept outside `usuarios`.
+
+Failed logins are counted per key in a sliding window: once a key has
+LOGIN_LOCKOUT_MAX_FAILURES failures within LOGIN_LOCKOUT_WINDOW seconds,
+further attempts are refused with 429 until the oldest failure leaves the
+window. Nothing is written to the database, so a successful login for an
+account with no recent failures is read-only.
+
+The key is the normalized email plus the client IP (`key_for(email, ip)`).
+Keyed on the email alone, anyone could keep any account (the admin's
+included) locked out by sending a few bad passwords every window; now the
+lockout only blocks the address that produced the failures. Guessing one
+password from many addresses is bounded by the per-email rate limit below.
+
+Stores (LOGIN_LOCKOUT_BACKEND):
+
+- ``memory`` (default): per-process, bounded LRU of keys. Under gunicorn each
+  worker counts separately, so the effective limit is max_failures x workers.
+- ``sqlite``: a local SQLite file (LOGIN_LOCKOUT_PATH) shared by the workers
+  on the host.
+- ``off``: no lockout.
+
+Rate limits (token bucket). `RateLimiter` throttles /api/usuarios/login,
+/forgot and /google_signin before any password hash or Google token
+verification runs. Each route has a list of limits ``scope:count/seconds``:
+a bucket holds up to `count` tokens and refills at count/seconds per second,
+one token per request. Scopes are ``ip`` and ``email`` (google_signin only
+knows the email after verifying the token, so only its ``ip`` limits apply).
+A request that finds an empty bucket gets 429 with Retry-After. All the
+buckets of a request are checked before any token is taken, so a request
+refused by one bucket (say its email's) does not drain the others (its IP's).
+
+- RATE_LIMIT_BACKEND: ``memory`` (default), ``sqlite`` (shared by the
+  workers on the host, RATE_LIMIT_PATH) or ``off``.
+- RATE_LIMIT_<ROUTE> (LOGIN, FORGOT, GOOGLE_SIGNIN): e.g.
+  ``ip:30/60,email:10/60``; empty or ``off`` disables that route.
+- RATE_LIMIT_PROXY_HOPS: trusted proxies in front of the app (X-Forwarded-For
+  entries to skip from the right); 0 uses the socket address. Behind a
+  proxy (Render, see render.yaml) it must be 1, or every client shares the
+  proxy's address: one IP bucket for the whole site, and lockout keys that
+  only differ by email.
+
+Both SQLite stores delete expired rows on write, every `prune_every` writes
+(failures older than the window, buckets idle long enough to be full
+again), so keys chosen by clients (IPs, emails) don't grow the files
+without bound. The memory stores are bounded by `max_keys`.
+
+`scripts/bench_rate_limit.py` measures the per-request cost of each store.
+"""
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+PRUNE_EVERY = 256
+
+
+class MemoryAttemptStore:
+    name = 'memory'
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = int(max_keys)
+        self._failures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _window(self, key, cutoff):
+        stamps = self._failures.get(key)
+        if stamps is None:
+            return None
+        while stamps and stamps[0] <= cutoff:
+            stamps.popleft()
+        if not stamps:
+            del self._failures[key]
+            return None
+        return stamps
+
+    def failures(self, key, window, now):
+        """(failures inside the window, timestamp of the oldest one)."""
+        with self._lock:
+            stamps = self._window(key, now - window)
+            return (len(stamps), stamps[0]) if stamps else (0, None)
+
+    def add(self, key, window, now):
+        with self._lock:
+            stamps = self._window(key, now - window)
+            if stamps is None:
+                stamps = self._failures[key] = deque()
+            stamps.append(now)
+            self._failures.move_to_end(key)
+            while len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+            return len(stamps), stamps[0]
+
+    def reset(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._failures.clear()
+
+
+class _SQLiteFile:
+    """Una conexión por hilo a un archivo SQLite local en modo WAL."""
+
+    def __init__(self, path, prune_every=PRUNE_EVERY):
+        self.path = path
+        self.prune_every = int(prune_every)
+        self._writes = itertools.count(1)
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _due_for_prune(self):
+        """True una de cada `prune_every` escrituras de este proceso."""
+        return self.prune_every > 0 and next(self._writes) % self.prune_every == 0
+
+
+class SQLiteAttemptStore(_SQLiteFile):
+    """Failure timestamps shared by the worker processes of one host."""
+
+    name = 'sqlite'
+
+    def __init__(self, path, prune_every=PRUNE_EVERY):
+        super().__init__(path, prune_every)
+        conn = self._conn()
+        conn.execute('CREATE TABLE IF NOT EXISTS login_failures (key TEXT NOT NULL, ts REAL NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_login_failures_key_ts ON login_failures (key, ts)')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_login_failures_ts ON login_failures (ts)')
+
+    def failures(self, key, window, now):
+        row = self._conn().execute('SELECT COUNT(*), MIN(ts) FROM login_failures WHERE key = ? AND ts > ?',
+                                   (key, now - window)).fetchone()
+        return row[0], row[1]
+
+    def add(self, key, window, now):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if self._due_for_prune():
+                # fallos vencidos de todas las claves, no sólo de ésta
+                conn.execute('DELETE FROM login_failures WHERE ts <= ?', (now - window,))
+            else:
+                conn.execute('DELETE FROM login_failures WHERE key = ? AND ts <= ?', (key, now - window))
+            conn.execute('INSERT INTO login_failures (key, ts) VALUES (?, ?)', (key, now))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return self.failures(key, window, now)
+
+    def reset(self, key):
+        self._conn().execute('DELETE FROM login_failures WHERE key = ?', (key,))
+
+    def clear(self):
+        self._conn().execute('DELETE FROM login_failures')
+
+
+class LoginLockout:
+    def __init__(self, store=None, max_failures=10, window=900):
+        self.store = store
+        self.max_failures = int(max_failures)
+        self.window = float(window)
+        self.enabled = store is not None and self.max_failures > 0
+
+    @staticmethod
+    def key_for(email, ip=None):
+        """Email normalizado, seguido de `|ip` si se conoce la IP del cliente."""
+        email = (email or '').strip().lower()
+        return f'{email}|{ip}' if ip else email
+
+    def retry_after(self, key, now=None):
+        """Seconds until `key` may try again; 0 when it is not locked."""
+        if not self.enabled:
+            return 0
+        now = time.time() if now is None else now
+        count, oldest = self.store.failures(key, self.window, now)
+        if count < self.max_failures:
+            return 0
+        return max(1, int(oldest + self.window - now + 0.999))
+
+    def register_failure(self, key, now=None):
+        if self.enabled:
+            self.store.add(key, self.window, time.time() if now is None else now)
+
+    def register_success(self, key, now=None):
+        # sólo escribe si había fallos recientes
+        if self.enabled and self.store.failures(key, self.window, time.time() if now is None else now)[0]:
+            self.store.reset(key)
+
+
+def build_lockout_from_env():
+    backend_name = os.getenv('LOGIN_LOCKOUT_BACKEND', 'memory').lower()
+    max_failures = int(os.getenv('LOGIN_LOCKOUT_MAX_FAILURES', '10'))
+    window = float(os.getenv('LOGIN_LOCKOUT_WINDOW', '900'))
+    if backend_name == 'sqlite':
+        default_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'login_lockout.sqlite')
+        store = SQLiteAttemptStore(os.getenv('LOGIN_LOCKOUT_PATH', default_path))
+    elif backend_name in ('off', 'none', '0', 'false'):
+        store = None
+    else:
+        store = MemoryAttemptStore()
+    return LoginLockout(store, max_failures=max_failures, window=window)
+
+
+class MemoryBucketStore:
+    name = 'memory'
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = int(max_keys)
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now):
+        """Consume un token; devuelve 0 si había, o los segundos hasta que haya uno."""
+        return self.take_all([(key, rate, burst)], now)
+
+    def take_all(self, buckets, now):
+        """Como `take` sobre [(key, rate, burst)]: consume sólo si todos tienen token; si no, la mayor espera."""
+        with self._lock:
+            levels = [(key, min(burst, tokens + (now - last) * rate), rate)
+                      for key, rate, burst in buckets
+                      for tokens, last in [self._buckets.get(key, (burst, now))]]
+            wait = max([(1 - tokens) / rate for _, tokens, rate in levels if tokens < 1], default=0.0)
+            for key, tokens, _ in levels:
+                self._buckets[key] = (tokens if wait else tokens - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBucketStore(_SQLiteFile):
+    """Buckets compartidos por los workers de un host (misma lógica que en memoria)."""
+
+    name = 'sqlite'
+
+    def __init__(self, path, prune_every=PRUNE_EVERY):
+        super().__init__(path, prune_every)
+        # tiempo máximo que tarda en llenarse un bucket vacío (burst / rate) entre las reglas vistas
+        self._refill = 0.0
+        conn = self._conn()
+        conn.execute('CREATE TABLE IF NOT EXISTS rate_buckets '
+                     '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, ts REAL NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_rate_buckets_ts ON rate_buckets (ts)')
+
+    def take(self, key, rate, burst, now):
+        return self.take_all([(key, rate, burst)], now)
+
+    def take_all(self, buckets, now):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            levels = []
+            for key, rate, burst in buckets:
+                row = conn.execute('SELECT tokens, ts FROM rate_buckets WHERE key = ?', (key,)).fetchone()
+                levels.append((key, burst if row is None else min(burst, row[0] + (now - row[1]) * rate), rate))
+                self._refill = max(self._refill, burst / rate)
+            wait = max([(1 - tokens) / rate for _, tokens, rate in levels if tokens < 1], default=0.0)
+            conn.executemany('INSERT INTO rate_buckets (key, tokens, ts) VALUES (?, ?, ?) '
+                             'ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, ts = excluded.ts',
+                             [(key, tokens if wait else tokens - 1, now) for key, tokens, _ in levels])
+            if self._due_for_prune():
+                # un bucket sin uso durante un llenado completo equivale a no tener fila
+                conn.execute('DELETE FROM rate_buckets WHERE ts < ?', (now - self._refill,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def prune(self, older_than):
+        """Borra buckets sin uso desde `older_than` (ya estarían llenos)."""
+        self._conn().execute('DELETE FROM rate_buckets WHERE ts < ?', (older_than,))
+
+    def clear(self):
+        self._conn().execute('DELETE FROM rate_buckets')
+
+
+class Limit:
+    def __init__(self, scope, count, seconds):
+        if scope not in ('ip', 'email'):
+            raise ValueError(f'unknown rate limit scope: {scope!r}')
+        self.scope = scope
+        self.burst = float(count)
+        self.rate = float(count) / float(seconds)
+
+    @classmethod
+    def parse_list(cls, spec):
+        """'ip:30/60,email:10/60' -> [Limit, Limit]; '' u 'off' -> []."""
+        limits = []
+        for part in (spec or '').split(','):
+            part = part.strip()
+            if not part or part.lower() == 'off':
+                continue
+            scope, _, rule = part.partition(':')
+            count, _, seconds = rule.partition('/')
+            limits.append(cls(scope.strip().lower(), int(count), float(seconds or 1)))
+        return limits
+
+
+class RateLimiter:
+    def __init__(self, store=None, rules=None):
+        self.store = store
+        self.rules = {route: limits for route, limits in (rules or {}).items() if limits}
+        self.enabled = store is not None and bool(self.rules)
+
+    def check(self, route, ip=None, email=None, now=None):
+        """Segundos de espera (entero >= 1) si algún bucket de la ruta está vacío; si no, 0."""
+        limits = self.rules.get(route) if self.enabled else None
+        if not limits:
+            return 0
+        now = time.time() if now is None else now
+        values = {'ip': ip, 'email': LoginLockout.key_for(email) if email else None}
+        buckets = [(f'{route}:{limit.scope}:{values[limit.scope]}', limit.rate, limit.burst)
+                   for limit in limits if values[limit.scope]]
+        wait = self.store.take_all(buckets, now) if buckets else 0.0
+        return max(1, int(wait + 0.999)) if wait else 0
+
+
+RATE_LIMIT_DEFAULTS = {
+    'login': 'ip:30/60,email:10/60',
+    'forgot': 'ip:5/60,email:3/300',
+    'google_signin': 'ip:30/60',
+}
+
+
+def build_rate_limiter_from_env():
+    backend_name = os.getenv('RATE_LIMIT_BACKEND', 'memory').lower()
+    rules = {route: Limit.parse_list(os.getenv(f'RATE_LIMIT_{route.upper()}', default))
+             for route, default in RATE_LIMIT_DEFAULTS.items()}
+    if backend_name == 'sqlite':
+        default_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'rate_limit.sqlite')
+        store = SQLiteBucketStore(os.getenv('RATE_LIMIT_PATH', default_path))
+    elif backend_name in ('off', 'none', '0', 'false'):
+        store = None
+    else:
+        store = MemoryBucketStore()
+    return RateLimiter(store, rules)
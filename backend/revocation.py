@@ -0,0 +1,270 @@
+"""In-process cache for JWT revocation checks.
+
+`jwt_required` used to run one `SELECT ... FROM revoked_tokens` per
+authenticated request even though revocations are rare (only
+`/api/usuarios/logout` creates them). This module keeps two bounded
+structures per worker process:
+
+- a set of jtis known to be revoked (filled on logout and on DB hits), and
+- a negative-lookup LRU of jtis confirmed *not* revoked, each entry living
+  at most `negative_ttl` seconds and never past the token's own `exp`.
+
+Only a miss in both structures reaches the database.
+
+Across gunicorn workers, `RevocationIndex` keeps a Bloom filter of every jti
+in `revoked_tokens`, refreshed incrementally from a `revoked_at` watermark;
+a jti the filter has never seen is known not to be revoked without a query.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+
+class RevocationCache:
+    def __init__(self, max_revoked=10000, max_negative=50000, negative_ttl=3600, enabled=True):
+        self.max_revoked = int(max_revoked)
+        self.max_negative = int(max_negative)
+        self.negative_ttl = int(negative_ttl)
+        self.enabled = enabled
+        self._revoked = OrderedDict()
+        self._negative = OrderedDict()
+        self._lock = threading.Lock()
+        self.revoked_hits = 0
+        self.negative_hits = 0
+        self.db_lookups = 0
+
+    def is_revoked(self, jti, lookup, exp=None):
+        """Return True if `jti` is revoked.
+
+        `lookup(jti)` is the authoritative (DB) check and is only called on a
+        cache miss. `exp` is the token's expiration as epoch seconds; negative
+        entries never outlive it.
+        """
+        if not self.enabled:
+            self.db_lookups += 1
+            return bool(lookup(jti))
+
+        now = time.time()
+        with self._lock:
+            if jti in self._revoked:
+                self._revoked.move_to_end(jti)
+                self.revoked_hits += 1
+                return True
+            expires_at = self._negative.get(jti)
+            if expires_at is not None:
+                if expires_at > now:
+                    self._negative.move_to_end(jti)
+                    self.negative_hits += 1
+                    return False
+                del self._negative[jti]
+            self.db_lookups += 1
+
+        # Query outside the lock so a slow DB doesn't serialize every request.
+        revoked = bool(lookup(jti))
+        if revoked:
+            self.mark_revoked(jti)
+        else:
+            ttl_end = now + self.negative_ttl
+            if exp is not None:
+                try:
+                    ttl_end = min(ttl_end, float(exp))
+                except (TypeError, ValueError):
+                    pass
+            with self._lock:
+                self._negative[jti] = ttl_end
+                self._negative.move_to_end(jti)
+                while len(self._negative) > self.max_negative:
+                    self._negative.popitem(last=False)
+        return revoked
+
+    def mark_revoked(self, jti):
+        """Record a revocation made by this process (e.g. on logout)."""
+        if not jti:
+            return
+        with self._lock:
+            self._negative.pop(jti, None)
+            self._revoked[jti] = True
+            self._revoked.move_to_end(jti)
+            while len(self._revoked) > self.max_revoked:
+                self._revoked.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+            self._negative.clear()
+            self.revoked_hits = self.negative_hits = self.db_lookups = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'revoked_size': len(self._revoked),
+                'negative_size': len(self._negative),
+                'revoked_hits': self.revoked_hits,
+                'negative_hits': self.negative_hits,
+                'db_lookups': self.db_lookups,
+            }
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on blake2b)."""
+
+    def __init__(self, capacity=1024, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(64, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationIndex:
+    """Per-worker Bloom filter of revoked jtis, refreshed from `revoked_tokens`.
+
+    `loader(since)` returns `(jti, revoked_at)` rows with `revoked_at >= since`
+    (all rows when `since` is None). Refreshes are lazy: `maybe_refresh()` is
+    called from `jwt_required` and, once `refresh_interval` has passed, one
+    thread fetches only the rows newer than the watermark (minus a small
+    `overlap` for transactions that committed late). The filter is rebuilt
+    from scratch every `rebuild_interval` seconds and after each purge so rows
+    deleted by the sweeper drop out and the false-positive rate stays low.
+
+    `purge()` (optional) deletes expired rows; it runs every `purge_interval`
+    seconds (0 disables it). `on_revoked(jti)` is called for rows first seen by
+    an incremental refresh so the in-process RevocationCache drops any stale
+    negative entry for tokens revoked by another worker.
+
+    Until the first successful build `might_contain` answers True, i.e. every
+    check falls through to the database.
+    """
+
+    def __init__(self, loader, purge=None, refresh_interval=30, rebuild_interval=3600,
+                 purge_interval=3600, error_rate=0.01, overlap=5, on_revoked=None, enabled=True):
+        self.loader = loader
+        self.purge = purge
+        self.refresh_interval = float(refresh_interval)
+        self.rebuild_interval = float(rebuild_interval)
+        self.purge_interval = float(purge_interval)
+        self.error_rate = error_rate
+        self.overlap = timedelta(seconds=overlap)
+        self.on_revoked = on_revoked
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._bloom = None
+        self._watermark = None
+        self._last_refresh = 0.0
+        self._last_rebuild = 0.0
+        self._last_purge = time.time()
+        self.rebuilds = 0
+        self.refreshes = 0
+        self.purged = 0
+
+    @property
+    def ready(self):
+        return self._bloom is not None
+
+    def might_contain(self, jti):
+        bloom = self._bloom
+        if bloom is None:
+            return True
+        return jti in bloom
+
+    def add(self, jti):
+        """Record a revocation made by this process (e.g. on logout)."""
+        bloom = self._bloom
+        if bloom is not None and jti:
+            bloom.add(jti)
+
+    def maybe_refresh(self):
+        if not self.enabled:
+            return
+        now = time.time()
+        if now - self._last_refresh < self.refresh_interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return  # another thread is already refreshing
+        try:
+            self._last_refresh = now
+            if self.purge is not None and self.purge_interval > 0 and now - self._last_purge >= self.purge_interval:
+                self._last_purge = now
+                self.purged += self.purge() or 0
+                self._rebuild(now)
+            elif self._bloom is None or now - self._last_rebuild >= self.rebuild_interval:
+                self._rebuild(now)
+            else:
+                self._refresh()
+        finally:
+            self._lock.release()
+
+    def rebuild(self):
+        with self._lock:
+            self._rebuild(time.time())
+
+    def _rebuild(self, now):
+        rows = list(self.loader(None))
+        bloom = BloomFilter(capacity=max(1024, len(rows) * 2), error_rate=self.error_rate)
+        previous = self._watermark
+        watermark = None
+        for jti, revoked_at in rows:
+            bloom.add(jti)
+            if revoked_at is not None:
+                if watermark is None or revoked_at > watermark:
+                    watermark = revoked_at
+                if previous is not None and self.on_revoked and revoked_at >= previous - self.overlap:
+                    self.on_revoked(jti)
+        self._bloom = bloom
+        self._watermark = watermark
+        self._last_rebuild = now
+        self.rebuilds += 1
+
+    def _refresh(self):
+        since = self._watermark - self.overlap if self._watermark is not None else None
+        rows = list(self.loader(since))
+        bloom = self._bloom
+        for jti, revoked_at in rows:
+            # overlap re-reads recent rows; don't count them twice
+            if jti not in bloom:
+                bloom.add(jti)
+            if self.on_revoked:
+                self.on_revoked(jti)
+            if revoked_at is not None and (self._watermark is None or revoked_at > self._watermark):
+                self._watermark = revoked_at
+        self.refreshes += 1
+        if bloom.count > bloom.capacity:
+            # filter is past its sizing; rebuild so the error rate holds
+            self._rebuild(time.time())
+
+    def stats(self):
+        bloom = self._bloom
+        return {
+            'enabled': self.enabled,
+            'ready': bloom is not None,
+            'entries': bloom.count if bloom is not None else 0,
+            'bits': bloom.num_bits if bloom is not None else 0,
+            'watermark': self._watermark.isoformat() if self._watermark is not None else None,
+            'rebuilds': self.rebuilds,
+            'refreshes': self.refreshes,
+            'purged': self.purged,
+        }
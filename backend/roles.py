@@ -0,0 +1,73 @@
+"""Resolve a usuario's roles in a single query.
+
+A usuario's roles come from the rows it owns: `entrenadores` and/or
+`clientes` (one each at most, usuario_id is unique), plus the admin account,
+identified by ADMIN_EMAIL. That email is read once at import. Everything that
+derives a role (login, Google sign-in, admin user list, profile, set_role)
+goes through here so they agree on the precedence:
+admin > entrenador > cliente > usuario.
+
+Only `entrenadores.id` / `clientes.id` are selected, so deployments with
+missing optional columns on those tables still work.
+"""
+import os
+
+from database.database import Cliente, Entrenador, Usuario
+
+ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@test.local')
+
+
+class UserRoles:
+    def __init__(self, is_admin=False, entrenador_id=None, cliente_id=None):
+        self.is_admin = is_admin
+        self.entrenador_id = entrenador_id
+        self.cliente_id = cliente_id
+
+    @property
+    def roles(self):
+        """Lista de roles, p. ej. ['admin', 'entrenador', 'cliente']."""
+        out = ['admin'] if self.is_admin else []
+        if self.entrenador_id is not None:
+            out.append('entrenador')
+        if self.cliente_id is not None:
+            out.append('cliente')
+        return out
+
+    def primary(self, prefer=None):
+        """Rol que va en el token. `prefer` gana si el usuario lo tiene (salvo admin)."""
+        if self.is_admin:
+            return 'admin'
+        if prefer in self.roles:
+            return prefer
+        return (self.roles or ['usuario'])[0]
+
+
+def _roles_query(session):
+    return (
+        session.query(Usuario, Entrenador.id, Cliente.id)
+        .outerjoin(Entrenador, Entrenador.usuario_id == Usuario.id)
+        .outerjoin(Cliente, Cliente.usuario_id == Usuario.id)
+    )
+
+
+def _to_roles(user, entrenador_id, cliente_id):
+    return UserRoles(is_admin=user.email == ADMIN_EMAIL, entrenador_id=entrenador_id, cliente_id=cliente_id)
+
+
+def user_with_roles(session, usuario_id=None, email=None):
+    """(Usuario, UserRoles) por id o email, o (None, None) si no existe."""
+    query = _roles_query(session)
+    query = query.filter(Usuario.id == usuario_id) if usuario_id is not None else query.filter(Usuario.email == email)
+    row = query.first()
+    if row is None:
+        return None, None
+    user, entrenador_id, cliente_id = row
+    return user, _to_roles(user, entrenador_id, cliente_id)
+
+
+def users_with_roles(session, order_by=None):
+    """[(Usuario, UserRoles)] para todos los usuarios, en una consulta."""
+    query = _roles_query(session)
+    if order_by is not None:
+        query = query.order_by(order_by)
+    return [(user, _to_roles(user, ent_id, cli_id)) for user, ent_id, cli_id in query.all()]
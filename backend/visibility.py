@@ -0,0 +1,38 @@
+"""Public visibility of content by owner, resolved in SQL.
+
+A trainer, and their rutinas and planes, show up in public listings only
+while the owning usuario is active (NULL counts as active, as in rows from
+before the column existed) and is not the admin account (ADMIN_EMAIL, see
+backend/roles.py). The trainer listings (/api/entrenadores,
+/api/public/entrenadores) and the source query of catalogo_publico
+(backend/catalogo.py, read by /api/rutinas/public and /api/planes) build
+their SELECT through here, so hidden rows are filtered by the database
+instead of being fetched and dropped, and every listing agrees on who is
+visible.
+"""
+from database.database import Entrenador, Usuario
+from sqlalchemy import and_, or_
+
+from backend.roles import ADMIN_EMAIL
+
+
+def owner_visible():
+    """Predicate on `usuarios`: active (or NULL) and not the admin account."""
+    return and_(
+        or_(Usuario.activo.is_(None), Usuario.activo == True),  # noqa: E712
+        Usuario.email != ADMIN_EMAIL,
+    )
+
+
+def visible_entrenadores(stmt):
+    """`stmt` (already selecting from entrenadores) joined to usuarios and filtered."""
+    return stmt.join(Usuario, Usuario.id == Entrenador.usuario_id).where(owner_visible())
+
+
+def visible_content(stmt, entrenador_fk):
+    """`stmt` over rutinas/planes, joined to their visible entrenador and usuario.
+
+    `entrenador_fk` is the content's FK column, e.g. Rutina.entrenador_id.
+    The inner joins also drop content whose trainer or usuario is gone.
+    """
+    return visible_entrenadores(stmt.join(Entrenador, Entrenador.id == entrenador_fk))
@@ -0,0 +1,114 @@
+"""Report of rutinas/planes with their accepted clientes, in a few grouped queries.
+
+`/api/entrenador/aceptados` and `/api/admin/entrenadores/aceptados` used to
+walk every rutina and plan and look up solicitudes, clientes and usuarios one
+row at a time. Here each piece is one statement over all the trainer's (or
+all trainers') items, and the per-item lists are assembled in Python:
+
+- rutinas / planes of the trainer(s), newest first, with their counters
+  from `content_stats` (database/content_stats.py)
+- accepted solicitudes joined to cliente + usuario, ordered by solicitud id
+- admin only: cliente_rutina rows joined to usuario
+
+The query count is constant no matter how many trainers, items or clients.
+"""
+from collections import defaultdict
+
+from sqlalchemy import and_, func, select
+
+from database.database import (Cliente, ClienteRutina, ContentStats, Entrenador, PlanAlimenticio,
+                               Rutina, SolicitudPlan, Usuario)
+
+
+def _scoped(stmt, owner_col, entrenador_id):
+    return stmt if entrenador_id is None else stmt.where(owner_col == entrenador_id)
+
+
+def _items(session, model, tipo, entrenador_id, *extra):
+    counters = [func.coalesce(getattr(ContentStats, c), 0)
+                for c in ('accepted_count', 'saved_count', 'pending_count')]
+    stmt = (
+        select(model.id, model.entrenador_id, model.nombre, *counters, *extra)
+        .outerjoin(ContentStats, and_(ContentStats.tipo == tipo, ContentStats.content_id == model.id))
+        .order_by(model.creado_en.desc(), model.id.desc())
+    )
+    return session.execute(_scoped(stmt, model.entrenador_id, entrenador_id)).all()
+
+
+def _accepted(session, fk_col, model, entrenador_id):
+    """{item_id: [(cliente_id, usuario_id, nombre), ...]} for estado='aceptado'."""
+    stmt = (
+        select(fk_col, Cliente.id, Usuario.id, Usuario.nombre)
+        .select_from(SolicitudPlan)
+        .join(model, model.id == fk_col)
+        .outerjoin(Cliente, Cliente.id == SolicitudPlan.cliente_id)
+        .outerjoin(Usuario, Usuario.id == Cliente.usuario_id)
+        .where(SolicitudPlan.estado == 'aceptado')
+        .order_by(SolicitudPlan.id)
+    )
+    grouped = defaultdict(list)
+    for item_id, cliente_id, usuario_id, nombre in session.execute(_scoped(stmt, model.entrenador_id, entrenador_id)):
+        grouped[item_id].append((cliente_id, usuario_id, nombre))
+    return grouped
+
+
+def _saved_users(session, entrenador_id):
+    """{rutina_id: [users that saved it]}."""
+    stmt = (
+        select(ClienteRutina.rutina_id, ClienteRutina.cliente_id, Usuario.id, Usuario.nombre)
+        .join(Rutina, Rutina.id == ClienteRutina.rutina_id)
+        .outerjoin(Cliente, Cliente.id == ClienteRutina.cliente_id)
+        .outerjoin(Usuario, Usuario.id == Cliente.usuario_id)
+    )
+    grouped = defaultdict(list)
+    for rutina_id, cliente_id, usuario_id, nombre in session.execute(_scoped(stmt, Rutina.entrenador_id, entrenador_id)):
+        if usuario_id is not None:
+            grouped[rutina_id].append({'cliente_id': cliente_id, 'usuario_id': usuario_id, 'nombre': nombre})
+    return grouped
+
+
+def _clients(rows, skip_missing):
+    return [
+        {'cliente_id': cliente_id, 'usuario_id': usuario_id, 'nombre': nombre}
+        for cliente_id, usuario_id, nombre in rows
+        if not (skip_missing and cliente_id is None)
+    ]
+
+
+def aceptados_por_entrenador(session, entrenador_id=None, with_saved_users=False):
+    """{entrenador_id: {'rutinas': [...], 'planes': [...]}}.
+
+    `entrenador_id=None` covers every trainer (admin report). With
+    `with_saved_users` each rutina also lists the clientes that saved it, and
+    accepted solicitudes whose cliente no longer exists are left out of
+    `accepted_clients` (they still count in `accepted_count`), as the admin
+    report always did.
+    """
+    accepted_r = _accepted(session, SolicitudPlan.rutina_id, Rutina, entrenador_id)
+    accepted_p = _accepted(session, SolicitudPlan.plan_id, PlanAlimenticio, entrenador_id)
+    saved_users = _saved_users(session, entrenador_id) if with_saved_users else None
+
+    report = defaultdict(lambda: {'rutinas': [], 'planes': []})
+    for rid, ent_id, nombre, accepted, saved, pending, link_url in _items(
+            session, Rutina, 'rutina', entrenador_id, Rutina.link_url):
+        item = {'id': rid, 'nombre': nombre, 'accepted_count': accepted, 'pending_count': pending,
+                'accepted_clients': _clients(accepted_r.get(rid, []), with_saved_users), 'saved_count': saved}
+        if with_saved_users:
+            item['saved_users'] = saved_users.get(rid, [])
+        item['link_url'] = link_url
+        report[ent_id]['rutinas'].append(item)
+    for pid, ent_id, nombre, accepted, _saved, pending in _items(session, PlanAlimenticio, 'plan', entrenador_id):
+        report[ent_id]['planes'].append({'id': pid, 'nombre': nombre, 'accepted_count': accepted,
+                                         'pending_count': pending,
+                                         'accepted_clients': _clients(accepted_p.get(pid, []), with_saved_users)})
+    return report
+
+
+def entrenadores_con_nombre(session):
+    """(entrenador_id, usuario_id, nombre) for every trainer, by id."""
+    stmt = (
+        select(Entrenador.id, Entrenador.usuario_id, Usuario.nombre)
+        .outerjoin(Usuario, Usuario.id == Entrenador.usuario_id)
+        .order_by(Entrenador.id)
+    )
+    return session.execute(stmt).all()
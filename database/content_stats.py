@@ -0,0 +1,135 @@
+"""Contadores materializados en `content_stats` (aceptadas, guardadas, pendientes).
+
+Handlers call `bump()` / `bump_estado()` inside the same transaction as the
+solicitud or cliente_rutina change, so the counters commit or roll back with
+it. Each bump is a single upsert; deleting content drops its row with
+`forget()` in the same transaction. `rebuild()` recomputes the whole table from
+solicitudes_plan and cliente_rutina to repair drift (bulk imports, manual SQL,
+deleted content).
+"""
+from sqlalchemy import delete, func, insert, literal, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database.database import ClienteRutina, ContentStats, SolicitudPlan
+
+COUNTERS = ('accepted_count', 'saved_count', 'pending_count')
+
+# estado de una solicitud -> contador que la cuenta
+_ESTADO_COUNTER = {'aceptado': 'accepted_count', 'pendiente': 'pending_count'}
+
+
+def bump(session, tipo, content_id, **deltas):
+    """Suma `deltas` (p. ej. saved_count=1) a la fila (tipo, content_id)."""
+    deltas = {k: v for k, v in deltas.items() if v}
+    if content_id is None or not deltas:
+        return
+    unknown = set(deltas) - set(COUNTERS)
+    if unknown:
+        raise ValueError(f'unknown counters: {sorted(unknown)}')
+    values = {'tipo': tipo, 'content_id': content_id, **{c: deltas.get(c, 0) for c in COUNTERS}}
+    dialect = session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        ins = (pg_insert if dialect == 'postgresql' else sqlite_insert)(ContentStats).values(**values)
+        stmt = ins.on_conflict_do_update(
+            index_elements=['tipo', 'content_id'],
+            set_={c: getattr(ContentStats, c) + getattr(ins.excluded, c) for c in deltas},
+        )
+        session.execute(stmt)
+        return
+    # other backends: UPDATE, INSERT when there was no row yet
+    result = session.execute(
+        update(ContentStats)
+        .where(ContentStats.tipo == tipo, ContentStats.content_id == content_id)
+        .values({c: getattr(ContentStats, c) + v for c, v in deltas.items()})
+    )
+    if not result.rowcount:
+        session.execute(insert(ContentStats).values(**values))
+
+
+def bump_estado(session, solicitud, old_estado, new_estado):
+    """Move the solicitud from one counter to another when its estado changes.
+
+    `old_estado=None` is a new solicitud; `new_estado=None` a removed one.
+    """
+    if old_estado == new_estado:
+        return
+    deltas = {}
+    if old_estado in _ESTADO_COUNTER:
+        deltas[_ESTADO_COUNTER[old_estado]] = -1
+    if new_estado in _ESTADO_COUNTER:
+        deltas[_ESTADO_COUNTER[new_estado]] = deltas.get(_ESTADO_COUNTER[new_estado], 0) + 1
+    if solicitud.rutina_id is not None:
+        bump(session, 'rutina', solicitud.rutina_id, **deltas)
+    if solicitud.plan_id is not None:
+        bump(session, 'plan', solicitud.plan_id, **deltas)
+
+
+def forget(session, tipo, content_id):
+    """Delete the row of a removed content item.
+
+    SQLite reuses the highest rowid after a delete, so a leftover row would
+    hand its counters to the next rutina/plan created.
+    """
+    session.execute(delete(ContentStats).where(ContentStats.tipo == tipo, ContentStats.content_id == content_id))
+
+
+def forget_clientes(session, cliente_ids, skip_rutinas=(), skip_planes=()):
+    """Subtract the solicitudes and saves of clientes about to be deleted.
+
+    Content in `skip_rutinas` / `skip_planes` is being deleted too, so its
+    rows are left alone (they go with it).
+    """
+    skip_rutinas, skip_planes = set(skip_rutinas), set(skip_planes)
+    solicitudes = (
+        select(SolicitudPlan.rutina_id, SolicitudPlan.plan_id, SolicitudPlan.estado, func.count())
+        .where(SolicitudPlan.cliente_id.in_(cliente_ids), SolicitudPlan.estado.in_(list(_ESTADO_COUNTER)))
+        .group_by(SolicitudPlan.rutina_id, SolicitudPlan.plan_id, SolicitudPlan.estado)
+    )
+    for rutina_id, plan_id, estado, n in session.execute(solicitudes).all():
+        delta = {_ESTADO_COUNTER[estado]: -n}
+        if rutina_id is not None and rutina_id not in skip_rutinas:
+            bump(session, 'rutina', rutina_id, **delta)
+        if plan_id is not None and plan_id not in skip_planes:
+            bump(session, 'plan', plan_id, **delta)
+    saved = (
+        select(ClienteRutina.rutina_id, func.count())
+        .where(ClienteRutina.cliente_id.in_(cliente_ids))
+        .group_by(ClienteRutina.rutina_id)
+    )
+    for rutina_id, n in session.execute(saved).all():
+        if rutina_id not in skip_rutinas:
+            bump(session, 'rutina', rutina_id, saved_count=-n)
+
+
+def _solicitud_counts(tipo, fk_col):
+    return (
+        select(
+            literal(tipo).label('tipo'), fk_col.label('content_id'),
+            func.count().filter(SolicitudPlan.estado == 'aceptado').label('accepted_count'),
+            literal(0).label('saved_count'),
+            func.count().filter(SolicitudPlan.estado == 'pendiente').label('pending_count'),
+        )
+        .where(fk_col.isnot(None))
+        .group_by(fk_col)
+    )
+
+
+def rebuild(session):
+    """Recalcula content_stats desde cero; devuelve cuántas filas quedaron."""
+    saved = select(
+        literal('rutina').label('tipo'), ClienteRutina.rutina_id.label('content_id'),
+        literal(0).label('accepted_count'), func.count().label('saved_count'), literal(0).label('pending_count'),
+    ).group_by(ClienteRutina.rutina_id)
+    parts = union_all(
+        _solicitud_counts('rutina', SolicitudPlan.rutina_id),
+        _solicitud_counts('plan', SolicitudPlan.plan_id),
+        saved,
+    ).subquery()
+    totals = select(
+        parts.c.tipo, parts.c.content_id,
+        *[func.sum(getattr(parts.c, c)).label(c) for c in COUNTERS],
+    ).group_by(parts.c.tipo, parts.c.content_id)
+    session.execute(delete(ContentStats))
+    session.execute(insert(ContentStats).from_select(['tipo', 'content_id', *COUNTERS], totals))
+    return session.query(func.count()).select_from(ContentStats).scalar()
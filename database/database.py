@@ -11,7 +11,8 @@ class Usuario(db.Model):
     email = db.Column(db.String(255), unique=True, nullable=False)
     nombre = db.Column(db.String(120), nullable=False)
     hashed_password = db.Column(db.String(255), nullable=False)
-    activo = db.Column(db.Boolean, default=True)
+    # índice: filtros de usuarios activos y huella del catálogo (COUNT WHERE activo)
+    activo = db.Column(db.Boolean, default=True, index=True)
     # Número de intentos fallidos de login consecutivos
     failed_attempts = db.Column(db.Integer, default=0)
     # Si está bloqueado temporalmente, datetime hasta el que permanece bloqueado
@@ -29,7 +30,8 @@ class Usuario(db.Model):
 class Cliente(db.Model):
     __tablename__ = 'clientes'
     id = db.Column(db.Integer, primary_key=True)
-    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    # uno a uno con usuarios (Usuario.cliente es uselist=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False, unique=True, index=True)
     edad = db.Column(db.Integer)
     peso = db.Column(db.Float)
     altura = db.Column(db.Float)
@@ -47,7 +49,8 @@ class Cliente(db.Model):
 class Entrenador(db.Model):
     __tablename__ = 'entrenadores'
     id = db.Column(db.Integer, primary_key=True)
-    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    # uno a uno con usuarios (Usuario.entrenador es uselist=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False, unique=True, index=True)
     speciality = db.Column(db.String(200))
     bio = db.Column(db.Text)
     telefono = db.Column(db.String(50))
@@ -63,8 +66,10 @@ class Entrenador(db.Model):
 
 class Rutina(db.Model):
     __tablename__ = 'rutinas'
+    # catálogo público: WHERE es_publica ORDER BY creado_en DESC
+    __table_args__ = (db.Index('ix_rutinas_es_publica_creado_en', 'es_publica', 'creado_en'),)
     id = db.Column(db.Integer, primary_key=True)
-    entrenador_id = db.Column(db.Integer, db.ForeignKey('entrenadores.id'), nullable=False)
+    entrenador_id = db.Column(db.Integer, db.ForeignKey('entrenadores.id'), nullable=False, index=True)
     nombre = db.Column(db.String(200), nullable=False)
     descripcion = db.Column(db.Text)
     # Nueva columna: sección de la descripción seleccionada por el entrenador
@@ -91,8 +96,9 @@ class Rutina(db.Model):
 
 class PlanAlimenticio(db.Model):
     __tablename__ = 'planes_alimenticios'
+    __table_args__ = (db.Index('ix_planes_alimenticios_es_publico_creado_en', 'es_publico', 'creado_en'),)
     id = db.Column(db.Integer, primary_key=True)
-    entrenador_id = db.Column(db.Integer, db.ForeignKey('entrenadores.id'), nullable=False)
+    entrenador_id = db.Column(db.Integer, db.ForeignKey('entrenadores.id'), nullable=False, index=True)
     nombre = db.Column(db.String(200), nullable=False)
     descripcion = db.Column(db.Text)
     contenido = db.Column(db.Text)
@@ -107,6 +113,10 @@ class PlanAlimenticio(db.Model):
 
 class ContentReview(db.Model):
     __tablename__ = 'content_review'
+    __table_args__ = (
+        db.Index('ix_content_review_estado_creado_en', 'estado', 'creado_en'),
+        db.Index('ix_content_review_tipo_content_id', 'tipo', 'content_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     tipo = db.Column(db.String(20))  # 'rutina' | 'plan'
     content_id = db.Column(db.Integer, nullable=False)
@@ -138,8 +148,139 @@ rutina_ejercicio = db.Table(
 )
 
 
+# Rutinas guardadas (seguidas) por un cliente: /api/rutinas/<id>/seguir.
+# Sin FKs, igual que la tabla que creaban antes los handlers; acceso en
+# database/repositories.py.
+class ClienteRutina(db.Model):
+    __tablename__ = 'cliente_rutina'
+    # la PK (cliente_id, rutina_id) es el índice para "rutinas de un cliente"
+    cliente_id = db.Column(db.Integer, primary_key=True)
+    rutina_id = db.Column(db.Integer, primary_key=True, index=True)
+
+    def __repr__(self):
+        return f'<ClienteRutina {self.cliente_id}:{self.rutina_id}>'
+
+
+# Contadores por rutina/plan para los paneles del entrenador. Se actualizan en
+# la misma transacción que la solicitud o el guardado (database/content_stats.py)
+# y se reconstruyen con `python -m backend.manage rebuild_content_stats`.
+class ContentStats(db.Model):
+    __tablename__ = 'content_stats'
+    tipo = db.Column(db.String(20), primary_key=True)  # 'rutina' | 'plan'
+    content_id = db.Column(db.Integer, primary_key=True)
+    accepted_count = db.Column(db.Integer, nullable=False, default=0)
+    saved_count = db.Column(db.Integer, nullable=False, default=0)
+    pending_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ContentStats {self.tipo}:{self.content_id}>'
+
+
+# Catálogo público desnormalizado: una fila por rutina/plan publicado de un
+# entrenador visible, con los campos de los listados públicos. Lo mantienen
+# los handlers en su misma transacción (backend/catalogo.py) y se reconstruye
+# con `python -m backend.manage rebuild_catalogo`. Sin FKs, como content_stats.
+class CatalogoPublico(db.Model):
+    __tablename__ = 'catalogo_publico'
+    __table_args__ = (
+        db.UniqueConstraint('tipo', 'content_id', name='uq_catalogo_publico_tipo_content_id'),
+        # listados: WHERE tipo = ? ORDER BY creado_en DESC, content_id DESC
+        db.Index('ix_catalogo_publico_tipo_creado_en', 'tipo', 'creado_en', 'content_id'),
+        # ids siempre crecientes también en SQLite (no se reutilizan los borrados)
+        {'sqlite_autoincrement': True},
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(20), nullable=False)  # 'rutina' | 'plan'
+    content_id = db.Column(db.Integer, nullable=False)
+    entrenador_id = db.Column(db.Integer, nullable=False)
+    entrenador_usuario_id = db.Column(db.Integer, nullable=False, index=True)
+    entrenador_nombre = db.Column(db.String(120))
+    nombre = db.Column(db.String(200), nullable=False)
+    descripcion = db.Column(db.Text)
+    # sólo rutinas
+    seccion_descripcion = db.Column(db.String(200))
+    objetivo_principal = db.Column(db.Text)
+    enfoque_rutina = db.Column(db.Text)
+    cualidades_clave = db.Column(db.Text)
+    duracion_frecuencia = db.Column(db.Text)
+    material_requerido = db.Column(db.Text)
+    instrucciones_estructurales = db.Column(db.Text)
+    link_url = db.Column(db.String(512))
+    nivel = db.Column(db.String(50))
+    # sólo planes
+    contenido = db.Column(db.Text)
+    creado_en = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<CatalogoPublico {self.tipo}:{self.content_id}>'
+
+
+# Versión persistida del catálogo público (backend/catalogo.py). Una sola fila;
+# cada escritura que cambia los listados la incrementa y los ETag la incluyen.
+class CatalogoVersion(db.Model):
+    __tablename__ = 'catalogo_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    actualizado_en = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CatalogoVersion {self.version}>'
+
+
+# Última foto de /api/admin/metrics (JSON), ver database/metrics.py. Una sola fila.
+class MetricsSnapshot(db.Model):
+    __tablename__ = 'metrics_snapshot'
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    creado_en = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<MetricsSnapshot {self.creado_en}>'
+
+
+# Agregados diarios para /api/admin/metrics/history (database/metrics.py,
+# `python -m backend.manage rollup_metrics`). Un día sólo se escribe cuando ya terminó.
+class MetricsDaily(db.Model):
+    __tablename__ = 'metrics_daily'
+    dia = db.Column(db.Date, primary_key=True)
+    new_users = db.Column(db.Integer, nullable=False, default=0)
+    new_rutinas = db.Column(db.Integer, nullable=False, default=0)
+    new_planes = db.Column(db.Integer, nullable=False, default=0)
+    solicitudes_creadas = db.Column(db.Integer, nullable=False, default=0)
+    solicitudes_aceptadas = db.Column(db.Integer, nullable=False, default=0)
+    mediciones = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<MetricsDaily {self.dia}>'
+
+
+# Purga masiva en segundo plano (database/purge.py). `cursor` es el último
+# usuario_id ya borrado: se guarda en la misma transacción que cada lote, así
+# un job interrumpido se retoma desde ahí.
+class PurgeJob(db.Model):
+    __tablename__ = 'purge_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    estado = db.Column(db.String(20), nullable=False, default='pendiente', index=True)
+    usuario_ids = db.Column(db.Text, nullable=False)  # JSON, ordenados
+    total = db.Column(db.Integer, nullable=False, default=0)
+    procesados = db.Column(db.Integer, nullable=False, default=0)
+    eliminados = db.Column(db.Integer, nullable=False, default=0)
+    cursor = db.Column(db.Integer, nullable=True)
+    batch_size = db.Column(db.Integer, nullable=False, default=100)
+    rows = db.Column(db.Text, nullable=True)  # JSON {tabla: filas}
+    error = db.Column(db.Text, nullable=True)
+    creado_por = db.Column(db.Integer, nullable=True)
+    creado_en = db.Column(db.DateTime, default=datetime.utcnow)
+    actualizado_en = db.Column(db.DateTime, default=datetime.utcnow)
+    terminado_en = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<PurgeJob {self.id} {self.estado} {self.procesados}/{self.total}>'
+
+
 class Medicion(db.Model):
     __tablename__ = 'mediciones'
+    __table_args__ = (db.Index('ix_mediciones_cliente_id_creado_en', 'cliente_id', 'creado_en'),)
     id = db.Column(db.Integer, primary_key=True)
     cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False)
     peso = db.Column(db.Float)
@@ -152,6 +293,11 @@ class Medicion(db.Model):
 
 class SolicitudPlan(db.Model):
     __tablename__ = 'solicitudes_plan'
+    __table_args__ = (
+        db.Index('ix_solicitudes_plan_rutina_id_estado', 'rutina_id', 'estado'),
+        db.Index('ix_solicitudes_plan_plan_id_estado', 'plan_id', 'estado'),
+        db.Index('ix_solicitudes_plan_cliente_id_creado_en', 'cliente_id', 'creado_en'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False)
     rutina_id = db.Column(db.Integer, db.ForeignKey('rutinas.id'), nullable=True)
@@ -159,6 +305,8 @@ class SolicitudPlan(db.Model):
     estado = db.Column(db.String(50), default='pendiente')
     nota = db.Column(db.Text)
     creado_en = db.Column(db.DateTime, default=datetime.utcnow)
+    # cuándo pasó a 'aceptado' (NULL en filas anteriores a la columna)
+    aceptado_en = db.Column(db.DateTime, nullable=True)
 
     cliente = db.relationship('Cliente', backref='solicitudes')
     rutina = db.relationship('Rutina', backref='solicitudes')
@@ -169,7 +317,7 @@ class RevokedToken(db.Model):
     __tablename__ = 'revoked_tokens'
     id = db.Column(db.Integer, primary_key=True)
     jti = db.Column(db.String(128), unique=True, nullable=False)
-    revoked_at = db.Column(db.DateTime, default=datetime.utcnow)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     def __repr__(self):
         return f'<RevokedToken {self.jti}>'
@@ -0,0 +1,173 @@
+"""Admin dashboard metrics in a single query, with an optional snapshot.
+
+`compute_metrics()` builds one SELECT: conditional counts over usuarios LEFT
+JOIN clientes/entrenadores (replacing the four separate counts and the double
+join for "both roles"), plus scalar subqueries for content, solicitudes by
+estado and recent mediciones.
+
+`metrics_snapshot` keeps the last computed result as a single JSON row so the
+dashboard can read it without touching the big tables. It is refreshed on
+demand (POST /api/admin/metrics/refresh, `python -m backend.manage
+refresh_metrics`, e.g. from cron) or lazily once it is older than the
+caller's max age.
+
+History lives in `metrics_daily`, one row per finished UTC day. `rollup_days()`
+is incremental: it starts the day after the last stored row (the watermark),
+runs one GROUP BY per source table for the whole range, and writes every day
+up to yesterday, including days with no activity. Each source is bucketed
+by the day its event happened: creado_en, except solicitudes_aceptadas,
+which uses aceptado_en (set when a solicitud is accepted) so an acceptance
+lands on a day the rollup has not written yet. Rows older than that column
+fall back to creado_en. `history()` only reads the rollup table.
+"""
+import json
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import case, func, select
+
+from database.database import (Cliente, Entrenador, Medicion, MetricsDaily, MetricsSnapshot, PlanAlimenticio,
+                               Rutina, SolicitudPlan, Usuario)
+
+SOLICITUD_ESTADOS = ('pendiente', 'aceptado', 'rechazado', 'cancelado')
+MEDICIONES_WINDOW = timedelta(days=7)
+SNAPSHOT_ID = 1
+
+
+def _count(model, *where):
+    return select(func.count()).select_from(model).where(*where).scalar_subquery()
+
+
+def compute_metrics(session, now=None):
+    """Calcula las métricas con una única sentencia SELECT."""
+    now = now or datetime.utcnow()
+    # DISTINCT por si quedan usuarios con filas duplicadas de bases antiguas
+    cli = select(Cliente.usuario_id).distinct().subquery('cli')
+    ent = select(Entrenador.usuario_id).distinct().subquery('ent')
+    is_cli, is_ent = cli.c.usuario_id.isnot(None), ent.c.usuario_id.isnot(None)
+    users = (
+        select(
+            func.count().label('total_users'),
+            func.count(cli.c.usuario_id).label('total_clientes'),
+            func.count(ent.c.usuario_id).label('total_entrenadores'),
+            func.sum(case((is_cli & is_ent, 1), else_=0)).label('both_roles'),
+        )
+        .select_from(Usuario)
+        .outerjoin(cli, cli.c.usuario_id == Usuario.id)
+        .outerjoin(ent, ent.c.usuario_id == Usuario.id)
+        .subquery('users')
+    )
+    stmt = select(
+        users,
+        _count(Rutina, Rutina.es_publica.is_(True)).label('rutinas_publicas'),
+        _count(Rutina).label('total_rutinas'),
+        _count(PlanAlimenticio, PlanAlimenticio.es_publico.is_(True)).label('planes_publicos'),
+        _count(PlanAlimenticio).label('total_planes'),
+        *[_count(SolicitudPlan, SolicitudPlan.estado == e).label(f'solicitudes_{e}') for e in SOLICITUD_ESTADOS],
+        _count(Medicion, Medicion.creado_en >= now - MEDICIONES_WINDOW).label('mediciones_7d'),
+    )
+    row = session.execute(stmt).one()._mapping
+    n = {k: int(v or 0) for k, v in row.items()}
+    return {
+        'total_users': n['total_users'],
+        'total_clientes': n['total_clientes'],
+        'total_entrenadores': n['total_entrenadores'],
+        'both_roles': n['both_roles'],
+        'clientes_only': max(0, n['total_clientes'] - n['both_roles']),
+        'entrenadores_only': max(0, n['total_entrenadores'] - n['both_roles']),
+        'rutinas': {'total': n['total_rutinas'], 'publicas': n['rutinas_publicas'],
+                    'privadas': n['total_rutinas'] - n['rutinas_publicas']},
+        'planes': {'total': n['total_planes'], 'publicos': n['planes_publicos']},
+        'solicitudes': {e: n[f'solicitudes_{e}'] for e in SOLICITUD_ESTADOS},
+        'mediciones_7d': n['mediciones_7d'],
+        'generated_at': now.isoformat(),
+    }
+
+
+def refresh_snapshot(session, now=None):
+    """Recalcula y guarda el snapshot; devuelve las métricas. El caller hace commit."""
+    metrics = compute_metrics(session, now)
+    snap = session.get(MetricsSnapshot, SNAPSHOT_ID)
+    if snap is None:
+        snap = MetricsSnapshot(id=SNAPSHOT_ID)
+        session.add(snap)
+    snap.data = json.dumps(metrics)
+    snap.creado_en = datetime.fromisoformat(metrics['generated_at'])
+    return metrics
+
+
+def read_snapshot(session, max_age=None, now=None):
+    """Último snapshot, o None si no hay o es más viejo que `max_age` (timedelta)."""
+    snap = session.get(MetricsSnapshot, SNAPSHOT_ID)
+    if snap is None or not snap.data:
+        return None
+    if max_age is not None and snap.creado_en and (now or datetime.utcnow()) - snap.creado_en > max_age:
+        return None
+    return json.loads(snap.data)
+
+
+# columna de metrics_daily -> (modelo, fecha del evento, filtro extra)
+ROLLUP_SOURCES = {
+    'new_users': (Usuario, Usuario.creado_en, None),
+    'new_rutinas': (Rutina, Rutina.creado_en, None),
+    'new_planes': (PlanAlimenticio, PlanAlimenticio.creado_en, None),
+    'solicitudes_creadas': (SolicitudPlan, SolicitudPlan.creado_en, None),
+    # día de la aceptación; las filas sin aceptado_en (anteriores) caen en creado_en
+    'solicitudes_aceptadas': (
+        SolicitudPlan,
+        func.coalesce(SolicitudPlan.aceptado_en, SolicitudPlan.creado_en),
+        (SolicitudPlan.aceptado_en.isnot(None)) | (SolicitudPlan.estado == 'aceptado'),
+    ),
+    'mediciones': (Medicion, Medicion.creado_en, None),
+}
+ROLLUP_COLUMNS = tuple(ROLLUP_SOURCES)
+
+
+def _as_date(value):
+    # func.date() devuelve 'YYYY-MM-DD' en SQLite y date en Postgres
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _first_activity(session):
+    firsts = [session.query(func.min(model.creado_en)).scalar() for model in (Usuario, Rutina, PlanAlimenticio,
+                                                                               SolicitudPlan, Medicion)]
+    firsts = [f for f in firsts if f is not None]
+    return min(firsts).date() if firsts else None
+
+
+def rollup_days(session, today=None):
+    """Write metrics_daily from the watermark up to yesterday; returns the days added.
+
+    The caller commits. Two concurrent runs collide on the primary key and
+    the second one fails, which is harmless (rollback and run again).
+    """
+    today = today or datetime.utcnow().date()
+    watermark = session.query(func.max(MetricsDaily.dia)).scalar()
+    start = _as_date(watermark) + timedelta(days=1) if watermark else _first_activity(session)
+    if start is None or start >= today:
+        return 0
+    lo, hi = datetime.combine(start, datetime.min.time()), datetime.combine(today, datetime.min.time())
+
+    days = {start + timedelta(days=i): dict.fromkeys(ROLLUP_COLUMNS, 0) for i in range((today - start).days)}
+    for column, (model, when, extra) in ROLLUP_SOURCES.items():
+        dia = func.date(when)
+        stmt = select(dia, func.count()).select_from(model).where(when >= lo, when < hi).group_by(dia)
+        if extra is not None:
+            stmt = stmt.where(extra)
+        for value, count in session.execute(stmt):
+            days[_as_date(value)][column] = count
+    session.add_all(MetricsDaily(dia=d, **counts) for d, counts in days.items())
+    return len(days)
+
+
+def history(session, start, end, bucket='day'):
+    """Serie [start, end] desde metrics_daily, por día o por semana (lunes)."""
+    rows = (session.query(MetricsDaily)
+            .filter(MetricsDaily.dia >= start, MetricsDaily.dia <= end)
+            .order_by(MetricsDaily.dia).all())
+    series = {}
+    for row in rows:
+        key = row.dia if bucket == 'day' else row.dia - timedelta(days=row.dia.weekday())
+        point = series.setdefault(key, dict.fromkeys(ROLLUP_COLUMNS, 0))
+        for column in ROLLUP_COLUMNS:
+            point[column] += getattr(row, column) or 0
+    return [{'bucket': key.isoformat(), **point} for key, point in series.items()]
@@ -0,0 +1,156 @@
+"""Connection pool options from the environment, plus pool metrics.
+
+`engine_options_from_env()` builds SQLALCHEMY_ENGINE_OPTIONS. Unset variables
+keep SQLAlchemy's defaults, except on Postgres, where pre-ping is on and
+connections are recycled after 300 s: Render drops idle SSL connections and a
+stale one otherwise fails the first query that gets it.
+
+- DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (seconds to wait for a
+  connection before failing).
+- DB_POOL_RECYCLE (seconds; -1 disables), DB_POOL_PRE_PING (1/0).
+- DB_STATEMENT_TIMEOUT_MS: Postgres `statement_timeout` set at connect time.
+  SQLite has no equivalent and ignores it.
+- DB_POOL_METRICS (default 1): use `InstrumentedQueuePool`.
+
+`InstrumentedQueuePool` is a QueuePool that times every checkout (the wait
+for a free connection, including opening a new one) and counts overflow
+connections, checkout timeouts, new connections and invalidations (e.g. a
+failed pre-ping). `pool_status()` reports them with the current checked-out
+and overflow counts, for GET /api/admin/metrics/pool. The numbers belong to
+one process: multiply by the gunicorn workers to compare with the Postgres
+connection limit (workers x (pool_size + max_overflow)).
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+RECENT_WAITS = 1024
+
+
+def _percentile_ms(sorted_waits, q):
+    if not sorted_waits:
+        return 0.0
+    return round(sorted_waits[min(len(sorted_waits) - 1, int(len(sorted_waits) * q))] * 1000, 3)
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self._recent = deque(maxlen=RECENT_WAITS)
+
+    def record_checkout(self, wait, overflowed):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self._recent.append(wait)
+            if overflowed:
+                self.overflow_events += 1
+
+    def record_timeout(self, wait):
+        with self._lock:
+            self.timeouts += 1
+            self.wait_max = max(self.wait_max, wait)
+
+    def count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            recent = sorted(self._recent)
+            return {
+                'checkouts': self.checkouts,
+                'wait_ms_avg': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'wait_ms_p50': _percentile_ms(recent, 0.5),
+                'wait_ms_p99': _percentile_ms(recent, 0.99),
+                'wait_ms_max': round(self.wait_max * 1000, 3),
+                'overflow_events': self.overflow_events,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        event.listen(self, 'connect', lambda *a: self.stats.count('connects'))
+        event.listen(self, 'invalidate', lambda *a: self.stats.count('invalidations'))
+
+    def _do_get(self):
+        overflow = self._overflow
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_timeout(time.perf_counter() - start)
+            raise
+        # _overflow sube también al llenar el pool base; sólo cuenta por encima de pool_size
+        self.stats.record_checkout(time.perf_counter() - start, overflowed=self._overflow > max(overflow, 0))
+        return conn
+
+
+def _env_int(name):
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else None
+
+
+def engine_options_from_env(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS para `uri` según las variables DB_*."""
+    is_pg = uri.startswith('postgresql')
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:'):
+        return {}  # SingletonThreadPool / StaticPool: no aplican las opciones de QueuePool
+    options = {}
+    for key, name in (('pool_size', 'DB_POOL_SIZE'), ('max_overflow', 'DB_MAX_OVERFLOW'),
+                      ('pool_timeout', 'DB_POOL_TIMEOUT'), ('pool_recycle', 'DB_POOL_RECYCLE')):
+        value = _env_int(name)
+        if value is not None:
+            options[key] = value
+    if is_pg:
+        options.setdefault('pool_recycle', 300)
+    pre_ping = os.getenv('DB_POOL_PRE_PING')
+    if pre_ping not in (None, ''):
+        options['pool_pre_ping'] = pre_ping.lower() in ('1', 'true', 'yes')
+    elif is_pg:
+        options['pool_pre_ping'] = True
+    statement_timeout = _env_int('DB_STATEMENT_TIMEOUT_MS')
+    if statement_timeout and is_pg:
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    if os.getenv('DB_POOL_METRICS', '1').lower() in ('1', 'true', 'yes'):
+        options['poolclass'] = InstrumentedQueuePool
+    return options
+
+
+def pool_status(engine):
+    """Estado actual del pool del engine más los contadores si está instrumentado."""
+    pool = engine.pool
+    status = {'pid': os.getpid(), 'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'pool_size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+            'recycle': pool._recycle,
+            'pre_ping': pool._pre_ping,
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(0, pool.overflow()),
+        })
+    stats = getattr(pool, 'stats', None)
+    if stats is not None:
+        status['stats'] = stats.snapshot()
+    return status
@@ -0,0 +1,278 @@
+"""Hard delete of usuarios and everything that hangs off them.
+
+`purge_usuarios()` first resolves the whole dependency set of a batch of
+usuarios with one UNION ALL query (their entrenador and cliente rows, the
+entrenadores' rutinas and planes) and then runs one set-based DELETE per
+table, in dependency order, with those ids as IN lists. Nothing is committed
+here: the caller commits once, so the purge is atomic. Large lists are
+processed `batch_size` usuarios at a time, which also bounds the IN lists.
+
+With ``dry_run=True`` the same WHERE clauses are counted instead of deleted.
+Across several batches a row reachable from two of them (a purged cliente's
+solicitud on a purged trainer's plan) may be counted twice.
+
+Tables missing from the database (partial migrations) are skipped. Counters
+in `content_stats` for content that survives (another trainer's rutina that
+a purged cliente had saved or requested) are decremented in the same
+transaction.
+
+Jobs (`purge_jobs`). For hundreds of accounts, `create_job()` stores the id
+list and `run_job()` works through it in batches, outside the request. Each
+batch's deletes and the job's checkpoint (`cursor`, the last usuario id
+done, plus progress counters) commit together, so a job interrupted by a
+crash resumes after the last committed batch. A runner claims a job with a
+conditional UPDATE; a job whose heartbeat (`actualizado_en`) is older than
+STALE_AFTER (PURGE_JOB_STALE_AFTER seconds, default 15 min) is considered
+abandoned and can be claimed again (`python -m backend.manage
+run_purge_jobs`, run from cron, see render.yaml). The heartbeat is also the
+runner's lease: each batch commits only if `actualizado_en` still holds the
+value this runner last wrote, so a batch that outlives STALE_AFTER and was
+reclaimed meanwhile rolls back instead of being applied twice. The
+heartbeat cannot move in the middle of a batch (the batch is one
+transaction), so STALE_AFTER has to exceed the slowest batch; otherwise
+jobs are reclaimed and redone in a loop. A batch that raises (a lock
+timeout, a dropped connection) rolls back alone and leaves the job
+'fallido' with the error and the last checkpoint; `retry_job()` puts it
+back to 'pendiente' with that checkpoint kept, so it resumes after the last
+committed batch (POST /api/admin/purge_jobs/<id>/retry, or
+`run_purge_jobs --retry-failed`). Failed jobs are not retried on their own,
+so a permanent error does not loop.
+"""
+import bisect
+import json
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, inspect, literal, or_, select, union_all, update
+
+from database import content_stats
+from database.database import Cliente, Entrenador, PlanAlimenticio, PurgeJob, Rutina, Usuario, db
+
+BATCH_SIZE = 200
+
+# Tablas en orden de borrado (hijos antes que padres) y qué ids las vacían:
+# (columna, tipo de id). 'content' = filas (tipo, content_id) de rutinas/planes.
+PURGE_ORDER = (
+    ('solicitudes_plan', (('plan_id', 'plan'), ('rutina_id', 'rutina'), ('cliente_id', 'cliente'))),
+    ('cliente_rutina', (('rutina_id', 'rutina'), ('cliente_id', 'cliente'))),
+    ('content_review', 'content'),
+    ('content_stats', 'content'),
+    ('catalogo_publico', 'content'),
+    ('rutina_ejercicio', (('rutina_id', 'rutina'),)),
+    ('planes_alimenticios', (('id', 'plan'),)),
+    ('rutinas', (('id', 'rutina'),)),
+    ('entrenadores', (('id', 'entrenador'),)),
+    ('mediciones', (('cliente_id', 'cliente'),)),
+    ('clientes', (('id', 'cliente'),)),
+    ('password_reset_tokens', (('usuario_id', 'usuario'),)),
+    ('usuarios', (('id', 'usuario'),)),
+)
+
+
+class PurgeIds:
+    """Ids a borrar para un lote de usuarios."""
+
+    def __init__(self, usuario=(), entrenador=(), cliente=(), rutina=(), plan=()):
+        self.usuario = sorted(usuario)
+        self.entrenador = sorted(entrenador)
+        self.cliente = sorted(cliente)
+        self.rutina = sorted(rutina)
+        self.plan = sorted(plan)
+
+
+def resolve_ids(session, usuario_ids):
+    """Usuarios existentes de `usuario_ids` y sus dependencias, en una consulta."""
+    usuario_ids = list(usuario_ids)
+    parts = union_all(
+        select(literal('usuario').label('kind'), Usuario.id).where(Usuario.id.in_(usuario_ids)),
+        select(literal('entrenador'), Entrenador.id).where(Entrenador.usuario_id.in_(usuario_ids)),
+        select(literal('cliente'), Cliente.id).where(Cliente.usuario_id.in_(usuario_ids)),
+        select(literal('rutina'), Rutina.id).join(Entrenador, Entrenador.id == Rutina.entrenador_id)
+        .where(Entrenador.usuario_id.in_(usuario_ids)),
+        select(literal('plan'), PlanAlimenticio.id).join(Entrenador, Entrenador.id == PlanAlimenticio.entrenador_id)
+        .where(Entrenador.usuario_id.in_(usuario_ids)),
+    )
+    found = {'usuario': set(), 'entrenador': set(), 'cliente': set(), 'rutina': set(), 'plan': set()}
+    for kind, id_ in session.execute(parts):
+        found[kind].add(id_)
+    return PurgeIds(**found)
+
+
+def _where(table, columns, ids):
+    """Condición de borrado para estos ids, o None si no hay nada que borrar."""
+    if columns == 'content':
+        conditions = [(table.c.tipo == tipo) & table.c.content_id.in_(getattr(ids, tipo))
+                      for tipo in ('rutina', 'plan') if getattr(ids, tipo)]
+    else:
+        conditions = [table.c[column].in_(getattr(ids, kind)) for column, kind in columns if getattr(ids, kind)]
+    return or_(*conditions) if conditions else None
+
+
+def purge_batch(session, ids, dry_run=False, existing_tables=None):
+    """Borra (o cuenta) las filas de un lote ya resuelto; devuelve {tabla: filas}."""
+    if existing_tables is None:
+        existing_tables = set(inspect(session.connection()).get_table_names())
+    if not dry_run and ids.cliente and 'content_stats' in existing_tables:
+        content_stats.forget_clientes(session, ids.cliente, skip_rutinas=ids.rutina, skip_planes=ids.plan)
+    rows = {}
+    for name, columns in PURGE_ORDER:
+        table = db.metadata.tables[name]
+        where = _where(table, columns, ids) if name in existing_tables else None
+        if where is None:
+            continue
+        if dry_run:
+            rows[name] = session.execute(select(func.count()).select_from(table).where(where)).scalar()
+        else:
+            rows[name] = session.execute(table.delete().where(where)).rowcount
+    return rows
+
+
+def purge_usuarios(session, usuario_ids, dry_run=False, batch_size=BATCH_SIZE):
+    """Hard delete de `usuario_ids` por lotes, sin commit.
+
+    Devuelve {'usuarios': ids encontrados, 'rows': {tabla: filas}, 'dry_run': bool}.
+    """
+    usuario_ids = sorted(set(int(u) for u in usuario_ids))
+    existing_tables = set(inspect(session.connection()).get_table_names())
+    found, rows = [], {}
+    for start in range(0, len(usuario_ids), batch_size):
+        ids = resolve_ids(session, usuario_ids[start:start + batch_size])
+        if not ids.usuario:
+            continue
+        found.extend(ids.usuario)
+        for name, n in purge_batch(session, ids, dry_run, existing_tables).items():
+            rows[name] = rows.get(name, 0) + n
+    if not dry_run:
+        # las filas borradas por SQL no pasan por el identity map
+        session.expire_all()
+    return {'usuarios': found, 'rows': rows, 'dry_run': dry_run}
+
+
+JOB_BATCH_SIZE = 100
+STALE_AFTER = timedelta(seconds=int(os.getenv('PURGE_JOB_STALE_AFTER', '900')))
+
+
+def create_job(session, usuario_ids, creado_por=None, batch_size=JOB_BATCH_SIZE):
+    """Registra un job de purga para `usuario_ids` (sin commit)."""
+    ids = sorted(set(int(u) for u in usuario_ids))
+    job = PurgeJob(usuario_ids=json.dumps(ids), total=len(ids), batch_size=max(1, int(batch_size)),
+                   creado_por=creado_por, rows='{}')
+    session.add(job)
+    return job
+
+
+def claim_job(session, job_id, now=None, stale_after=STALE_AFTER):
+    """Marca el job como en curso si está pendiente o abandonado; True si lo tomamos."""
+    now = now or datetime.utcnow()
+    claimable = (PurgeJob.estado == 'pendiente') | (
+        (PurgeJob.estado == 'en_curso') & (PurgeJob.actualizado_en < now - stale_after))
+    result = session.execute(
+        update(PurgeJob).where(PurgeJob.id == job_id, claimable).values(estado='en_curso', actualizado_en=now)
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+def run_job(session, job_id, max_batches=None):
+    """Run the job from its checkpoint; returns the job, or None if another runner holds or took it.
+
+    `max_batches` stops after that many batches (leaving the job en_curso),
+    which is how tests simulate a crash.
+    """
+    if not claim_job(session, job_id):
+        return None
+    job = session.get(PurgeJob, job_id)
+    lease = job.actualizado_en
+    ids = json.loads(job.usuario_ids)
+    try:
+        existing_tables = set(inspect(session.connection()).get_table_names())
+        done = 0
+        while max_batches is None or done < max_batches:
+            start = 0 if job.cursor is None else bisect.bisect_right(ids, job.cursor)
+            batch = ids[start:start + job.batch_size]
+            if not batch:
+                if not _renew(session, job_id, lease, estado='completado', terminado_en=datetime.utcnow()):
+                    return _lost(session)
+                session.commit()
+                break
+            resolved = resolve_ids(session, batch)
+            rows = json.loads(job.rows or '{}')
+            if resolved.usuario:
+                for name, n in purge_batch(session, resolved, existing_tables=existing_tables).items():
+                    rows[name] = rows.get(name, 0) + n
+            # checkpoint en la misma transacción que los borrados del lote, sólo si el job sigue siendo nuestro
+            lease = _renew(session, job_id, lease, rows=json.dumps(rows), cursor=batch[-1],
+                           procesados=job.procesados + len(batch), eliminados=job.eliminados + len(resolved.usuario))
+            if not lease:
+                return _lost(session)
+            session.commit()
+            done += 1
+    except Exception as e:
+        session.rollback()
+        if not _renew(session, job_id, lease, estado='fallido', error=str(e)):
+            return _lost(session)
+        session.commit()
+    session.expire_all()
+    return session.get(PurgeJob, job_id)
+
+
+def _renew(session, job_id, lease, **values):
+    """UPDATE del job condicionado a que `actualizado_en` siga siendo `lease`; el nuevo lease o None."""
+    now = datetime.utcnow()
+    result = session.execute(
+        update(PurgeJob).where(PurgeJob.id == job_id, PurgeJob.estado == 'en_curso', PurgeJob.actualizado_en == lease)
+        .values(actualizado_en=now, **values)
+    )
+    return now if result.rowcount == 1 else None
+
+
+def _lost(session):
+    # otro runner reclamó el job: se descarta el lote en curso
+    session.rollback()
+    session.expire_all()
+    return None
+
+
+def retry_job(session, job_id, now=None):
+    """Pasa un job 'fallido' a 'pendiente' conservando `cursor` (sin commit); True si lo estaba."""
+    result = session.execute(
+        update(PurgeJob).where(PurgeJob.id == job_id, PurgeJob.estado == 'fallido')
+        .values(estado='pendiente', error=None, actualizado_en=now or datetime.utcnow())
+    )
+    return result.rowcount == 1
+
+
+def failed_jobs(session):
+    """Ids de jobs fallidos, del más antiguo al más nuevo."""
+    return list(session.execute(
+        select(PurgeJob.id).where(PurgeJob.estado == 'fallido').order_by(PurgeJob.id)
+    ).scalars())
+
+
+def runnable_jobs(session, now=None, stale_after=STALE_AFTER):
+    """Ids de jobs pendientes o abandonados, del más antiguo al más nuevo."""
+    now = now or datetime.utcnow()
+    stale = (PurgeJob.estado == 'en_curso') & (PurgeJob.actualizado_en < now - stale_after)
+    return list(session.execute(
+        select(PurgeJob.id).where((PurgeJob.estado == 'pendiente') | stale).order_by(PurgeJob.id)
+    ).scalars())
+
+
+def job_status(job, now=None, stale_after=STALE_AFTER):
+    now = now or datetime.utcnow()
+    return {
+        'id': job.id,
+        'estado': job.estado,
+        'total': job.total,
+        'procesados': job.procesados,
+        'eliminados': job.eliminados,
+        'progress': round(job.procesados / job.total, 4) if job.total else 1.0,
+        'rows': json.loads(job.rows or '{}'),
+        'error': job.error,
+        'batch_size': job.batch_size,
+        'stale': job.estado == 'en_curso' and bool(job.actualizado_en) and job.actualizado_en < now - stale_after,
+        'creado_por': job.creado_por,
+        'creado_en': job.creado_en.isoformat() if job.creado_en else None,
+        'actualizado_en': job.actualizado_en.isoformat() if job.actualizado_en else None,
+        'terminado_en': job.terminado_en.isoformat() if job.terminado_en else None,
+    }
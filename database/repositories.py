@@ -0,0 +1,71 @@
+"""Single-statement reads and writes on `cliente_rutina`.
+
+The cliente is resolved from the usuario inside the statement (lowest
+`clientes.id` for that usuario, the row `Cliente.query...first()` used to
+return), so the follow/unfollow/list endpoints do a single round-trip on
+their normal path. Callers only look up cliente/rutina to explain a no-op.
+"""
+from sqlalchemy import delete, exists, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database.database import Cliente, ClienteRutina, Rutina
+
+
+def _cliente_id_of(usuario_id):
+    return select(func.min(Cliente.id)).where(Cliente.usuario_id == usuario_id).scalar_subquery()
+
+
+def _insert_ignore(session, table, source):
+    """INSERT ... SELECT that skips rows already present."""
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return pg_insert(table).from_select(['cliente_id', 'rutina_id'], source).on_conflict_do_nothing()
+    if dialect == 'sqlite':
+        return sqlite_insert(table).prefix_with('OR IGNORE').from_select(['cliente_id', 'rutina_id'], source)
+    # other backends: guard with NOT EXISTS
+    source = source.where(~exists().where(
+        ClienteRutina.cliente_id == source.selected_columns[0],
+        ClienteRutina.rutina_id == source.selected_columns[1],
+    ))
+    return insert(table).from_select(['cliente_id', 'rutina_id'], source)
+
+
+def follow_rutina(session, usuario_id, rutina_id):
+    """Save `rutina_id` for the cliente of `usuario_id` (idempotent).
+
+    Returns True when a row was inserted. False means it was already saved,
+    or that the usuario has no cliente row, or that the rutina doesn't exist.
+    """
+    # una sola tabla en el FROM (rutinas); el cliente entra como subconsulta escalar
+    source = (
+        select(_cliente_id_of(usuario_id), Rutina.id)
+        .where(Rutina.id == rutina_id)
+        .where(exists().where(Cliente.usuario_id == usuario_id))
+    )
+    result = session.execute(_insert_ignore(session, ClienteRutina.__table__, source))
+    return result.rowcount > 0
+
+
+def unfollow_rutina(session, usuario_id, rutina_id):
+    """Quita la rutina guardada; True si había fila que borrar."""
+    stmt = delete(ClienteRutina).where(
+        ClienteRutina.cliente_id.in_(select(Cliente.id).where(Cliente.usuario_id == usuario_id)),
+        ClienteRutina.rutina_id == rutina_id,
+    )
+    return session.execute(stmt).rowcount > 0
+
+
+def followed_rutinas(session, usuario_id, columns):
+    """Rutinas saved by the cliente of `usuario_id`, newest first.
+
+    `columns` are the Rutina columns to select (labelled by the caller).
+    """
+    stmt = (
+        select(*columns)
+        .select_from(ClienteRutina)
+        .join(Rutina, Rutina.id == ClienteRutina.rutina_id)
+        .where(ClienteRutina.cliente_id == _cliente_id_of(usuario_id))
+        .order_by(Rutina.creado_en.desc(), Rutina.id.desc())
+    )
+    return session.execute(stmt)
@@ -0,0 +1,168 @@
+"""Reconcile the live database schema with the models in `database.database`.
+
+`sync_schema(engine, metadata)` introspects the connected database and
+applies additive changes only:
+
+- tables declared in the models that don't exist yet (with their indexes);
+- columns missing from existing tables (`ALTER TABLE ... ADD COLUMN` with the
+  model's type, scalar default and foreign key);
+- indexes declared on the models (`index=True` / `db.Index`) that are missing.
+
+Nothing is dropped or rewritten in place. Drift that needs a real migration
+(NOT NULL columns without default on a populated table, primary keys, legacy
+columns the models no longer declare) is reported as a warning and left alone.
+
+It runs once per process at boot (see SCHEMA_SYNC_ON_STARTUP in backend/app.py)
+and from `python -m backend.manage migrate`. On Postgres the pass is serialized
+with an advisory lock, so when gunicorn boots several workers only the first
+one issues DDL and the others find nothing left to do.
+"""
+import time
+
+from sqlalchemy import inspect, literal, text
+
+# Arbitrary constant shared by every process running the sync
+ADVISORY_LOCK_ID = 72402417
+
+
+class SchemaReport:
+    def __init__(self):
+        self.tables_created = []
+        self.columns_added = []
+        self.indexes_created = []
+        self.warnings = []
+        self.errors = []
+        self.elapsed_ms = 0.0
+
+    @property
+    def changed(self):
+        return bool(self.tables_created or self.columns_added or self.indexes_created)
+
+    def as_dict(self):
+        return {
+            'tables_created': self.tables_created,
+            'columns_added': self.columns_added,
+            'indexes_created': self.indexes_created,
+            'warnings': self.warnings,
+            'errors': self.errors,
+            'elapsed_ms': round(self.elapsed_ms, 1),
+        }
+
+    def summary(self):
+        if not self.changed and not self.errors:
+            return f'up to date ({self.elapsed_ms:.1f} ms)'
+        return (f'{len(self.tables_created)} tables, {len(self.columns_added)} columns, '
+                f'{len(self.indexes_created)} indexes created, {len(self.errors)} errors '
+                f'({self.elapsed_ms:.1f} ms)')
+
+
+def _default_sql(column, dialect):
+    """SQL literal for the column default, or None when it can't be expressed
+    in DDL (callables such as `datetime.utcnow`)."""
+    if column.server_default is not None and hasattr(column.server_default, 'arg'):
+        arg = column.server_default.arg
+        return arg if isinstance(arg, str) else str(arg.compile(dialect=dialect))
+    if column.default is not None and column.default.is_scalar:
+        value = literal(column.default.arg, type_=column.type)
+        return str(value.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    return None
+
+
+def column_ddl(column, dialect):
+    """`ALTER TABLE ... ADD COLUMN` statement for `column`, plus an optional
+    warning when the model's constraints can't be applied as declared."""
+    preparer = dialect.identifier_preparer
+    parts = [preparer.format_column(column), column.type.compile(dialect=dialect)]
+    warning = None
+    default = _default_sql(column, dialect)
+    if default is not None:
+        parts.append(f'DEFAULT {default}')
+    if not column.nullable:
+        if default is not None:
+            parts.append('NOT NULL')
+        else:
+            warning = f'{column.table.name}.{column.name} added as NULL (NOT NULL without default)'
+    for fk in column.foreign_keys:
+        target = fk.column
+        parts.append(f'REFERENCES {preparer.format_table(target.table)} ({preparer.format_column(target)})')
+    stmt = f'ALTER TABLE {preparer.format_table(column.table)} ADD COLUMN {" ".join(parts)}'
+    return stmt, warning
+
+
+def _lock(conn):
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text('SELECT pg_advisory_lock(:id)'), {'id': ADVISORY_LOCK_ID})
+        conn.commit()
+        return True
+    return False
+
+
+def _unlock(conn):
+    try:
+        conn.rollback()
+        conn.execute(text('SELECT pg_advisory_unlock(:id)'), {'id': ADVISORY_LOCK_ID})
+        conn.commit()
+    except Exception:
+        pass
+
+
+def _apply(conn, report, label, bucket, fn):
+    # one transaction per change: a failure (e.g. a concurrent worker on
+    # SQLite got there first) doesn't undo the rest of the pass
+    try:
+        fn()
+        conn.commit()
+        bucket.append(label)
+    except Exception as e:
+        conn.rollback()
+        report.errors.append(f'{label}: {e.__class__.__name__}: {str(e).splitlines()[0]}')
+
+
+def sync_schema(engine, metadata):
+    """Bring `engine`'s schema up to `metadata` (additive changes only)."""
+    report = SchemaReport()
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        locked = _lock(conn)
+        try:
+            _sync(conn, metadata, report)
+        finally:
+            if locked:
+                _unlock(conn)
+    report.elapsed_ms = (time.perf_counter() - start) * 1000
+    return report
+
+
+def _sync(conn, metadata, report):
+    dialect = conn.dialect
+    insp = inspect(conn)
+    existing_tables = set(insp.get_table_names())
+
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            _apply(conn, report, table.name, report.tables_created,
+                   lambda t=table: t.create(bind=conn, checkfirst=True))
+            continue
+
+        live_columns = {c['name'] for c in insp.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in live_columns:
+                continue
+            if column.primary_key:
+                report.warnings.append(f'{table.name}.{column.name}: missing primary key column, not added')
+                continue
+            stmt, warning = column_ddl(column, dialect)
+            if warning:
+                report.warnings.append(warning)
+            _apply(conn, report, f'{table.name}.{column.name}', report.columns_added,
+                   lambda s=stmt: conn.execute(text(s)))
+        for name in sorted(live_columns - {c.name for c in table.columns}):
+            report.warnings.append(f'{table.name}.{name}: column not declared in the models')
+
+        live_indexes = {ix['name'] for ix in insp.get_indexes(table.name)}
+        live_indexes.update(uc['name'] for uc in insp.get_unique_constraints(table.name) if uc.get('name'))
+        for index in sorted(table.indexes, key=lambda ix: ix.name or ''):
+            if index.name in live_indexes:
+                continue
+            _apply(conn, report, index.name, report.indexes_created,
+                   lambda ix=index: ix.create(bind=conn, checkfirst=False))
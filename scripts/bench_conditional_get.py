@@ -0,0 +1,93 @@
+"""Benchmark: bytes and CPU saved by ETag / If-None-Match on catalogue reads.
+
+Replays N GETs per endpoint through the Flask test client, first as a
+client without validators (full 200 each time) and then as the SPA does
+after the first load (If-None-Match with the last ETag -> 304).
+
+Uso:
+    python scripts/bench_conditional_get.py [N] [--seed RUTINAS]
+
+--seed inserts a temporary trainer with that many public rutinas into the
+configured database and removes them at the end.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+from backend import app, db  # noqa: E402
+from backend.app import response_cache  # noqa: E402
+
+ENDPOINTS = ['/api/rutinas/public', '/api/planes', '/api/entrenadores']
+
+
+def seed(n):
+    from database.database import Usuario, Entrenador, Rutina
+    with app.app_context():
+        user = Usuario(email='bench-etag@test.local', nombre='Bench', hashed_password='x')
+        db.session.add(user)
+        db.session.flush()
+        ent = Entrenador(usuario_id=user.id)
+        db.session.add(ent)
+        db.session.flush()
+        db.session.execute(insert(Rutina), [
+            {'entrenador_id': ent.id, 'nombre': f'Bench {i}', 'descripcion': 'x' * 200,
+             'instrucciones_estructurales': 'y' * 1000, 'es_publica': True}
+            for i in range(n)
+        ])
+        db.session.commit()
+        return user.id, ent.id
+
+
+def unseed(usuario_id, entrenador_id):
+    from database.database import Usuario, Entrenador, Rutina
+    with app.app_context():
+        Rutina.query.filter_by(entrenador_id=entrenador_id).delete()
+        Entrenador.query.filter_by(id=entrenador_id).delete()
+        Usuario.query.filter_by(id=usuario_id).delete()
+        db.session.commit()
+
+
+def run(client, url, n, conditional):
+    sent = 0
+    etag = None
+    start = time.process_time()
+    for _ in range(n):
+        headers = {'If-None-Match': etag} if (conditional and etag) else {}
+        resp = client.get(url, headers=headers)
+        sent += len(resp.get_data())
+        etag = resp.headers.get('ETag') or etag
+    return sent, time.process_time() - start
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    n = int(args[0]) if args else 200
+    seeded = None
+    if '--seed' in sys.argv:
+        seeded = seed(int(sys.argv[sys.argv.index('--seed') + 1]))
+    try:
+        client = app.test_client()
+        modes = [
+            ('plain, no response cache', False, False),
+            ('plain, response cache   ', False, True),
+            ('if-none-match           ', True, True),
+        ]
+        for url in ENDPOINTS:
+            for label, conditional, cached in modes:
+                response_cache.clear()
+                response_cache.enabled = cached
+                sent, cpu = run(client, url, n, conditional)
+                print(f'{url:<20} {label} {n} req  {sent / 1024:10.1f} KiB  '
+                      f'{cpu * 1000 / n:7.3f} ms cpu/req')
+            response_cache.enabled = True
+    finally:
+        if seeded:
+            unseed(*seeded)
+
+
+if __name__ == '__main__':
+    main()
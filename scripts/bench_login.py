@@ -0,0 +1,88 @@
+"""Benchmark: latency of a burst of concurrent successful logins.
+
+Creates a few users on a throwaway SQLite file, then fires N logins from T
+threads through the Flask test client and reports p50/p99 latency plus the
+statements and commits issued per login. Passwords use a deliberately cheap
+hash so the numbers reflect the request's DB work, not the hash cost. Run it
+on two checkouts to compare.
+
+Uso:
+    python scripts/bench_login.py [N] [THREADS]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# hash barato y el mismo que se configura, para que el login no lo rehaga
+os.environ.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+# archivo desechable: la app crea el engine al importarse, así que se fija antes
+os.environ['SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench.sqlite')
+# mide el costo del login, no el rate limit (todas las requests salen de una IP)
+os.environ.setdefault('RATE_LIMIT_BACKEND', 'off')
+
+from sqlalchemy import event  # noqa: E402
+
+from backend import app, db  # noqa: E402
+from backend.passwords import hash_password  # noqa: E402
+
+USERS = 20
+PASSWORD = 'bench-pass'
+
+
+def _seed():
+    from database.database import Usuario, Cliente
+    hashed = hash_password(PASSWORD)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for i in range(USERS):
+            u = Usuario(email=f'bench{i}@test.local', nombre=f'B{i}', hashed_password=hashed)
+            db.session.add(u)
+            db.session.flush()
+            db.session.add(Cliente(usuario_id=u.id))
+        db.session.commit()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    _seed()
+    with app.app_context():
+        engine = db.engine
+    counts = {'statements': 0, 'commits': 0}
+
+    def _count(conn, cursor, statement, params, context, executemany):
+        counts['statements'] += 1
+
+    def _commit(conn):
+        counts['commits'] += 1
+
+    def one(i):
+        client = app.test_client()
+        body = json.dumps({'email': f'bench{i % USERS}@test.local', 'password': PASSWORD})
+        start = time.perf_counter()
+        rv = client.post('/api/usuarios/login', data=body, content_type='application/json')
+        elapsed = time.perf_counter() - start
+        assert rv.status_code == 200, rv.get_data(as_text=True)
+        return elapsed
+
+    event.listen(engine, 'before_cursor_execute', _count)
+    event.listen(engine, 'commit', _commit)
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            latencies = sorted(pool.map(one, range(n)))
+    finally:
+        event.remove(engine, 'before_cursor_execute', _count)
+        event.remove(engine, 'commit', _commit)
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f'{n} logins, {threads} threads: p50 {p50:.1f} ms, p99 {p99:.1f} ms, '
+          f"{counts['statements'] / n:.2f} statements/login, {counts['commits'] / n:.2f} commits/login")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark: hashes/sec per core for password hashing settings.
+
+Hashes a fixed password repeatedly on one thread for each method spec and
+reports hashes/sec (one core) plus ms per hash. A login verifies one hash,
+so hashes/sec per core is roughly the login ceiling per busy worker; the
+last column multiplies it by the host's cores. The configured setting
+(PASSWORD_HASH_METHOD / PASSWORD_HASH_COST) is always included and marked.
+
+Uso:
+    python scripts/bench_password_hash.py [SECONDS] [METHOD ...]
+
+Ejemplo:
+    python scripts/bench_password_hash.py 2 scrypt:16384:8:1 pbkdf2:sha256:600000
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from backend.passwords import HASH_METHOD, SALT_LENGTH, method_string  # noqa: E402
+
+CANDIDATES = (
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+    'scrypt:65536:8:1',
+    'pbkdf2:sha256:310000',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:1000000',
+)
+
+
+def rate(method, seconds):
+    n = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        generate_password_hash('bench-password', method=method, salt_length=SALT_LENGTH)
+        n += 1
+        now = time.perf_counter()
+        if now >= deadline:
+            return n / (now - start)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    methods = [method_string(m) for m in sys.argv[2:]] or list(CANDIDATES)
+    if HASH_METHOD not in methods:
+        methods.insert(0, HASH_METHOD)
+    cores = os.cpu_count() or 1
+    print(f'{"method":<26}{"hashes/s/core":>15}{"ms/hash":>10}{f"hashes/s x{cores}":>16}')
+    for method in methods:
+        per_core = rate(method, seconds)
+        mark = ' *' if method == HASH_METHOD else ''
+        print(f'{method + mark:<26}{per_core:>15.1f}{1000 / per_core:>10.1f}{per_core * cores:>16.0f}')
+    print('* configured')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Benchmark: per-request cost of the login rate limiter.
+
+Calls RateLimiter.check() for the login rules (one ip and one email bucket)
+N times per store, spreading the calls over KEYS distinct clients so the
+buckets never run dry, and reports microseconds per check. The SQLite store
+uses a throwaway file.
+
+Uso:
+    python scripts/bench_rate_limit.py [N] [KEYS]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.ratelimit import (RATE_LIMIT_DEFAULTS, Limit, MemoryBucketStore, RateLimiter,  # noqa: E402
+                               SQLiteBucketStore)
+
+
+def run(store, n, keys):
+    limiter = RateLimiter(store, {'login': Limit.parse_list(RATE_LIMIT_DEFAULTS['login'])})
+    limited = 0
+    start = time.perf_counter()
+    for i in range(n):
+        k = i % keys
+        limited += bool(limiter.check('login', ip=f'10.0.{k // 256}.{k % 256}', email=f'user{k}@test.local'))
+    elapsed = time.perf_counter() - start
+    return elapsed / n * 1e6, limited
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    keys = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    tmp = tempfile.mkdtemp()
+    for store in (MemoryBucketStore(), SQLiteBucketStore(os.path.join(tmp, 'rate_limit.sqlite'))):
+        per_check, limited = run(store, n, keys)
+        print(f'{store.name:<8} {per_check:8.1f} us/check  ({n} checks, {keys} clients, {limited} limited)')
+
+
+if __name__ == '__main__':
+    main()
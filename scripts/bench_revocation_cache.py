@@ -0,0 +1,63 @@
+"""Benchmark: revoked_tokens queries per authenticated request.
+
+Runs N requests against a `@jwt_required` endpoint through the Flask test
+client, once with the revocation cache disabled and once enabled, and counts
+SQL statements touching `revoked_tokens`.
+
+Uso:
+    python scripts/bench_revocation_cache.py [N]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+
+from backend import app, db  # noqa: E402
+from backend.auth import generate_token, revocation_cache  # noqa: E402
+
+
+def run(client, token, n):
+    counter = {'revoked': 0, 'total': 0}
+
+    def _count(conn, cursor, statement, params, context, executemany):
+        counter['total'] += 1
+        if 'revoked_tokens' in statement:
+            counter['revoked'] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _count)
+    try:
+        headers = {'Authorization': f'Bearer {token}'}
+        start = time.perf_counter()
+        for _ in range(n):
+            client.get('/api/usuarios/999999', headers=headers)
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, 'before_cursor_execute', _count)
+    return counter, elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    token = generate_token({'user_id': 1, 'role': 'admin', 'email': 'bench@test.local'})
+
+    for enabled in (False, True):
+        revocation_cache.clear()
+        revocation_cache.enabled = enabled
+        counter, elapsed = run(client, token, n)
+        label = 'cache on ' if enabled else 'cache off'
+        print(f"{label}: {n} requests, {counter['revoked']} revoked_tokens queries "
+              f"({counter['revoked'] / n:.3f}/req), {counter['total'] / n:.2f} queries/req, "
+              f"{elapsed * 1000 / n:.3f} ms/req")
+    print('stats:', revocation_cache.stats())
+
+
+if __name__ == '__main__':
+    main()
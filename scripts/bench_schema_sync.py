@@ -0,0 +1,125 @@
+"""Benchmark: startup time and per-request cost of schema maintenance.
+
+Measures
+- startup: wall time of `import backend.app` in a fresh interpreter (median
+  of N runs), i.e. what every gunicorn worker pays on boot;
+- requests: latency and number of DDL statements (CREATE/ALTER/DROP) issued
+  by handlers that used to repair the schema inline.
+
+Uso:
+    python scripts/bench_schema_sync.py [N]
+
+Inserts a temporary trainer/cliente with one rutina and one plan into the
+configured database and removes them at the end.
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from sqlalchemy import event  # noqa: E402
+
+from backend import app, db  # noqa: E402
+from backend.auth import generate_token  # noqa: E402
+
+DDL = re.compile(r'^\s*(CREATE|ALTER|DROP)\b', re.IGNORECASE)
+
+
+def startup_times(runs):
+    code = 'import time; t = time.perf_counter(); import backend.app; print(time.perf_counter() - t)'
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, capture_output=True, text=True)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return times
+
+
+def seed():
+    from database.database import Usuario, Entrenador, Cliente, Rutina, PlanAlimenticio
+    with app.app_context():
+        trainer = Usuario(email='bench-schema-t@test.local', nombre='Bench T', hashed_password='x')
+        cliente_user = Usuario(email='bench-schema-c@test.local', nombre='Bench C', hashed_password='x')
+        db.session.add_all([trainer, cliente_user])
+        db.session.flush()
+        ent = Entrenador(usuario_id=trainer.id)
+        cli = Cliente(usuario_id=cliente_user.id)
+        db.session.add_all([ent, cli])
+        db.session.flush()
+        rutina = Rutina(entrenador_id=ent.id, nombre='Bench', es_publica=True)
+        plan = PlanAlimenticio(entrenador_id=ent.id, nombre='Bench', es_publico=True)
+        db.session.add_all([rutina, plan])
+        db.session.commit()
+        return {'trainer': trainer.id, 'cliente_user': cliente_user.id, 'entrenador': ent.id,
+                'cliente': cli.id, 'rutina': rutina.id, 'plan': plan.id}
+
+
+def unseed(ids):
+    from database.database import Usuario, Entrenador, Cliente, Rutina, PlanAlimenticio, SolicitudPlan
+    with app.app_context():
+        SolicitudPlan.query.filter_by(cliente_id=ids['cliente']).delete()
+        Rutina.query.filter_by(id=ids['rutina']).delete()
+        PlanAlimenticio.query.filter_by(id=ids['plan']).delete()
+        Cliente.query.filter_by(id=ids['cliente']).delete()
+        Entrenador.query.filter_by(id=ids['entrenador']).delete()
+        Usuario.query.filter(Usuario.id.in_([ids['trainer'], ids['cliente_user']])).delete()
+        db.session.commit()
+
+
+def measure(client, method, url, headers, n):
+    counter = {'ddl': 0}
+
+    def _count(conn, cursor, statement, params, context, executemany):
+        if DDL.match(statement):
+            counter['ddl'] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _count)
+    try:
+        start = time.perf_counter()
+        for _ in range(n):
+            client.open(url, method=method, headers=headers)
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, 'before_cursor_execute', _count)
+    return elapsed * 1000 / n, counter['ddl'] / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    times = startup_times(5)
+    print(f'startup: median {statistics.median(times) * 1000:.1f} ms '
+          f'(min {min(times) * 1000:.1f}, max {max(times) * 1000:.1f}) over {len(times)} runs')
+
+    ids = seed()
+    try:
+        from backend.app import response_cache
+        response_cache.enabled = False
+        client = app.test_client()
+        admin = {'Authorization': 'Bearer ' + generate_token({'user_id': 1, 'role': 'admin', 'email': 'admin@test.local'})}
+        cliente = {'Authorization': 'Bearer ' + generate_token(
+            {'user_id': ids['cliente_user'], 'role': 'cliente', 'email': 'bench-schema-c@test.local'})}
+        trainer = {'Authorization': 'Bearer ' + generate_token(
+            {'user_id': ids['trainer'], 'role': 'entrenador', 'email': 'bench-schema-t@test.local'})}
+        cases = [
+            ('GET', '/api/rutinas/public', {}),
+            ('GET', '/api/planes', {}),
+            ('GET', f"/api/rutinas/{ids['trainer']}", trainer),
+            ('GET', '/api/admin/usuarios', admin),
+            ('POST', f"/api/rutinas/{ids['rutina']}/solicitar", cliente),
+            ('POST', f"/api/planes/{ids['plan']}/solicitar", cliente),
+        ]
+        for method, url, headers in cases:
+            ms, ddl = measure(client, method, url, headers, n)
+            print(f'{method:<4} {url:<32} {ms:8.3f} ms/req  {ddl:5.2f} DDL stmts/req')
+    finally:
+        unseed(ids)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Load test: catalogue latency during a login flood, inline vs hash pool.
+
+Serves the app from a threaded werkzeug server (like gunicorn gthread) on a
+throwaway SQLite file. One client polls /api/rutinas/public while FLOOD
+threads post logins as fast as they can, using the configured hash
+(PASSWORD_HASH_METHOD / PASSWORD_HASH_COST). It runs three phases:
+
+- baseline: no flood.
+- inline: the flood hashes on the request threads (PASSWORD_HASH_POOL=0).
+- pool: the flood goes through a HashPool of WORKERS processes with the
+  default queue limit; logins over the limit get 503 + Retry-After.
+
+For each phase it prints catalogue p50/p99 and the login outcomes.
+
+Uso:
+    python scripts/loadtest_login_flood.py [SECONDS] [FLOOD] [WORKERS]
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# archivo desechable: la app crea el engine al importarse, así que se fija antes
+os.environ['SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(), 'flood.sqlite')
+
+from sqlalchemy import insert  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+
+from backend import app, db, passwords  # noqa: E402
+from backend.passwords import HashPool, hash_password  # noqa: E402
+
+USERS = 8
+PASSWORD = 'flood-pass'
+
+
+def seed(rutinas=200):
+    from database.database import Usuario, Cliente, Entrenador, Rutina
+    hashed = hash_password(PASSWORD)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for i in range(USERS):
+            u = Usuario(email=f'flood{i}@test.local', nombre=f'F{i}', hashed_password=hashed)
+            db.session.add(u)
+            db.session.flush()
+            db.session.add(Cliente(usuario_id=u.id))
+        trainer = Usuario(email='flood-trainer@test.local', nombre='T', hashed_password=hashed)
+        db.session.add(trainer)
+        db.session.flush()
+        ent = Entrenador(usuario_id=trainer.id)
+        db.session.add(ent)
+        db.session.flush()
+        db.session.execute(insert(Rutina), [{'entrenador_id': ent.id, 'nombre': f'R{i}', 'descripcion': 'x' * 200,
+                                             'es_publica': True} for i in range(rutinas)])
+        db.session.commit()
+
+
+def _request(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def phase(base, seconds, flood):
+    stop = threading.Event()
+    outcomes = {}
+    lock = threading.Lock()
+
+    def login_loop(i):
+        body = {'email': f'flood{i % USERS}@test.local', 'password': PASSWORD}
+        while not stop.is_set():
+            status = _request(base + '/api/usuarios/login', body)
+            with lock:
+                outcomes[status] = outcomes.get(status, 0) + 1
+            if status == 503:
+                time.sleep(0.05)
+
+    threads = [threading.Thread(target=login_loop, args=(i,), daemon=True) for i in range(flood)]
+    for t in threads:
+        t.start()
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        assert _request(base + '/api/rutinas/public') == 200
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.01)
+    stop.set()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    return p50, p99, len(latencies), outcomes
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    flood = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    seed()
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    print(f'{passwords.HASH_METHOD}, {os.cpu_count()} cores, {flood} flood threads, {seconds:.0f}s per phase')
+
+    pool = HashPool(workers)
+    pool.run(len, '')  # arranca el pool antes de medir
+    try:
+        for name, hash_pool, n in (('baseline', None, 0), ('inline', None, flood), (f'pool x{workers}', pool, flood)):
+            passwords.hash_pool = hash_pool
+            p50, p99, reads, outcomes = phase(base, seconds, n)
+            logins = ', '.join(f'{k}: {v}' for k, v in sorted(outcomes.items())) or '-'
+            print(f'{name:<10} catalogue p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  ({reads} reads)  logins {logins}')
+    finally:
+        passwords.hash_pool = None
+        pool.shutdown()
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
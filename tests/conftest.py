@@ -1,12 +1,20 @@
-import pytest
+import os
 import tempfile
-from backend import app, db
+
+import pytest
+
+# The engine is built by init_app when backend.app is imported, so the test
+# database has to be chosen before that import; setting
+# SQLALCHEMY_DATABASE_URI afterwards would leave the tests writing to
+# database/entrenapro.db.
+os.environ.setdefault('SQLITE_PATH', os.path.join(tempfile.mkdtemp(prefix='entrenapro-tests-'), 'test_db.sqlite'))
+
+from backend import app, db  # noqa: E402
+from helpers import SQLCapture  # noqa: E402
+
 
 @pytest.fixture(scope='function')
-def client(tmp_path, monkeypatch):
-    # Use a temporary sqlite file for isolation
-    db_file = tmp_path / "test_db.sqlite"
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_file.as_posix()}"
+def client(monkeypatch):
     app.config['TESTING'] = True
     # Recreate schema
     with app.app_context():
@@ -15,6 +23,21 @@ def client(tmp_path, monkeypatch):
         except Exception:
             pass
         db.create_all()
+        # the default admin is seeded at import time; drop_all removed it
+        from backend.app import _seed_admin
+        _seed_admin()
+    # cached catalogue responses belong to the previous test's database
+    from backend.app import login_lockout, rate_limiter, response_cache
+    response_cache.clear()
+    # failed-login windows and rate-limit buckets from earlier tests
+    for store in (login_lockout.store, rate_limiter.store):
+        if store is not None:
+            store.clear()
     client = app.test_client()
     yield client
-    # teardown happens via tmp_path cleanup
+
+
+@pytest.fixture
+def sql_statements(client):
+    """SQLCapture (tests/helpers.py) sobre la base del test: `with sql_statements: ...`."""
+    return SQLCapture()
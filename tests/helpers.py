@@ -0,0 +1,65 @@
+"""Utilidades comunes de los tests: filas de prueba, cabeceras JWT y captura de SQL.
+
+Los módulos de test las importan directamente (``from helpers import ...``);
+el fixture `sql_statements` de conftest.py envuelve `SQLCapture`.
+"""
+from sqlalchemy import event
+
+from backend import app, db
+from backend.auth import generate_token
+from database.database import Cliente, Entrenador, Usuario
+
+
+def auth_headers(usuario_id, role, email=None):
+    """Cabecera Authorization con un JWT para este usuario y rol."""
+    token = generate_token({'user_id': usuario_id, 'role': role, 'email': email or f'{role}@test.local'})
+    return {'Authorization': f'Bearer {token}'}
+
+
+def seed_usuario(email, nombre=None, entrenador=False, cliente=False, **fields):
+    """Usuario con sus filas Entrenador/Cliente opcionales; hace flush, no commit.
+
+    Requiere un app context. `entrenador` puede ser un dict con columnas de
+    Entrenador (p. ej. {'speciality': 'fuerza'}). Devuelve (usuario, entrenador,
+    cliente), con None para las filas no pedidas.
+    """
+    fields.setdefault('hashed_password', 'x')
+    user = Usuario(email=email, nombre=nombre or email.split('@')[0], **fields)
+    db.session.add(user)
+    db.session.flush()
+    ent = Entrenador(usuario_id=user.id, **(entrenador if isinstance(entrenador, dict) else {})) if entrenador else None
+    cli = Cliente(usuario_id=user.id) if cliente else None
+    db.session.add_all([row for row in (ent, cli) if row is not None])
+    db.session.flush()
+    return user, ent, cli
+
+
+class SQLCapture:
+    """Sentencias (con sus parámetros) y commits del engine de la app dentro de `with`.
+
+    Cada bloque `with` empieza con listas nuevas; una lista leída tras un
+    bloque anterior conserva las sentencias de ese bloque.
+    """
+
+    def __init__(self):
+        with app.app_context():
+            self.engine = db.engine
+        self.statements, self.parameters, self.commits = [], [], 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+    def __enter__(self):
+        self.statements, self.parameters, self.commits = [], [], 0
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        event.listen(self.engine, 'commit', self._on_commit)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+        event.remove(self.engine, 'commit', self._on_commit)
+        return False
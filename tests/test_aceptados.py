@@ -0,0 +1,109 @@
+from sqlalchemy import insert, text
+
+from backend import app, db
+from database import content_stats
+from helpers import auth_headers, seed_usuario
+
+
+def _seed_small():
+    from database.database import Rutina, PlanAlimenticio, SolicitudPlan, ClienteRutina
+    with app.app_context():
+        trainer, ent, _ = seed_usuario('acc0@test.local', 'U0', entrenador=True)
+        u1, _, c1 = seed_usuario('acc1@test.local', 'U1', cliente=True)
+        u2, _, c2 = seed_usuario('acc2@test.local', 'U2', cliente=True)
+        seed_usuario('acc3@test.local', 'U3', entrenador=True)
+        rutina = Rutina(entrenador_id=ent.id, nombre='R1', link_url='https://x.test/r1')
+        vacia = Rutina(entrenador_id=ent.id, nombre='R2')
+        plan = PlanAlimenticio(entrenador_id=ent.id, nombre='P1')
+        db.session.add_all([rutina, vacia, plan])
+        db.session.flush()
+        db.session.add_all([
+            SolicitudPlan(cliente_id=c1.id, rutina_id=rutina.id, estado='aceptado'),
+            SolicitudPlan(cliente_id=c2.id, rutina_id=rutina.id, estado='aceptado'),
+            SolicitudPlan(cliente_id=c2.id, rutina_id=vacia.id, estado='pendiente'),
+            SolicitudPlan(cliente_id=c1.id, plan_id=plan.id, estado='aceptado'),
+            ClienteRutina(cliente_id=c2.id, rutina_id=rutina.id),
+        ])
+        # seeded behind the handlers' back: recompute the counters
+        content_stats.rebuild(db.session)
+        db.session.commit()
+        return {'trainer_user': trainer.id, 'ent': ent.id, 'rutina': rutina.id, 'vacia': vacia.id,
+                'plan': plan.id, 'c1': c1.id, 'c2': c2.id, 'u1': u1.id, 'u2': u2.id}
+
+
+def test_entrenador_aceptados_schema(client):
+    ids = _seed_small()
+    rv = client.get('/api/entrenador/aceptados', headers=auth_headers(ids['trainer_user'], 'entrenador'))
+    assert rv.status_code == 200
+    data = rv.get_json()
+    by_id = {r['id']: r for r in data['rutinas']}
+    assert by_id[ids['rutina']] == {
+        'id': ids['rutina'], 'nombre': 'R1', 'accepted_count': 2, 'saved_count': 1, 'pending_count': 0,
+        'link_url': 'https://x.test/r1',
+        'accepted_clients': [{'cliente_id': ids['c1'], 'usuario_id': ids['u1'], 'nombre': 'U1'},
+                             {'cliente_id': ids['c2'], 'usuario_id': ids['u2'], 'nombre': 'U2'}],
+    }
+    assert by_id[ids['vacia']]['accepted_count'] == 0
+    assert by_id[ids['vacia']]['saved_count'] == 0
+    assert by_id[ids['vacia']]['pending_count'] == 1
+    assert data['planes'] == [{'id': ids['plan'], 'nombre': 'P1', 'accepted_count': 1, 'pending_count': 0,
+                               'accepted_clients': [{'cliente_id': ids['c1'], 'usuario_id': ids['u1'], 'nombre': 'U1'}]}]
+
+
+def test_admin_aceptados_schema(client):
+    ids = _seed_small()
+    rv = client.get('/api/admin/entrenadores/aceptados', headers=auth_headers(1, 'admin'))
+    assert rv.status_code == 200
+    ents = {e['entrenador_id']: e for e in rv.get_json()}
+    ent = ents[ids['ent']]
+    assert ent['usuario_id'] == ids['trainer_user'] and ent['nombre'] == 'U0'
+    rutina = next(r for r in ent['rutinas'] if r['id'] == ids['rutina'])
+    assert rutina['accepted_count'] == 2
+    assert rutina['saved_users'] == [{'cliente_id': ids['c2'], 'usuario_id': ids['u2'], 'nombre': 'U2'}]
+    assert ent['planes'][0]['accepted_count'] == 1
+    # trainers with no content are listed too
+    assert any(e['rutinas'] == [] and e['planes'] == [] for e in ents.values())
+
+
+def test_admin_aceptados_query_count_is_constant(client, sql_statements):
+    from database.database import (Usuario, Entrenador, Cliente, Rutina, PlanAlimenticio,
+                                   SolicitudPlan, ClienteRutina)
+    n_trainers, n_clientes = 500, 200
+    with app.app_context():
+        first = db.session.execute(text('SELECT COALESCE(MAX(id), 0) FROM usuarios')).scalar() + 1
+        db.session.execute(insert(Usuario), [
+            {'id': first + i, 'email': f'agg{i}@test.local', 'nombre': f'A{i}', 'hashed_password': 'x'}
+            for i in range(n_trainers + n_clientes)
+        ])
+        db.session.execute(insert(Entrenador), [{'usuario_id': first + i} for i in range(n_trainers)])
+        db.session.execute(insert(Cliente), [{'usuario_id': first + n_trainers + i} for i in range(n_clientes)])
+        ent_ids = [r[0] for r in db.session.execute(text('SELECT id FROM entrenadores ORDER BY id'))]
+        cli_ids = [r[0] for r in db.session.execute(text('SELECT id FROM clientes ORDER BY id'))]
+        db.session.execute(insert(Rutina), [{'entrenador_id': e, 'nombre': f'R{e}-{j}'} for e in ent_ids for j in range(3)])
+        db.session.execute(insert(PlanAlimenticio), [{'entrenador_id': e, 'nombre': f'P{e}'} for e in ent_ids])
+        rutina_ids = [r[0] for r in db.session.execute(text('SELECT id FROM rutinas'))]
+        plan_ids = [r[0] for r in db.session.execute(text('SELECT id FROM planes_alimenticios'))]
+        db.session.execute(insert(SolicitudPlan), [
+            {'cliente_id': cli_ids[i % n_clientes], 'rutina_id': r, 'estado': 'aceptado'}
+            for i, r in enumerate(rutina_ids)
+        ] + [
+            {'cliente_id': cli_ids[i % n_clientes], 'plan_id': p, 'estado': 'aceptado'}
+            for i, p in enumerate(plan_ids)
+        ])
+        db.session.execute(insert(ClienteRutina), [
+            {'cliente_id': cli_ids[i % n_clientes], 'rutina_id': r} for i, r in enumerate(rutina_ids)
+        ])
+        content_stats.rebuild(db.session)
+        db.session.commit()
+
+    headers = auth_headers(1, 'admin')
+    with sql_statements:
+        rv = client.get('/api/admin/entrenadores/aceptados', headers=headers)
+    statements = sql_statements.statements
+    assert rv.status_code == 200
+    data = rv.get_json()
+    assert len(data) >= n_trainers
+    assert sum(r['accepted_count'] for e in data for r in e['rutinas']) == len(rutina_ids)
+    assert sum(r['saved_count'] for e in data for r in e['rutinas']) == len(rutina_ids)
+    # token revocation check + five report queries, independent of the data size
+    assert len(statements) <= 7, len(statements)
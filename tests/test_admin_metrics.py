@@ -0,0 +1,179 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend import app, db
+from helpers import auth_headers, seed_usuario
+
+# la consulta de métricas no debe disparar avisos de SQLAlchemy (p. ej. columnas sin nombre)
+pytestmark = pytest.mark.filterwarnings('error::sqlalchemy.exc.SAWarning')
+
+
+def _admin():
+    return auth_headers(1, 'admin')
+
+
+def _seed():
+    from database.database import Rutina, PlanAlimenticio, SolicitudPlan, Medicion
+    now = datetime.utcnow()
+    with app.app_context():
+        # met0: entrenador, met1: cliente, met2: ambos, met3: sin rol
+        _, ent, _ = seed_usuario('met0@test.local', 'M0', entrenador=True)
+        _, _, c1 = seed_usuario('met1@test.local', 'M1', cliente=True)
+        _, _, c2 = seed_usuario('met2@test.local', 'M2', entrenador=True, cliente=True)
+        seed_usuario('met3@test.local', 'M3')
+        r = Rutina(entrenador_id=ent.id, nombre='pub', es_publica=True)
+        db.session.add_all([r, Rutina(entrenador_id=ent.id, nombre='priv', es_publica=False),
+                            PlanAlimenticio(entrenador_id=ent.id, nombre='p', es_publico=True)])
+        db.session.flush()
+        db.session.add_all([
+            SolicitudPlan(cliente_id=c1.id, rutina_id=r.id, estado='aceptado'),
+            SolicitudPlan(cliente_id=c2.id, rutina_id=r.id, estado='pendiente'),
+            SolicitudPlan(cliente_id=c2.id, rutina_id=r.id, estado='pendiente'),
+            Medicion(cliente_id=c1.id, peso=70, creado_en=now - timedelta(days=1)),
+            Medicion(cliente_id=c1.id, peso=71, creado_en=now - timedelta(days=30)),
+        ])
+        db.session.commit()
+
+
+def test_live_metrics_single_query(client, sql_statements):
+    _seed()
+    headers = _admin()
+    client.get('/api/admin/metrics', headers=headers)  # warm the revocation cache
+    with sql_statements:
+        rv = client.get('/api/admin/metrics', headers=headers)
+    assert rv.status_code == 200
+    assert len(sql_statements.statements) == 1
+    m = rv.get_json()
+    # the seeded admin is cliente + entrenador too
+    assert m['total_users'] == 5
+    assert (m['total_clientes'], m['total_entrenadores'], m['both_roles']) == (3, 3, 2)
+    assert (m['clientes_only'], m['entrenadores_only']) == (1, 1)
+    assert m['rutinas'] == {'total': 2, 'publicas': 1, 'privadas': 1}
+    assert m['planes'] == {'total': 1, 'publicos': 1}
+    assert m['solicitudes'] == {'pendiente': 2, 'aceptado': 1, 'rechazado': 0, 'cancelado': 0}
+    assert m['mediciones_7d'] == 1
+    assert m['source'] == 'live'
+
+
+def test_snapshot_mode(client):
+    _seed()
+    headers = _admin()
+    first = client.get('/api/admin/metrics?source=snapshot', headers=headers).get_json()
+    assert first['total_users'] == 5 and first['source'] == 'snapshot'
+
+    with app.app_context():
+        from database.database import Usuario
+        db.session.add(Usuario(email='late@test.local', nombre='L', hashed_password='x'))
+        db.session.commit()
+
+    # served from the stored row until it is refreshed
+    again = client.get('/api/admin/metrics?source=snapshot', headers=headers).get_json()
+    assert again['total_users'] == 5 and again['generated_at'] == first['generated_at']
+    rv = client.post('/api/admin/metrics/refresh', headers=headers)
+    assert rv.status_code == 200 and rv.get_json()['total_users'] == 6
+    assert client.get('/api/admin/metrics?source=snapshot', headers=headers).get_json()['total_users'] == 6
+
+    assert client.get('/api/admin/metrics?source=bogus', headers=headers).status_code == 400
+
+
+def test_snapshot_max_age(client):
+    from database.metrics import read_snapshot, refresh_snapshot
+    with app.app_context():
+        then = datetime(2025, 1, 1)
+        refresh_snapshot(db.session, now=then)
+        db.session.commit()
+        assert read_snapshot(db.session, timedelta(minutes=5), now=then + timedelta(minutes=1)) is not None
+        assert read_snapshot(db.session, timedelta(minutes=5), now=then + timedelta(minutes=10)) is None
+        assert read_snapshot(db.session)['generated_at'] == then.isoformat()
+
+
+def _seed_days(base):
+    from database.database import Rutina, SolicitudPlan, Medicion
+    with app.app_context():
+        _, ent, _ = seed_usuario('hist-t@test.local', 'T', entrenador=True, creado_en=base)
+        _, _, cli = seed_usuario('hist-c@test.local', 'C', cliente=True, creado_en=base + timedelta(days=1))
+        r = Rutina(entrenador_id=ent.id, nombre='R', creado_en=base + timedelta(hours=5))
+        db.session.add(r)
+        db.session.flush()
+        db.session.add_all([
+            SolicitudPlan(cliente_id=cli.id, rutina_id=r.id, estado='aceptado', creado_en=base + timedelta(days=1)),
+            SolicitudPlan(cliente_id=cli.id, rutina_id=r.id, estado='pendiente', creado_en=base + timedelta(days=8)),
+            Medicion(cliente_id=cli.id, peso=70, creado_en=base + timedelta(days=8, hours=23)),
+        ])
+        db.session.commit()
+
+
+def test_rollup_is_incremental_and_history_reads_rollups(client, sql_statements):
+    from database.database import MetricsDaily, Usuario
+    from database.metrics import rollup_days
+    # the seeded admin was created "now"; pin it to the first day
+    base = datetime(2025, 3, 3)  # a Monday
+    with app.app_context():
+        Usuario.query.update({Usuario.creado_en: base})
+        db.session.commit()
+    _seed_days(base)
+
+    with app.app_context():
+        assert rollup_days(db.session, today=(base + timedelta(days=2)).date()) == 2
+        db.session.commit()
+        assert rollup_days(db.session, today=(base + timedelta(days=2)).date()) == 0
+        # later run only covers the days after the watermark
+        assert rollup_days(db.session, today=(base + timedelta(days=10)).date()) == 8
+        db.session.commit()
+        assert MetricsDaily.query.count() == 10
+
+    headers = _admin()
+    rv = client.get('/api/admin/metrics/history?from=2025-03-03&to=2025-03-12', headers=headers)
+    assert rv.status_code == 200
+    series = rv.get_json()['series']
+    assert [p['bucket'] for p in series][:3] == ['2025-03-03', '2025-03-04', '2025-03-05']
+    assert (series[0]['new_users'], series[0]['new_rutinas']) == (2, 1)
+    assert (series[1]['new_users'], series[1]['solicitudes_creadas'], series[1]['solicitudes_aceptadas']) == (1, 1, 1)
+    assert (series[8]['solicitudes_creadas'], series[8]['mediciones']) == (1, 1)
+
+    # the raw tables are never read by the endpoint
+    with sql_statements:
+        rv = client.get('/api/admin/metrics/history?from=2025-03-01&to=2025-03-16&bucket=week', headers=headers)
+    weeks = rv.get_json()['series']
+    assert [w['bucket'] for w in weeks] == ['2025-03-03', '2025-03-10']
+    assert weeks[0]['new_users'] == 3 and weeks[1]['mediciones'] == 1
+    data_reads = [s for s in sql_statements.statements if 'revoked_tokens' not in s]
+    assert data_reads and all('metrics_daily' in s for s in data_reads)
+
+    assert client.get('/api/admin/metrics/history?bucket=month', headers=headers).status_code == 400
+    assert client.get('/api/admin/metrics/history?from=2025-13-01', headers=headers).status_code == 400
+
+
+def test_rollup_counts_acceptance_on_the_day_it_happens(client):
+    from database.database import PlanAlimenticio, SolicitudPlan, MetricsDaily
+    from database.metrics import rollup_days
+    today = datetime.utcnow().date()
+    created = datetime.combine(today - timedelta(days=3), datetime.min.time()) + timedelta(hours=12)
+    with app.app_context():
+        t, ent, _ = seed_usuario('acc-t@test.local', 'T', entrenador=True)
+        _, _, cli = seed_usuario('acc-c@test.local', 'C', cliente=True)
+        plan = PlanAlimenticio(entrenador_id=ent.id, nombre='P')
+        db.session.add(plan)
+        db.session.flush()
+        sol = SolicitudPlan(cliente_id=cli.id, plan_id=plan.id, estado='pendiente', creado_en=created)
+        db.session.add(sol)
+        db.session.commit()
+        trainer_id, sol_id = t.id, sol.id
+        # el día de creación ya quedó escrito antes de la aceptación
+        rollup_days(db.session, today=today - timedelta(days=1))
+        db.session.commit()
+
+    rv = client.put(f'/api/solicitudes/{sol_id}', data=json.dumps({'estado': 'aceptado'}),
+                    content_type='application/json',
+                    headers=auth_headers(trainer_id, 'entrenador', 'acc-t@test.local'))
+    assert rv.status_code == 200
+
+    with app.app_context():
+        assert db.session.get(SolicitudPlan, sol_id).aceptado_en.date() == today
+        rollup_days(db.session, today=today + timedelta(days=1))
+        db.session.commit()
+        counts = {r.dia: (r.solicitudes_creadas, r.solicitudes_aceptadas) for r in MetricsDaily.query.all()}
+    assert counts[created.date()] == (1, 0)
+    assert counts[today] == (0, 1)
@@ -22,3 +22,24 @@ def test_token_expiration():
     # wait for it to expire
     time.sleep(1.5)
     assert decode_token(token) is None
+
+
+def test_decode_memo_hits_and_returns_copies():
+    from backend.auth import decode_memo
+    decode_memo.clear()
+    token = generate_token({'user_id': 3, 'role': 'cliente'}, expires_in=30)
+    first = decode_token(token)
+    first['role'] = 'admin'
+    second = decode_token(token)
+    assert second['role'] == 'cliente'
+    stats = decode_memo.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+
+def test_decode_memo_invalidated_by_secret_rotation(monkeypatch):
+    from backend import auth
+    auth.decode_memo.clear()
+    token = generate_token({'user_id': 4}, expires_in=30)
+    assert decode_token(token) is not None
+    monkeypatch.setattr(auth, 'JWT_SECRET', 'rotated-secret')
+    assert decode_token(token) is None
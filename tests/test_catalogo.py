@@ -0,0 +1,112 @@
+import json
+
+from sqlalchemy import insert, text
+
+from backend import app, catalogo, db
+from database.database import CatalogoPublico, PlanAlimenticio, Rutina
+from database.purge import purge_usuarios
+from helpers import auth_headers, seed_usuario
+
+ADMIN = auth_headers(1, 'admin')
+
+
+def _seed():
+    with app.app_context():
+        user, ent, _ = seed_usuario('cat@test.local', 'Coach Cat', entrenador=True)
+        rutina = Rutina(entrenador_id=ent.id, nombre='Pierna', nivel='Básico')
+        plan = PlanAlimenticio(entrenador_id=ent.id, nombre='Volumen')
+        db.session.add_all([rutina, plan])
+        db.session.commit()
+        return user.id, rutina.id, plan.id
+
+
+def _seed_other():
+    with app.app_context():
+        user, ent, _ = seed_usuario('otro@test.local', 'Otro', entrenador=True)
+        rutina = Rutina(entrenador_id=ent.id, nombre='Torso', es_publica=True)
+        db.session.add(rutina)
+        db.session.flush()
+        catalogo.sync(db.session, 'rutina', rutina.id)
+        db.session.commit()
+        return user.id, rutina.id, ent.id
+
+
+def _trainer(user_id):
+    return auth_headers(user_id, 'entrenador', 'cat@test.local')
+
+
+def _check():
+    with app.app_context():
+        return catalogo.check(db.session)
+
+
+def _clean(report):
+    return not (report['missing'] or report['extra'] or report['stale'])
+
+
+def test_catalogo_follows_review_edit_and_deactivation(client):
+    user_id, rutina_id, plan_id = _seed()
+    assert client.get('/api/rutinas/public').get_json() == []
+
+    assert client.post(f'/api/admin/review/rutina/{rutina_id}/approve', headers=ADMIN).status_code == 200
+    assert client.post(f'/api/admin/review/plan/{plan_id}/approve', headers=ADMIN).status_code == 200
+    [rutina] = client.get('/api/rutinas/public').get_json()
+    assert (rutina['id'], rutina['nombre'], rutina['es_publica']) == (rutina_id, 'Pierna', True)
+    assert rutina['entrenador_nombre'] == 'Coach Cat' and rutina['entrenador_usuario_id'] == user_id
+    [plan] = client.get('/api/planes').get_json()
+    assert (plan['id'], plan['es_publico']) == (plan_id, True)
+
+    rv = client.put(f'/api/rutinas/{rutina_id}', data=json.dumps({'nombre': 'Pierna 2', 'nivel': 'Avanzado'}),
+                    content_type='application/json', headers=_trainer(user_id))
+    assert rv.status_code == 200
+    assert [r['nombre'] for r in client.get('/api/rutinas/public?nivel=Avanzado').get_json()] == ['Pierna 2']
+    report = _check()
+    assert _clean(report) and report['rows'] == 2
+
+    assert client.delete(f'/api/admin/usuarios/{user_id}', headers=ADMIN).status_code == 200
+    assert client.get('/api/rutinas/public').get_json() == []
+    assert client.get('/api/planes').get_json() == []
+    assert _clean(_check())
+
+
+def test_reject_delete_and_purge_remove_rows(client):
+    user_id, rutina_id, plan_id = _seed()
+    for tipo, content_id in (('rutina', rutina_id), ('plan', plan_id)):
+        client.post(f'/api/admin/review/{tipo}/{content_id}/approve', headers=ADMIN)
+
+    assert client.post(f'/api/admin/review/plan/{plan_id}/reject', headers=ADMIN).status_code == 200
+    assert client.get('/api/planes').get_json() == []
+    assert client.delete(f'/api/rutinas/{rutina_id}', headers=_trainer(user_id)).status_code == 200
+    assert client.get('/api/rutinas/public').get_json() == []
+    assert _check()['rows'] == 0
+
+    # hard delete (database/purge.py) también borra las filas del catálogo
+    other_user_id, _, _ = _seed_other()
+    with app.app_context():
+        assert db.session.query(CatalogoPublico).count() == 1
+        purge_usuarios(db.session, [other_user_id])
+        db.session.commit()
+        assert db.session.query(CatalogoPublico).count() == 0
+
+
+def test_check_reports_drift_and_rebuild_repairs_it(client):
+    _, rutina_id, ent_id = _seed_other()
+    with app.app_context():
+        # escrituras por fuera de la app: una rutina nueva, un nombre cambiado y una fila huérfana
+        db.session.execute(insert(Rutina), [{'entrenador_id': ent_id, 'nombre': 'Bulk', 'es_publica': True}])
+        db.session.execute(text('UPDATE rutinas SET nombre = :n WHERE id = :id'), {'n': 'Torso 2', 'id': rutina_id})
+        db.session.execute(insert(CatalogoPublico), [{'tipo': 'plan', 'content_id': 999, 'entrenador_id': ent_id,
+                                                      'entrenador_usuario_id': 0, 'nombre': 'x'}])
+        db.session.commit()
+        bulk_id = db.session.execute(text("SELECT id FROM rutinas WHERE nombre = 'Bulk'")).scalar()
+
+    report = _check()
+    assert report['missing'] == [('rutina', bulk_id)]
+    assert report['extra'] == [('plan', 999)]
+    assert report['stale'] == [('rutina', rutina_id)]
+
+    with app.app_context():
+        assert catalogo.rebuild(db.session) == 2
+        db.session.commit()
+    assert _clean(_check())
+    assert sorted(r['nombre'] for r in client.get('/api/rutinas/public').get_json()) == ['Bulk', 'Torso 2']
@@ -0,0 +1,79 @@
+import pytest
+
+from backend import app, db
+from helpers import auth_headers, seed_usuario
+
+# sin avisos de SQLAlchemy (p. ej. producto cartesiano en el INSERT ... SELECT)
+pytestmark = pytest.mark.filterwarnings('error::sqlalchemy.exc.SAWarning')
+
+
+def _seed():
+    from database.database import Rutina
+    with app.app_context():
+        _, ent, _ = seed_usuario('cr-t@test.local', 'T', entrenador=True)
+        user, _, _ = seed_usuario('cr-c@test.local', 'C', cliente=True)
+        rutinas = [Rutina(entrenador_id=ent.id, nombre=f'R{i}', es_publica=True) for i in range(2)]
+        db.session.add_all(rutinas)
+        db.session.commit()
+        return user.id, [r.id for r in rutinas]
+
+
+def _headers(usuario_id):
+    return auth_headers(usuario_id, 'cliente', 'cr-c@test.local')
+
+
+def test_follow_list_unfollow(client):
+    usuario_id, (r1, r2) = _seed()
+    headers = _headers(usuario_id)
+
+    assert client.post(f'/api/rutinas/{r1}/seguir', headers=headers).status_code == 200
+    assert client.post(f'/api/rutinas/{r2}/seguir', headers=headers).status_code == 200
+    # following twice is a no-op, not an error
+    assert client.post(f'/api/rutinas/{r1}/seguir', headers=headers).status_code == 200
+
+    rv = client.get('/api/rutinas/mis', headers=headers)
+    assert rv.status_code == 200
+    assert sorted(r['id'] for r in rv.get_json()) == [r1, r2]
+
+    rv = client.delete(f'/api/rutinas/{r1}/seguir', headers=headers)
+    assert rv.get_json()['message'] == 'rutina eliminada de guardadas'
+    assert [r['id'] for r in client.get('/api/rutinas/mis', headers=headers).get_json()] == [r2]
+    assert client.delete(f'/api/rutinas/{r1}/seguir', headers=headers).get_json()['message'] == 'no-op'
+
+
+def test_follow_unknown_rutina_is_404(client):
+    usuario_id, _ = _seed()
+    rv = client.post('/api/rutinas/999999/seguir', headers=_headers(usuario_id))
+    assert rv.status_code == 404
+
+
+def test_follow_creates_missing_cliente_row(client):
+    from database.database import Cliente
+    _, (r1, _r2) = _seed()
+    with app.app_context():
+        usuario_id = seed_usuario('cr-new@test.local', 'N')[0].id
+        db.session.commit()
+    headers = _headers(usuario_id)
+    assert client.post(f'/api/rutinas/{r1}/seguir', headers=headers).status_code == 200
+    with app.app_context():
+        assert Cliente.query.filter_by(usuario_id=usuario_id).count() == 1
+    assert [r['id'] for r in client.get('/api/rutinas/mis', headers=headers).get_json()] == [r1]
+
+
+def test_one_statement_per_request(client, sql_statements):
+    usuario_id, (r1, _r2) = _seed()
+    headers = _headers(usuario_id)
+    client.get('/api/rutinas/mis', headers=headers)  # warm the revocation cache
+
+    with sql_statements:
+        rv = client.post(f'/api/rutinas/{r1}/seguir', headers=headers)
+    seen = sql_statements.statements
+    assert rv.status_code == 200
+    # the cliente_rutina row plus its content_stats counter, same transaction
+    assert len(seen) == 2 and all(s.lstrip().upper().startswith('INSERT') for s in seen)
+
+    with sql_statements:
+        rv = client.get('/api/rutinas/mis', headers=headers)
+    seen = sql_statements.statements
+    assert rv.status_code == 200
+    assert len(seen) == 1 and seen[0].lstrip().upper().startswith('SELECT')
@@ -0,0 +1,105 @@
+from backend import app, db
+from backend import catalogo
+from backend.auth import generate_token
+from database.database import Rutina
+from helpers import auth_headers, seed_usuario
+
+
+def _seed(es_publica=True):
+    with app.app_context():
+        user, ent, _ = seed_usuario('etag@test.local', 'Coach', entrenador=True)
+        rutina = Rutina(entrenador_id=ent.id, nombre='Pierna', es_publica=es_publica)
+        db.session.add(rutina)
+        db.session.flush()
+        catalogo.sync(db.session, 'rutina', rutina.id)
+        db.session.commit()
+        return user.id, ent.id, rutina.id
+
+
+def _publish_elsewhere(ent_id):
+    with app.app_context():
+        rutina = Rutina(entrenador_id=ent_id, nombre='Otra', es_publica=True)
+        db.session.add(rutina)
+        db.session.flush()
+        catalogo.sync(db.session, 'rutina', rutina.id)
+        catalogo.bump_version(db.session)
+        db.session.commit()
+
+
+def test_if_none_match_returns_304(client):
+    _seed()
+    first = client.get('/api/rutinas/public')
+    etag = first.headers['ETag']
+    assert etag.startswith('"') and first.headers['Cache-Control']
+    assert first.headers.get('Last-Modified')
+
+    again = client.get('/api/rutinas/public', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.get_data() == b''
+    assert again.headers['ETag'] == etag
+
+
+def test_etag_changes_after_bump(client):
+    _, _, rutina_id = _seed(es_publica=False)
+    etag = client.get('/api/rutinas/public').headers['ETag']
+
+    admin = generate_token({'user_id': 1, 'role': 'admin'}, expires_in=60)
+    client.post(f'/api/admin/review/rutina/{rutina_id}/approve', headers={'Authorization': f'Bearer {admin}'})
+
+    resp = client.get('/api/rutinas/public', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.headers['ETag'] != etag
+    assert len(resp.get_json()) == 1
+
+
+def test_fingerprint_catches_writes_from_other_workers(client):
+    _, ent_id, _ = _seed()
+    etag = client.get('/api/planes').headers['ETag']
+    # a write on another worker: it bumps the persisted version, not this process' cache
+    _publish_elsewhere(ent_id)
+    assert client.get('/api/planes', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_cached_body_follows_fingerprint_etag(client):
+    _, ent_id, _ = _seed()
+    first = client.get('/api/rutinas/public')
+    assert len(first.get_json()) == 1
+    assert client.get('/api/rutinas/public').headers['X-Cache'] == 'HIT'
+    # otro worker publica sin pasar por el bump de este proceso
+    _publish_elsewhere(ent_id)
+    resp = client.get('/api/rutinas/public', headers={'If-None-Match': first.headers['ETag']})
+    assert resp.status_code == 200
+    assert resp.headers['X-Cache'] == 'MISS'
+    assert resp.headers['ETag'] != first.headers['ETag']
+    assert len(resp.get_json()) == 2
+    again = client.get('/api/rutinas/public')
+    assert again.headers['X-Cache'] == 'HIT' and again.headers['ETag'] == resp.headers['ETag']
+    assert len(again.get_json()) == 2
+
+
+def test_trainer_profile_conditional_get(client):
+    usuario_id, _, _ = _seed()
+    first = client.get(f'/api/entrenadores/{usuario_id}')
+    assert first.status_code == 200
+    resp = client.get(f'/api/entrenadores/{usuario_id}', headers={'If-None-Match': first.headers['ETag']})
+    assert resp.status_code == 304
+    assert client.get('/api/entrenadores/999999').headers.get('ETag') is None
+
+
+def test_profile_edit_on_another_worker_changes_etag(client, monkeypatch):
+    import sys
+    usuario_id, _, _ = _seed()
+    urls = (f'/api/entrenadores/{usuario_id}', '/api/entrenadores', '/api/public/entrenadores')
+    etags = {url: client.get(url).headers['ETag'] for url in urls}
+
+    # el bump en memoria de este proceso no ocurre: sólo queda la versión persistida
+    monkeypatch.setattr(sys.modules['backend.app'].response_cache, 'bump', lambda **kw: 0)
+    rv = client.put('/api/entrenador/perfil', json={'bio': 'Nueva bio'},
+                    headers=auth_headers(usuario_id, 'entrenador', 'etag@test.local'))
+    assert rv.status_code == 200
+
+    for url, etag in etags.items():
+        resp = client.get(url, headers={'If-None-Match': etag})
+        assert resp.status_code == 200, url
+        assert resp.headers['ETag'] != etag
+        assert resp.headers['X-Cache'] == 'MISS'
@@ -0,0 +1,118 @@
+import json
+
+from backend import app, db
+from database import content_stats
+from helpers import auth_headers, seed_usuario
+
+
+def _headers(usuario_id, role):
+    return auth_headers(usuario_id, role, f'{role}{usuario_id}@test.local')
+
+
+def _stats():
+    from database.database import ContentStats
+    with app.app_context():
+        return {(r.tipo, r.content_id): (r.accepted_count, r.saved_count, r.pending_count)
+                for r in ContentStats.query.all()}
+
+
+def _seed():
+    from database.database import Rutina, PlanAlimenticio
+    with app.app_context():
+        trainer, ent, _ = seed_usuario('stats-t@test.local', 'T', entrenador=True)
+        c1, _, _ = seed_usuario('stats-c1@test.local', 'C1')
+        c2, _, _ = seed_usuario('stats-c2@test.local', 'C2')
+        rutina = Rutina(entrenador_id=ent.id, nombre='R', es_publica=True)
+        plan = PlanAlimenticio(entrenador_id=ent.id, nombre='P', es_publico=True)
+        db.session.add_all([rutina, plan])
+        db.session.commit()
+        return trainer.id, c1.id, c2.id, rutina.id, plan.id
+
+
+def test_handlers_maintain_counters(client):
+    trainer, c1, c2, rutina_id, plan_id = _seed()
+    h1, h2, ht = _headers(c1, 'cliente'), _headers(c2, 'cliente'), _headers(trainer, 'entrenador')
+
+    assert client.post(f'/api/rutinas/{rutina_id}/seguir', headers=h1).status_code == 200
+    assert client.post(f'/api/rutinas/{rutina_id}/seguir', headers=h1).status_code == 200  # idempotent
+    assert client.post(f'/api/rutinas/{rutina_id}/seguir', headers=h2).status_code == 200
+    assert client.delete(f'/api/rutinas/{rutina_id}/seguir', headers=h2).status_code == 200
+    assert client.delete(f'/api/rutinas/{rutina_id}/seguir', headers=h2).status_code == 200  # no-op
+    rv = client.post(f'/api/rutinas/{rutina_id}/solicitar', headers=h1)
+    assert rv.status_code == 201
+    rutina_sol = rv.get_json()['id']
+    plan_sols = []
+    for h in (h1, h2):
+        rv = client.post(f'/api/planes/{plan_id}/solicitar', data=json.dumps({}),
+                         content_type='application/json', headers=h)
+        assert rv.status_code == 201
+        plan_sols.append(rv.get_json()['id'])
+
+    assert _stats() == {('rutina', rutina_id): (1, 1, 0), ('plan', plan_id): (0, 0, 2)}
+
+    rv = client.put(f'/api/solicitudes/{plan_sols[0]}', data=json.dumps({'estado': 'aceptado'}),
+                    content_type='application/json', headers=ht)
+    assert rv.status_code == 200
+    assert client.delete(f'/api/solicitudes/{plan_sols[1]}', headers=h2).status_code == 200
+    assert client.delete(f'/api/solicitudes/{rutina_sol}', headers=h1).status_code == 200
+    assert _stats() == {('rutina', rutina_id): (0, 1, 0), ('plan', plan_id): (1, 0, 0)}
+
+    # the dashboard reads the same counters
+    data = client.get('/api/entrenador/aceptados', headers=ht).get_json()
+    assert (data['rutinas'][0]['accepted_count'], data['rutinas'][0]['saved_count']) == (0, 1)
+    assert (data['planes'][0]['accepted_count'], data['planes'][0]['pending_count']) == (1, 0)
+
+    # incremental maintenance agrees with a full rebuild
+    before = _stats()
+    with app.app_context():
+        content_stats.rebuild(db.session)
+        db.session.commit()
+    assert {k: v for k, v in _stats().items() if any(v)} == {k: v for k, v in before.items() if any(v)}
+
+
+def test_rebuild_repairs_drift(client):
+    from database.database import SolicitudPlan, Cliente
+    _, c1, _, rutina_id, plan_id = _seed()
+    with app.app_context():
+        cliente = Cliente(usuario_id=c1)
+        db.session.add(cliente)
+        db.session.flush()
+        # written directly, bypassing the handlers
+        db.session.add_all([SolicitudPlan(cliente_id=cliente.id, rutina_id=rutina_id, estado='aceptado'),
+                            SolicitudPlan(cliente_id=cliente.id, plan_id=plan_id, estado='pendiente')])
+        content_stats.bump(db.session, 'plan', plan_id, accepted_count=5)
+        db.session.commit()
+    assert _stats() == {('plan', plan_id): (5, 0, 0)}
+
+    from backend.manage import rebuild_content_stats
+    assert rebuild_content_stats() == 2
+    assert _stats() == {('rutina', rutina_id): (1, 0, 0), ('plan', plan_id): (0, 0, 1)}
+
+
+def test_deleted_content_does_not_leave_counters_behind(client):
+    from database.database import PlanAlimenticio, Rutina
+    trainer, c1, _, rutina_id, plan_id = _seed()
+    h1, ht = _headers(c1, 'cliente'), _headers(trainer, 'entrenador')
+    admin = auth_headers(1, 'admin')
+    assert client.post(f'/api/rutinas/{rutina_id}/seguir', headers=h1).status_code == 200
+    rv = client.post(f'/api/planes/{plan_id}/solicitar', data=json.dumps({}),
+                     content_type='application/json', headers=h1)
+    assert rv.status_code == 201
+    assert _stats() == {('rutina', rutina_id): (0, 1, 0), ('plan', plan_id): (0, 0, 1)}
+
+    assert client.delete(f'/api/rutinas/{rutina_id}', headers=ht).status_code == 200
+    assert client.post(f'/api/admin/review/plan/{plan_id}/reject', headers=admin).status_code == 200
+    assert _stats() == {}
+
+    # SQLite reutiliza el rowid más alto: el contenido nuevo hereda el id, no los contadores
+    with app.app_context():
+        ent_id = db.session.execute(db.text('SELECT id FROM entrenadores WHERE usuario_id = :u'),
+                                    {'u': trainer}).scalar()
+        rutina = Rutina(entrenador_id=ent_id, nombre='R2', es_publica=True)
+        plan = PlanAlimenticio(entrenador_id=ent_id, nombre='P2', es_publico=True)
+        db.session.add_all([rutina, plan])
+        db.session.commit()
+        assert (rutina.id, plan.id) == (rutina_id, plan_id)
+    assert _stats() == {}
+    data = client.get('/api/entrenador/aceptados', headers=ht).get_json()
+    assert [(r['accepted_count'], r['saved_count'], r['pending_count']) for r in data['rutinas']] == [(0, 0, 0)]
@@ -0,0 +1,99 @@
+import json
+
+from werkzeug.security import generate_password_hash
+
+from backend import app, db
+from backend.ratelimit import LoginLockout, MemoryAttemptStore, SQLiteAttemptStore
+from helpers import seed_usuario
+
+
+def _login(client, email, password, ip='127.0.0.1'):
+    return client.post('/api/usuarios/login', data=json.dumps({'email': email, 'password': password}),
+                       content_type='application/json', environ_base={'REMOTE_ADDR': ip})
+
+
+def _user(email, **extra):
+    with app.app_context():
+        u, _, _ = seed_usuario(email, 'L', hashed_password=generate_password_hash('pw1234'), **extra)
+        db.session.commit()
+        return u.id
+
+
+def test_successful_login_is_read_only(client, sql_statements):
+    _user('ro@test.local')
+    with sql_statements:
+        rv = _login(client, 'ro@test.local', 'pw1234')
+    assert rv.status_code == 200
+    statements = sql_statements.statements
+    assert len(statements) == 1 and statements[0].lstrip().upper().startswith('SELECT')
+    assert sql_statements.commits == 0
+
+
+def test_legacy_counters_are_cleared_once(client, sql_statements):
+    from database.database import Usuario
+    uid = _user('legacy@test.local', failed_attempts=3)
+    with sql_statements:
+        rv = _login(client, 'legacy@test.local', 'pw1234')
+    assert rv.status_code == 200 and sql_statements.commits == 1
+    with app.app_context():
+        assert db.session.get(Usuario, uid).failed_attempts == 0
+    with sql_statements:
+        _login(client, 'legacy@test.local', 'pw1234')
+    assert sql_statements.commits == 0
+
+
+def test_lockout_after_repeated_failures(client, monkeypatch, sql_statements):
+    from backend.app import login_lockout
+    monkeypatch.setattr(login_lockout, 'max_failures', 3)
+    _user('lock@test.local')
+    for _ in range(3):
+        assert _login(client, 'LOCK@test.local ', 'wrong').status_code == 401
+    # locked: refused before touching the database, even with the right password
+    with sql_statements:
+        rv = _login(client, 'lock@test.local', 'pw1234')
+    assert rv.status_code == 429
+    assert int(rv.headers['Retry-After']) > 0
+    assert sql_statements.statements == []
+    # other accounts are unaffected
+    _user('other@test.local')
+    assert _login(client, 'other@test.local', 'pw1234').status_code == 200
+    # the lockout is per address: another client can still log in
+    assert _login(client, 'lock@test.local', 'pw1234', ip='10.0.0.2').status_code == 200
+
+
+def test_sliding_window_and_success_reset():
+    lockout = LoginLockout(MemoryAttemptStore(), max_failures=2, window=60)
+    lockout.register_failure('k', now=0)
+    lockout.register_failure('k', now=30)
+    assert lockout.retry_after('k', now=31) == 29
+    # the first failure leaves the window at t=60
+    assert lockout.retry_after('k', now=61) == 0
+    lockout.register_success('k', now=61)
+    assert lockout.store.failures('k', 60, 61) == (0, None)
+
+
+def test_sqlite_store_is_shared(tmp_path):
+    path = str(tmp_path / 'lockout.sqlite')
+    a = LoginLockout(SQLiteAttemptStore(path), max_failures=2, window=60)
+    b = LoginLockout(SQLiteAttemptStore(path), max_failures=2, window=60)
+    a.register_failure('k', now=100)
+    b.register_failure('k', now=101)
+    assert a.retry_after('k', now=102) == 58
+    b.register_success('k', now=102)
+    assert a.retry_after('k', now=102) == 0
+
+
+def test_disabled_lockout_never_locks():
+    lockout = LoginLockout(None)
+    for _ in range(50):
+        lockout.register_failure('k')
+    assert lockout.retry_after('k') == 0
+
+
+def test_sqlite_store_prunes_expired_failures(tmp_path):
+    store = SQLiteAttemptStore(str(tmp_path / 'prune.sqlite'), prune_every=3)
+    store.add('a|1.1.1.1', 60, 0)
+    store.add('b|2.2.2.2', 60, 10)
+    store.add('c|3.3.3.3', 60, 100)
+    keys = [r[0] for r in store._conn().execute('SELECT key FROM login_failures')]
+    assert keys == ['c|3.3.3.3']
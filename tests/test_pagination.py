@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from backend import app, catalogo, db
+from database.database import Rutina, PlanAlimenticio
+from helpers import seed_usuario
+
+
+def _seed_catalogue(n_rutinas=25, n_trainers=7):
+    base = datetime(2024, 1, 1)
+    ent_ids = [seed_usuario(f'coach{i}@test.local', f'Coach {i}', entrenador={'speciality': 'fuerza'})[1].id
+               for i in range(n_trainers)]
+    # several rows share a creado_en so the id tie-breaker is exercised
+    db.session.execute(insert(Rutina), [
+        {'entrenador_id': ent_ids[0], 'nombre': f'R{i}', 'es_publica': True, 'nivel': 'Básico',
+         'instrucciones_estructurales': 'x' * 500, 'creado_en': base + timedelta(minutes=i // 3)}
+        for i in range(n_rutinas)
+    ])
+    db.session.execute(insert(PlanAlimenticio), [
+        {'entrenador_id': ent_ids[1], 'nombre': f'P{i}', 'contenido': 'y' * 500, 'es_publico': True,
+         'creado_en': base + timedelta(minutes=i)}
+        for i in range(5)
+    ])
+    catalogo.rebuild(db.session)
+    db.session.commit()
+
+
+def _walk(client, url):
+    items, pages = [], 0
+    while url:
+        resp = client.get(url)
+        assert resp.status_code == 200
+        page = resp.get_json()
+        assert isinstance(page, list)
+        items.extend(page)
+        pages += 1
+        link = resp.headers.get('Link')
+        url = link[link.index('<') + 1:link.index('>')] if link else None
+    return items, pages
+
+
+def test_rutinas_cursor_pages_match_legacy_listing(client):
+    with app.app_context():
+        _seed_catalogue()
+    legacy = client.get('/api/rutinas/public').get_json()
+    assert len(legacy) == 25
+
+    paged, pages = _walk(client, '/api/rutinas/public?limit=10')
+    assert pages == 3
+    assert [r['id'] for r in paged] == [r['id'] for r in legacy]
+
+
+def test_fields_projection_drops_blobs(client):
+    with app.app_context():
+        _seed_catalogue()
+    rutinas = client.get('/api/rutinas/public?limit=5&fields=id,nombre,entrenador_nombre').get_json()
+    assert len(rutinas) == 5
+    assert all(set(r) == {'id', 'nombre', 'entrenador_nombre'} for r in rutinas)
+
+    planes = client.get('/api/planes?fields=id,nombre').get_json()
+    assert len(planes) == 5
+    assert all('contenido' not in p for p in planes)
+
+    assert client.get('/api/rutinas/public?fields=password').status_code == 400
+
+
+def test_entrenadores_keyset_on_id(client):
+    with app.app_context():
+        _seed_catalogue()
+    legacy = client.get('/api/public/entrenadores').get_json()
+    assert len(legacy) == 7
+    paged, pages = _walk(client, '/api/public/entrenadores?limit=3')
+    assert pages == 3
+    assert [t['usuario_id'] for t in paged] == [t['usuario_id'] for t in legacy]
+
+    first = client.get('/api/entrenadores?limit=2')
+    assert first.headers.get('X-Next-Cursor')
+    assert all('entrenador_id' in t for t in first.get_json())
+
+
+def test_invalid_pagination_args(client):
+    assert client.get('/api/rutinas/public?cursor=not-a-cursor').status_code == 400
+    assert client.get('/api/planes?limit=abc').status_code == 400
+    assert client.get('/api/entrenadores?limit=0').status_code == 400
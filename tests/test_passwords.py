@@ -0,0 +1,118 @@
+import json
+import time
+
+import pytest
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from backend import app, db
+from backend import passwords
+from backend.passwords import HashPool, PasswordHashBusy, hash_password, method_string, needs_rehash, verify_password
+
+
+def _login(client, email, password):
+    return client.post('/api/usuarios/login', data=json.dumps({'email': email, 'password': password}),
+                       content_type='application/json')
+
+
+def _user(email, hashed):
+    from database.database import Usuario
+    with app.app_context():
+        u = Usuario(email=email, nombre='P', hashed_password=hashed)
+        db.session.add(u)
+        db.session.commit()
+        return u.id
+
+
+def _stored(uid):
+    from database.database import Usuario
+    with app.app_context():
+        return db.session.get(Usuario, uid).hashed_password
+
+
+def test_method_string_fills_defaults():
+    assert method_string('scrypt') == 'scrypt:32768:8:1'
+    assert method_string('scrypt', 16384) == 'scrypt:16384:8:1'
+    assert method_string('pbkdf2', '600000') == 'pbkdf2:sha256:600000'
+    assert method_string('pbkdf2:sha256:310000') == 'pbkdf2:sha256:310000'
+
+
+def test_old_hashes_verify_and_need_rehash(monkeypatch):
+    monkeypatch.setattr(passwords, 'HASH_METHOD', 'pbkdf2:sha256:1000')
+    new = hash_password('pw1234')
+    assert new.startswith('pbkdf2:sha256:1000$')
+    assert verify_password(new, 'pw1234') and not needs_rehash(new)
+
+    old = generate_password_hash('pw1234', method='scrypt:16384:8:1')
+    assert verify_password(old, 'pw1234') and not verify_password(old, 'other')
+    assert needs_rehash(old)
+    assert needs_rehash(generate_password_hash('pw1234', method='pbkdf2:sha256:1000', salt_length=8))
+    # cuentas de Google sin contraseña local
+    assert not verify_password('', 'pw1234') and not needs_rehash('')
+
+
+def test_login_rehashes_once_with_configured_method(client, monkeypatch):
+    monkeypatch.setattr(passwords, 'HASH_METHOD', 'pbkdf2:sha256:1000')
+    uid = _user('rehash@test.local', generate_password_hash('pw1234', method='pbkdf2:sha256:2000'))
+
+    assert _login(client, 'rehash@test.local', 'wrong').status_code == 401
+    assert _stored(uid).startswith('pbkdf2:sha256:2000$')
+
+    rv = _login(client, 'rehash@test.local', 'pw1234')
+    assert rv.status_code == 200 and rv.get_json()['user_id'] == uid
+    assert _stored(uid).startswith('pbkdf2:sha256:1000$')
+
+    # ya con los parámetros actuales: el login vuelve a ser sólo lectura
+    with app.app_context():
+        engine = db.engine
+    commits = []
+
+    def _commit(conn):
+        commits.append(1)
+
+    event.listen(engine, 'commit', _commit)
+    try:
+        assert _login(client, 'rehash@test.local', 'pw1234').status_code == 200
+    finally:
+        event.remove(engine, 'commit', _commit)
+    assert commits == []
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = HashPool(1, queue_max=0, retry_after=3)
+    monkeypatch.setattr(passwords, 'hash_pool', pool)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_hashes_and_fails_fast_when_full(pool, monkeypatch):
+    monkeypatch.setattr(passwords, 'HASH_METHOD', 'pbkdf2:sha256:1000')
+    hashed = hash_password('pw1234')
+    assert verify_password(hashed, 'pw1234') and not verify_password(hashed, 'other')
+
+    assert pool._slots.acquire(blocking=False)  # el único cupo, ocupado
+    try:
+        with pytest.raises(PasswordHashBusy) as exc:
+            hash_password('pw1234')
+        assert exc.value.retry_after == 3
+    finally:
+        pool._slots.release()
+    assert verify_password(hashed, 'pw1234')
+
+
+def test_login_returns_503_when_pool_is_full(client, pool):
+    from backend.app import login_lockout
+    _user('pool@test.local', generate_password_hash('pw1234'))
+    assert _login(client, 'pool@test.local', 'pw1234').status_code == 200
+
+    assert pool._slots.acquire(blocking=False)
+    try:
+        rv = _login(client, 'pool@test.local', 'pw1234')
+    finally:
+        pool._slots.release()
+    assert rv.status_code == 503 and rv.headers['Retry-After'] == '3'
+    # no cuenta como intento fallido
+    if login_lockout.store is not None:
+        assert login_lockout.store.failures('pool@test.local', login_lockout.window, time.time())[0] == 0
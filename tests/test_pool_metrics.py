@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from backend.auth import generate_token
+from database.pool import InstrumentedQueuePool, engine_options_from_env, pool_status
+
+PG = 'postgresql://u:p@host/db?sslmode=require'
+
+
+def test_engine_options_from_env(monkeypatch):
+    for name in ('DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'DB_POOL_TIMEOUT', 'DB_POOL_RECYCLE', 'DB_POOL_PRE_PING',
+                 'DB_STATEMENT_TIMEOUT_MS', 'DB_POOL_METRICS'):
+        monkeypatch.delenv(name, raising=False)
+    assert engine_options_from_env(PG) == {'pool_recycle': 300, 'pool_pre_ping': True,
+                                           'poolclass': InstrumentedQueuePool}
+    assert engine_options_from_env('sqlite:///x.db') == {'poolclass': InstrumentedQueuePool}
+    assert engine_options_from_env('sqlite:///:memory:') == {}
+
+    monkeypatch.setenv('DB_POOL_SIZE', '3')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '0')
+    monkeypatch.setenv('DB_POOL_RECYCLE', '-1')
+    monkeypatch.setenv('DB_POOL_PRE_PING', '0')
+    monkeypatch.setenv('DB_STATEMENT_TIMEOUT_MS', '5000')
+    monkeypatch.setenv('DB_POOL_METRICS', '0')
+    assert engine_options_from_env(PG) == {'pool_size': 3, 'max_overflow': 0, 'pool_recycle': -1,
+                                           'pool_pre_ping': False,
+                                           'connect_args': {'options': '-c statement_timeout=5000'}}
+
+
+def test_instrumented_pool_counts_overflow_timeouts_and_invalidations(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.sqlite'}", poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=1, pool_timeout=0.05)
+    first, second = engine.connect(), engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    status = pool_status(engine)
+    assert (status['pool_size'], status['checked_out'], status['overflow']) == (1, 2, 1)
+    stats = status['stats']
+    assert (stats['checkouts'], stats['overflow_events'], stats['timeouts'], stats['connects']) == (2, 1, 1, 2)
+    assert stats['wait_ms_max'] >= 50
+
+    first.invalidate()
+    first.close()
+    second.close()
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+    stats = pool_status(engine)['stats']
+    assert stats['invalidations'] == 1 and stats['checkouts'] == 3
+    engine.dispose()
+
+
+def test_pool_metrics_endpoint_is_admin_only(client):
+    def headers(role):
+        return {'Authorization': 'Bearer ' + generate_token({'user_id': 1, 'role': role})}
+
+    assert client.get('/api/admin/metrics/pool', headers=headers('cliente')).status_code == 403
+    client.get('/api/rutinas/public')
+    rv = client.get('/api/admin/metrics/pool', headers=headers('admin'))
+    assert rv.status_code == 200
+    body = rv.get_json()
+    assert body['pool_class'] == 'InstrumentedQueuePool'
+    assert body['stats']['checkouts'] >= 1 and body['checked_out'] >= 0
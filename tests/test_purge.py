@@ -0,0 +1,93 @@
+from backend import app, db
+from database import content_stats
+from database.purge import purge_usuarios
+from helpers import auth_headers, seed_usuario
+
+
+def _seed():
+    """Dos entrenadores con contenido y dos clientes que lo usan."""
+    from database.database import (Rutina, PlanAlimenticio, ContentReview, ClienteRutina, SolicitudPlan,
+                                   Medicion, PasswordResetToken)
+    from datetime import datetime, timedelta
+    with app.app_context():
+        seeded = {k: seed_usuario(f'purge-{k}@test.local', k, entrenador=k.startswith('t'), cliente=k.startswith('c'))
+                  for k in ('t1', 't2', 'c1', 'c2')}
+        users = {k: u for k, (u, _, _) in seeded.items()}
+        e1, e2 = seeded['t1'][1], seeded['t2'][1]
+        c1, c2 = seeded['c1'][2], seeded['c2'][2]
+        r1, r2 = Rutina(entrenador_id=e1.id, nombre='R1'), Rutina(entrenador_id=e2.id, nombre='R2')
+        p1, p2 = PlanAlimenticio(entrenador_id=e1.id, nombre='P1'), PlanAlimenticio(entrenador_id=e2.id, nombre='P2')
+        db.session.add_all([r1, r2, p1, p2])
+        db.session.flush()
+        db.session.add_all([
+            ContentReview(tipo='rutina', content_id=r1.id), ContentReview(tipo='plan', content_id=p1.id),
+            ContentReview(tipo='rutina', content_id=r2.id),
+            ClienteRutina(cliente_id=c1.id, rutina_id=r1.id), ClienteRutina(cliente_id=c1.id, rutina_id=r2.id),
+            ClienteRutina(cliente_id=c2.id, rutina_id=r2.id),
+            SolicitudPlan(cliente_id=c1.id, plan_id=p1.id, estado='pendiente'),
+            SolicitudPlan(cliente_id=c1.id, plan_id=p2.id, estado='aceptado'),
+            SolicitudPlan(cliente_id=c2.id, rutina_id=r1.id, estado='aceptado'),
+            SolicitudPlan(cliente_id=c2.id, plan_id=p2.id, estado='pendiente'),
+            Medicion(cliente_id=c1.id, peso=70), Medicion(cliente_id=c2.id, peso=80),
+            PasswordResetToken(token='purge-tok', usuario_id=users['c1'].id,
+                               expires_at=datetime.utcnow() + timedelta(hours=1), used=False),
+        ])
+        content_stats.rebuild(db.session)
+        db.session.commit()
+        return {k: u.id for k, u in users.items()}, {'r1': r1.id, 'r2': r2.id, 'p1': p1.id, 'p2': p2.id}
+
+
+def _counts():
+    names = ('usuarios', 'entrenadores', 'clientes', 'rutinas', 'planes_alimenticios', 'content_review',
+             'cliente_rutina', 'solicitudes_plan', 'mediciones', 'password_reset_tokens')
+    with app.app_context():
+        return {n: db.session.execute(db.text(f'SELECT COUNT(*) FROM {n}')).scalar() for n in names}
+
+
+def test_dry_run_matches_purge_in_one_transaction(client, sql_statements):
+    users, content = _seed()
+    before = _counts()
+    victims = [users['t1'], users['c1'], 999999]
+    with app.app_context():
+        dry = purge_usuarios(db.session, victims, dry_run=True)
+        db.session.rollback()
+    assert _counts() == before
+    assert dry['usuarios'] == [users['t1'], users['c1']]
+    assert dry['rows']['solicitudes_plan'] == 3  # p1 (c1), p2 (c1), r1 (c2)
+    assert dry['rows']['cliente_rutina'] == 2
+
+    with sql_statements, app.app_context():
+        done = purge_usuarios(db.session, victims, batch_size=1)
+        db.session.commit()
+    assert done['rows'] == dry['rows'] and sql_statements.commits == 1
+    after = _counts()
+    assert {n: before[n] - after[n] for n in before} == {
+        'usuarios': 2, 'entrenadores': 1, 'clientes': 1, 'rutinas': 1, 'planes_alimenticios': 1,
+        'content_review': 2, 'cliente_rutina': 2, 'solicitudes_plan': 3, 'mediciones': 1,
+        'password_reset_tokens': 1,
+    }
+    # los contadores del contenido que queda ya no cuentan al cliente borrado
+    from database.database import ContentStats
+    with app.app_context():
+        stats = {(r.tipo, r.content_id): (r.accepted_count, r.saved_count, r.pending_count)
+                 for r in ContentStats.query.all()}
+    assert stats[('rutina', content['r2'])] == (0, 1, 0)
+    assert stats[('plan', content['p2'])] == (0, 0, 1)
+    assert ('rutina', content['r1']) not in stats and ('plan', content['p1']) not in stats
+
+
+def test_admin_hard_delete_uses_purge(client, sql_statements):
+    users, _ = _seed()
+    admin = auth_headers(1, 'admin')
+    rv = client.delete(f"/api/admin/usuarios/{users['t1']}?mode=hard&dry_run=1", headers=admin)
+    assert rv.status_code == 200 and rv.get_json()['rows']['rutinas'] == 1
+    assert _counts()['usuarios'] == 5
+
+    with sql_statements:
+        rv = client.delete(f"/api/admin/usuarios/{users['t1']}?mode=hard", headers=admin)
+    assert rv.status_code == 200, rv.get_data(as_text=True)
+    deletes = [s for s in sql_statements.statements if s.lstrip().upper().startswith('DELETE')]
+    # una sentencia por tabla, ninguna con subconsultas
+    assert len(deletes) <= 12 and not any('SELECT' in s.upper() for s in deletes)
+    assert _counts()['usuarios'] == 4
+    assert client.delete(f"/api/admin/usuarios/{users['t1']}?mode=hard", headers=admin).status_code == 404
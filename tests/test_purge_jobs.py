@@ -0,0 +1,146 @@
+import json
+import sys
+from datetime import datetime, timedelta
+
+from backend import app, db
+from database.purge import claim_job, create_job, run_job, runnable_jobs
+from helpers import auth_headers, seed_usuario
+
+ADMIN = auth_headers(1, 'admin')
+
+
+def _users(n, activo=True):
+    from database.database import Medicion
+    with app.app_context():
+        ids = []
+        for i in range(n):
+            u, _, c = seed_usuario(f'job-{activo}-{i}@test.local', 'J', cliente=True, activo=activo)
+            db.session.add(Medicion(cliente_id=c.id, peso=70))
+            ids.append(u.id)
+        db.session.commit()
+        return ids
+
+
+def _remaining(ids):
+    from database.database import Usuario
+    with app.app_context():
+        return db.session.query(Usuario.id).filter(Usuario.id.in_(ids)).count()
+
+
+def test_job_resumes_from_checkpoint_after_interruption(client):
+    ids = _users(7)
+    from database.database import PurgeJob
+    with app.app_context():
+        job = create_job(db.session, ids + [999999], batch_size=3)
+        db.session.commit()
+        job_id = job.id
+
+        # "crash" después del primer lote: queda en_curso con el checkpoint guardado
+        job = run_job(db.session, job_id, max_batches=1)
+        assert (job.estado, job.procesados, job.eliminados, job.cursor) == ('en_curso', 3, 3, ids[2])
+        assert not claim_job(db.session, job_id)  # otro runner lo tiene (heartbeat reciente)
+        assert runnable_jobs(db.session) == []
+
+        db.session.get(PurgeJob, job_id).actualizado_en = datetime.utcnow() - timedelta(hours=1)
+        db.session.commit()
+        assert runnable_jobs(db.session) == [job_id]
+        job = run_job(db.session, job_id)
+        assert (job.estado, job.procesados, job.eliminados, job.total) == ('completado', 8, 7, 8)
+        assert json.loads(job.rows)['mediciones'] == 7
+    assert _remaining(ids) == 0
+
+    rv = client.get(f'/api/admin/purge_jobs/{job_id}', headers=ADMIN)
+    body = rv.get_json()
+    assert rv.status_code == 200 and body['progress'] == 1.0 and body['rows']['usuarios'] == 7
+    assert client.get('/api/admin/purge_jobs/424242', headers=ADMIN).status_code == 404
+
+
+def test_submit_by_filter_runs_and_skips_admin(client, monkeypatch):
+    monkeypatch.setattr(sys.modules['backend.app'], 'PURGE_JOBS_RUNNER', 'inline')
+    activos, inactivos = _users(2), _users(3, activo=False)
+    from database.database import Usuario
+    with app.app_context():
+        admin = Usuario.query.filter_by(email='admin@test.local').first()
+        admin.activo = False
+        db.session.commit()
+        admin_id = admin.id
+
+    rv = client.post('/api/admin/purge_jobs', data=json.dumps({'filter': {'activo': False}, 'batch_size': 2}),
+                     content_type='application/json', headers=ADMIN)
+    assert rv.status_code == 202, rv.get_data(as_text=True)
+    body = rv.get_json()
+    assert body['estado'] == 'completado' and body['total'] == 3 and body['eliminados'] == 3
+    assert _remaining(inactivos) == 0 and _remaining(activos) == 2 and _remaining([admin_id]) == 1
+
+    for bad in ({}, {'filter': {}}, {'usuario_ids': ['x']}):
+        rv = client.post('/api/admin/purge_jobs', data=json.dumps(bad), content_type='application/json',
+                         headers=ADMIN)
+        assert rv.status_code == 400
+    cliente = auth_headers(activos[0], 'cliente')
+    assert client.post('/api/admin/purge_jobs', data=json.dumps({'usuario_ids': [1]}),
+                       content_type='application/json', headers=cliente).status_code == 403
+
+
+def test_failed_job_retries_from_its_checkpoint(client, monkeypatch):
+    monkeypatch.setattr(sys.modules['backend.app'], 'PURGE_JOBS_RUNNER', 'inline')
+    import database.purge as purge
+    ids = _users(5)
+    real_batch = purge.purge_batch
+    calls = []
+
+    def _flaky(session, resolved, **kw):
+        calls.append(resolved.usuario)
+        if len(calls) == 2:
+            raise RuntimeError('database is locked')
+        return real_batch(session, resolved, **kw)
+
+    monkeypatch.setattr(purge, 'purge_batch', _flaky)
+    with app.app_context():
+        job = create_job(db.session, ids, batch_size=2)
+        db.session.commit()
+        job_id = job.id
+        job = run_job(db.session, job_id)
+        # el segundo lote se revierte solo; el checkpoint queda tras el primero
+        assert (job.estado, job.procesados, job.cursor) == ('fallido', 2, ids[1])
+        assert 'locked' in job.error
+        assert runnable_jobs(db.session) == [] and not claim_job(db.session, job_id)
+    assert _remaining(ids) == 3
+
+    rv = client.post(f'/api/admin/purge_jobs/{job_id}/retry', headers=ADMIN)
+    assert rv.status_code == 202, rv.get_data(as_text=True)
+    body = rv.get_json()
+    assert (body['estado'], body['procesados'], body['eliminados'], body['error']) == ('completado', 5, 5, None)
+    assert _remaining(ids) == 0
+    # los lotes ya confirmados no se repiten
+    assert [len(c) for c in calls] == [2, 2, 2, 1]
+
+    assert client.post(f'/api/admin/purge_jobs/{job_id}/retry', headers=ADMIN).status_code == 409
+    assert client.post('/api/admin/purge_jobs/424242/retry', headers=ADMIN).status_code == 404
+
+
+def test_reclaimed_job_discards_the_late_batch(client, monkeypatch):
+    import database.purge as purge
+    from sqlalchemy import update
+    from database.database import PurgeJob
+    ids = _users(4)
+    real_batch = purge.purge_batch
+    calls = []
+
+    def _slow(session, resolved, **kw):
+        calls.append(resolved.usuario)
+        if len(calls) == 2:
+            # el lote tarda más que STALE_AFTER y otro runner reclama el job
+            session.execute(update(PurgeJob).where(PurgeJob.id == job_id)
+                            .values(actualizado_en=datetime.utcnow() + timedelta(seconds=1)))
+        return real_batch(session, resolved, **kw)
+
+    monkeypatch.setattr(purge, 'purge_batch', _slow)
+    with app.app_context():
+        job = create_job(db.session, ids, batch_size=2)
+        db.session.commit()
+        job_id = job.id
+        assert run_job(db.session, job_id) is None
+        job = db.session.get(PurgeJob, job_id)
+        # sólo quedó el primer lote; el segundo se revirtió entero
+        assert (job.estado, job.procesados, job.cursor) == ('en_curso', 2, ids[1])
+    assert _remaining(ids) == 2
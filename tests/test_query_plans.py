@@ -0,0 +1,167 @@
+"""EXPLAIN QUERY PLAN checks for the hot endpoints.
+
+Seeds a large SQLite database, records every SELECT the endpoints below
+issue, and re-runs each one under `EXPLAIN QUERY PLAN`. A plan line that
+scans one of the big tables without an index (`SCAN rutinas`, as opposed to
+`SEARCH rutinas USING INDEX ...`) fails the test with the offending SQL.
+"""
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+
+from backend import app, catalogo, db
+from helpers import auth_headers
+
+LARGE_TABLES = {'usuarios', 'clientes', 'entrenadores', 'rutinas', 'planes_alimenticios',
+                'solicitudes_plan', 'content_review', 'mediciones', 'cliente_rutina', 'catalogo_publico'}
+
+# Keyset walks in primary-key order whose filter is on a joined table: no
+# index on the walked table can serve it, and the LIMIT stops the walk once
+# enough visible rows are found. Anything else that scans must use an index.
+ALLOWED_WALKS = {('/api/entrenadores?limit=20', 'SCAN entrenadores')}
+
+N_TRAINERS = 300
+N_CLIENTES = 1500
+RUTINAS_PER_TRAINER = 10
+PLANES_PER_TRAINER = 4
+
+
+def _seed():
+    from database.database import (Usuario, Cliente, Entrenador, Rutina, PlanAlimenticio,
+                                   SolicitudPlan, ContentReview, Medicion, ClienteRutina)
+    base = datetime(2025, 1, 1)
+    n_users = N_TRAINERS + N_CLIENTES
+    with app.app_context():
+        first_user = db.session.execute(text('SELECT COALESCE(MAX(id), 0) FROM usuarios')).scalar() + 1
+        db.session.execute(insert(Usuario), [
+            {'id': first_user + i, 'email': f'plan{i}@test.local', 'nombre': f'U{i}', 'hashed_password': 'x',
+             'activo': True, 'creado_en': base + timedelta(minutes=i)}
+            for i in range(n_users)
+        ])
+        trainer_users = [first_user + i for i in range(N_TRAINERS)]
+        cliente_users = [first_user + N_TRAINERS + i for i in range(N_CLIENTES)]
+        db.session.execute(insert(Entrenador), [{'usuario_id': u} for u in trainer_users])
+        db.session.execute(insert(Cliente), [{'usuario_id': u} for u in cliente_users])
+        ent_ids = [r[0] for r in db.session.execute(text('SELECT id FROM entrenadores WHERE usuario_id >= :u ORDER BY id'),
+                                                    {'u': first_user})]
+        cli_ids = [r[0] for r in db.session.execute(text('SELECT id FROM clientes WHERE usuario_id >= :u ORDER BY id'),
+                                                    {'u': first_user})]
+        db.session.execute(insert(Rutina), [
+            {'entrenador_id': e, 'nombre': f'R{e}-{j}', 'es_publica': j % 2 == 0,
+             'creado_en': base + timedelta(minutes=e * RUTINAS_PER_TRAINER + j)}
+            for e in ent_ids for j in range(RUTINAS_PER_TRAINER)
+        ])
+        db.session.execute(insert(PlanAlimenticio), [
+            {'entrenador_id': e, 'nombre': f'P{e}-{j}', 'es_publico': j % 2 == 0,
+             'creado_en': base + timedelta(minutes=e * PLANES_PER_TRAINER + j)}
+            for e in ent_ids for j in range(PLANES_PER_TRAINER)
+        ])
+        rutina_ids = [r[0] for r in db.session.execute(text('SELECT id FROM rutinas ORDER BY id'))]
+        plan_ids = [r[0] for r in db.session.execute(text('SELECT id FROM planes_alimenticios ORDER BY id'))]
+        db.session.execute(insert(SolicitudPlan), [
+            {'cliente_id': c, 'rutina_id': rutina_ids[(i * 7) % len(rutina_ids)],
+             'estado': ('pendiente', 'aceptado', 'rechazado')[i % 3], 'creado_en': base + timedelta(minutes=i)}
+            for i, c in enumerate(cli_ids * 2)
+        ] + [
+            {'cliente_id': c, 'plan_id': plan_ids[(i * 5) % len(plan_ids)],
+             'estado': ('pendiente', 'aceptado')[i % 2], 'creado_en': base + timedelta(minutes=i)}
+            for i, c in enumerate(cli_ids)
+        ])
+        db.session.execute(insert(ContentReview), [
+            {'tipo': 'rutina', 'content_id': r, 'estado': ('pendiente', 'aprobado')[i % 2],
+             'creado_en': base + timedelta(minutes=i)}
+            for i, r in enumerate(rutina_ids)
+        ])
+        db.session.execute(insert(Medicion), [
+            {'cliente_id': c, 'peso': 70.0, 'creado_en': base + timedelta(days=d)}
+            for c in cli_ids for d in range(3)
+        ])
+        db.session.execute(insert(ClienteRutina), [
+            {'cliente_id': c, 'rutina_id': rutina_ids[(i * 11 + k) % len(rutina_ids)]}
+            for i, c in enumerate(cli_ids) for k in range(2)
+        ])
+        catalogo.rebuild(db.session)
+        db.session.commit()
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+        return {
+            'trainer_user': trainer_users[0], 'cliente_user': cliente_users[0], 'cliente': cli_ids[0],
+            'rutina': rutina_ids[0], 'plan': plan_ids[0],
+        }
+
+
+def full_scans(conn, statement, params):
+    """Tables from LARGE_TABLES that `statement` reads without an index.
+
+    SQLite also reports a walk in primary-key order as `SCAN t`. Only an
+    unfiltered walk is allowed: no WHERE, a LIMIT and no temp b-tree sort,
+    so it stops after LIMIT rows. A filtered `... WHERE col = ? LIMIT 1`
+    (an ORM `.first()`) must use an index like any other lookup.
+    """
+    plan = [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, params)]
+    if (re.search(r'\bLIMIT\b', statement, re.IGNORECASE) and not re.search(r'\bWHERE\b', statement, re.IGNORECASE)
+            and not any('TEMP B-TREE' in d for d in plan)):
+        return []
+    scans = []
+    for detail in plan:
+        m = re.match(r'SCAN (\w+)(?: AS \w+)?$', detail)
+        if m and m.group(1) in LARGE_TABLES:
+            scans.append(detail)
+    return scans
+
+
+def test_hot_endpoints_use_indexes(client, sql_statements):
+    ids = _seed()
+    trainer = auth_headers(ids['trainer_user'], 'entrenador', 'plan0@test.local')
+    cliente = auth_headers(ids['cliente_user'], 'cliente', 'x@test.local')
+    endpoints = [
+        ('/api/rutinas/public?limit=20', {}),
+        ('/api/rutinas/public?limit=20&nivel=principiante', {}),
+        ('/api/planes?limit=20', {}),
+        ('/api/entrenadores?limit=20', {}),
+        (f"/api/rutinas/{ids['trainer_user']}", trainer),
+        ('/api/planes/mis', trainer),
+        ('/api/entrenador/perfil', trainer),
+        ('/api/solicitudes/pendientes', trainer),
+        ('/api/entrenador/aceptados', trainer),
+        (f"/api/rutinas/public/{ids['rutina']}", {}),
+        (f"/api/planes/{ids['plan']}", {}),
+        (f"/api/entrenadores/{ids['trainer_user']}", {}),
+        ('/api/rutinas/mis', cliente),
+        ('/api/solicitudes/mis', cliente),
+        (f"/api/mediciones/{ids['cliente']}", cliente),
+        (f"/api/usuarios/{ids['cliente_user']}", cliente),
+    ]
+
+    from backend.app import response_cache
+    response_cache.clear()
+    problems = []
+    for url, headers in endpoints:
+        with sql_statements:
+            rv = client.get(url, headers=headers)
+        assert rv.status_code == 200, (url, rv.status_code, rv.get_data(as_text=True)[:200])
+        captured = [(statement, params)
+                    for statement, params in zip(sql_statements.statements, sql_statements.parameters)
+                    if statement.lstrip().upper().startswith('SELECT')]
+        with sql_statements.engine.connect() as conn:
+            for statement, params in captured:
+                scans = [d for d in full_scans(conn, statement, params) if (url, d) not in ALLOWED_WALKS]
+                if scans:
+                    problems.append(f'{url}: {scans}\n    {" ".join(statement.split())}')
+    assert not problems, 'full table scans:\n' + '\n'.join(problems)
+
+
+def test_full_scans_flags_unindexed_lookups():
+    from sqlalchemy import create_engine
+    engine = create_engine('sqlite://')
+    with engine.connect() as conn:
+        conn.exec_driver_sql('CREATE TABLE rutinas (id INTEGER PRIMARY KEY, entrenador_id INTEGER)')
+        lookup = 'SELECT id FROM rutinas WHERE entrenador_id = ?'
+        assert full_scans(conn, lookup, (1,)) == ['SCAN rutinas']
+        # primary-key walk bounded by LIMIT is fine
+        assert full_scans(conn, 'SELECT id FROM rutinas ORDER BY id DESC LIMIT ?', (20,)) == []
+        # ... but a filtered .first() that walks the table is not
+        assert full_scans(conn, lookup + ' LIMIT ?', (1, 1)) == ['SCAN rutinas']
+        conn.exec_driver_sql('CREATE INDEX ix_rutinas_entrenador_id ON rutinas (entrenador_id)')
+        assert full_scans(conn, lookup, (1,)) == []
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from backend.ratelimit import Limit, MemoryBucketStore, RateLimiter, SQLiteBucketStore
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBucketStore()
+    return SQLiteBucketStore(str(tmp_path / 'rate_limit.sqlite'))
+
+
+def test_parse_limits():
+    ip, email = Limit.parse_list('ip:30/60, email:10/120')
+    assert (ip.scope, ip.burst, ip.rate) == ('ip', 30, 0.5)
+    assert (email.scope, email.burst) == ('email', 10)
+    assert Limit.parse_list('') == [] and Limit.parse_list('off') == []
+    with pytest.raises(ValueError):
+        Limit.parse_list('user:1/1')
+
+
+def test_bucket_allows_burst_then_refills(store):
+    limiter = RateLimiter(store, {'login': Limit.parse_list('email:3/60')})
+    assert [limiter.check('login', email='a@test.local', now=1000) for _ in range(3)] == [0, 0, 0]
+    # vacío: un token cada 20 s
+    assert limiter.check('login', email='A@test.local ', now=1000) == 20
+    assert limiter.check('login', email='a@test.local', now=1010) == 10
+    assert limiter.check('login', email='a@test.local', now=1020) == 0
+    # otros emails y rutas sin reglas no se ven afectados
+    assert limiter.check('login', email='b@test.local', now=1020) == 0
+    assert limiter.check('forgot', email='a@test.local', now=1020) == 0
+
+
+def test_ip_and_email_buckets_are_independent(store):
+    limiter = RateLimiter(store, {'login': Limit.parse_list('ip:2/60,email:5/60')})
+    assert limiter.check('login', ip='1.1.1.1', email='a@test.local', now=0) == 0
+    assert limiter.check('login', ip='1.1.1.1', email='b@test.local', now=0) == 0
+    assert limiter.check('login', ip='1.1.1.1', email='c@test.local', now=0) == 30
+    assert limiter.check('login', ip='2.2.2.2', email='c@test.local', now=0) == 0
+
+
+def test_refused_request_takes_no_tokens(store):
+    limiter = RateLimiter(store, {'login': Limit.parse_list('ip:3/60,email:1/60')})
+    assert limiter.check('login', ip='1.1.1.1', email='a@test.local', now=0) == 0
+    # el bucket del email está vacío: estas no gastan los del IP
+    for _ in range(5):
+        assert limiter.check('login', ip='1.1.1.1', email='a@test.local', now=0) == 60
+    assert limiter.check('login', ip='1.1.1.1', email='b@test.local', now=0) == 0
+    assert limiter.check('login', ip='1.1.1.1', email='c@test.local', now=0) == 0
+    assert limiter.check('login', ip='1.1.1.1', email='d@test.local', now=0) == 20
+
+
+def _post(client, url, body, ip='10.0.0.1'):
+    return client.post(url, data=json.dumps(body), content_type='application/json',
+                       environ_base={'REMOTE_ADDR': ip})
+
+
+def test_login_and_forgot_return_429(client, monkeypatch):
+    from backend.app import rate_limiter
+    monkeypatch.setitem(rate_limiter.rules, 'login', Limit.parse_list('email:2/60'))
+    monkeypatch.setitem(rate_limiter.rules, 'forgot', Limit.parse_list('ip:1/60'))
+
+    body = {'email': 'admin@test.local', 'password': 'admin123'}
+    assert _post(client, '/api/usuarios/login', body).status_code == 200
+    assert _post(client, '/api/usuarios/login', body, ip='10.0.0.2').status_code == 200
+    rv = _post(client, '/api/usuarios/login', body, ip='10.0.0.3')
+    assert rv.status_code == 429 and int(rv.headers['Retry-After']) == 30
+
+    assert _post(client, '/api/usuarios/forgot', {'email': 'x@test.local'}).status_code == 200
+    rv = _post(client, '/api/usuarios/forgot', {'email': 'y@test.local'})
+    assert rv.status_code == 429 and rv.headers['Retry-After'] == '60'
+    assert _post(client, '/api/usuarios/forgot', {'email': 'y@test.local'}, ip='10.0.0.9').status_code == 200
+
+
+def test_sqlite_buckets_prune_idle_keys(tmp_path):
+    store = SQLiteBucketStore(str(tmp_path / 'prune.sqlite'), prune_every=3)
+    store.take('ip:a', 1.0, 10.0, 0)
+    store.take('ip:b', 1.0, 10.0, 0)
+    # a y b llevan más de un llenado completo (10 s) sin uso: la tercera escritura las borra
+    store.take('ip:c', 1.0, 10.0, 100)
+    keys = [r[0] for r in store._conn().execute('SELECT key FROM rate_buckets')]
+    assert keys == ['ip:c']
+
+
+def test_clients_behind_the_proxy_get_their_own_bucket(client, monkeypatch):
+    import sys
+    from backend.app import rate_limiter
+    monkeypatch.setattr(sys.modules['backend.app'], 'RATE_LIMIT_PROXY_HOPS', 1)
+    monkeypatch.setitem(rate_limiter.rules, 'forgot', Limit.parse_list('ip:1/60'))
+
+    def _forgot(forwarded_for):
+        return client.post('/api/usuarios/forgot', json={'email': 'x@test.local'},
+                           headers={'X-Forwarded-For': forwarded_for}, environ_base={'REMOTE_ADDR': '10.9.9.9'})
+
+    assert _forgot('203.0.113.1').status_code == 200
+    assert _forgot('203.0.113.2').status_code == 200
+    # lo que el cliente ponga a la izquierda no cuenta: el proxy agrega la IP real al final
+    assert _forgot('198.51.100.7, 203.0.113.1').status_code == 429
@@ -0,0 +1,72 @@
+from backend import app, db
+from backend.auth import generate_token
+from backend.cache import ResponseCache, SQLiteBackend
+from database.database import Rutina
+from helpers import seed_usuario
+
+
+def _seed_rutina(es_publica=False):
+    with app.app_context():
+        _, ent, _ = seed_usuario('coach@test.local', 'Coach', entrenador=True)
+        rutina = Rutina(entrenador_id=ent.id, nombre='Full body', es_publica=es_publica)
+        db.session.add(rutina)
+        db.session.commit()
+        return rutina.id
+
+
+def test_public_listing_served_from_cache_until_bump(client):
+    rutina_id = _seed_rutina()
+    first = client.get('/api/rutinas/public')
+    assert first.headers['X-Cache'] == 'MISS'
+    assert first.get_json() == []
+    second = client.get('/api/rutinas/public')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == []
+
+    admin = generate_token({'user_id': 1, 'role': 'admin'}, expires_in=60)
+    resp = client.post(f'/api/admin/review/rutina/{rutina_id}/approve', headers={'Authorization': f'Bearer {admin}'})
+    assert resp.status_code == 200
+
+    third = client.get('/api/rutinas/public')
+    assert third.headers['X-Cache'] == 'MISS'
+    assert [r['id'] for r in third.get_json()] == [rutina_id]
+
+
+def test_query_args_are_part_of_the_key(client):
+    _seed_rutina(es_publica=True)
+    assert client.get('/api/rutinas/public?nivel=x').headers['X-Cache'] == 'MISS'
+    assert client.get('/api/rutinas/public').headers['X-Cache'] == 'MISS'
+    assert client.get('/api/rutinas/public?nivel=x').headers['X-Cache'] == 'HIT'
+
+
+def test_detail_caches_public_rutinas_only(client):
+    rutina_id = _seed_rutina(es_publica=False)
+    admin = {'Authorization': 'Bearer ' + generate_token({'user_id': 1, 'role': 'admin'}, expires_in=60)}
+    # el admin ve la rutina privada (200) pero la respuesta nunca se guarda
+    for _ in range(2):
+        resp = client.get(f'/api/rutinas/public/{rutina_id}', headers=admin)
+        assert resp.status_code == 200 and resp.get_json()['es_publica'] is False
+        assert resp.headers['X-Cache'] == 'MISS'
+    anon = client.get(f'/api/rutinas/public/{rutina_id}')
+    assert anon.status_code == 403 and anon.headers['X-Cache'] == 'MISS'
+
+    with app.app_context():
+        db.session.get(Rutina, rutina_id).es_publica = True
+        db.session.commit()
+    first = client.get(f'/api/rutinas/public/{rutina_id}')
+    assert first.status_code == 200 and first.headers['X-Cache'] == 'MISS'
+    second = client.get(f'/api/rutinas/public/{rutina_id}')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first.get_json()
+
+
+def test_sqlite_backend_bump_is_seen_by_other_workers(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    worker_a = ResponseCache(SQLiteBackend(path), ttl=60)
+    worker_b = ResponseCache(SQLiteBackend(path), ttl=60)
+
+    worker_a.store('/api/planes?', b'[]', 'application/json')
+    assert worker_b.lookup('/api/planes?')['body'] == b'[]'
+
+    worker_b.bump(reason='test')
+    assert worker_a.lookup('/api/planes?') is None
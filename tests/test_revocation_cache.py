@@ -0,0 +1,54 @@
+from backend.auth import generate_token, revocation_cache, revocation_index
+from backend.revocation import RevocationCache
+
+
+def test_repeated_requests_hit_db_once(client, sql_statements):
+    revocation_cache.clear()
+    revocation_index.reset()
+    token = generate_token({'user_id': 1, 'role': 'admin', 'email': 'admin@test.local'}, expires_in=60)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    with sql_statements:
+        for _ in range(20):
+            client.get('/api/usuarios/999999', headers=headers)
+    assert len([s for s in sql_statements.statements if 'revoked_tokens' in s]) == 1
+
+
+def test_logout_revokes_token_through_cache(client):
+    revocation_cache.clear()
+    revocation_index.reset()
+    token = generate_token({'user_id': 1, 'role': 'admin', 'email': 'admin@test.local'}, expires_in=60)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # prime the negative cache, then revoke
+    assert client.get('/api/usuarios/999999', headers=headers).status_code == 404
+    assert client.post('/api/usuarios/logout', headers=headers).status_code == 200
+
+    resp = client.get('/api/usuarios/999999', headers=headers)
+    assert resp.status_code == 401
+    assert resp.get_json()['error'] == 'token revoked'
+
+
+def test_cache_eviction_is_bounded():
+    cache = RevocationCache(max_revoked=3, max_negative=5)
+    for i in range(10):
+        cache.mark_revoked(f'r{i}')
+        cache.is_revoked(f'n{i}', lambda jti: False)
+    stats = cache.stats()
+    assert stats['revoked_size'] == 3
+    assert stats['negative_size'] == 5
+    # evicted revocations are re-checked against the source of truth
+    assert cache.is_revoked('r0', lambda jti: True) is True
+
+
+def test_negative_entry_does_not_outlive_token():
+    cache = RevocationCache(negative_ttl=3600)
+    calls = []
+
+    def _lookup(jti):
+        calls.append(jti)
+        return False
+
+    cache.is_revoked('old', _lookup, exp=0)
+    cache.is_revoked('old', _lookup, exp=0)
+    assert len(calls) == 2
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from backend import app, db
+from backend.auth import generate_token, purge_expired_revocations, revocation_cache, revocation_index
+from backend.revocation import BloomFilter, RevocationIndex
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f'jti-{i}' for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(1 for i in range(1000) if f'other-{i}' in bloom)
+    assert false_positives < 50
+
+
+def test_incremental_refresh_only_fetches_rows_after_watermark():
+    t0 = datetime(2024, 1, 1)
+    rows = [('a', t0), ('b', t0 + timedelta(seconds=10))]
+    calls = []
+
+    def loader(since):
+        calls.append(since)
+        return [r for r in rows if since is None or r[1] >= since]
+
+    seen = []
+    index = RevocationIndex(loader, refresh_interval=0, rebuild_interval=3600, overlap=5, on_revoked=seen.append)
+    assert index.might_contain('zzz') is True  # not built yet: defer to DB
+    index.maybe_refresh()
+    assert calls == [None]
+    assert index.might_contain('a') and index.might_contain('b')
+
+    rows.append(('c', t0 + timedelta(seconds=20)))
+    index.maybe_refresh()
+    assert calls[-1] == t0 + timedelta(seconds=5)
+    assert index.might_contain('c')
+    assert 'c' in seen and 'a' not in seen
+
+
+def test_revocation_from_another_worker_is_seen_after_refresh(client):
+    from database.database import RevokedToken
+    revocation_cache.clear()
+    revocation_index.reset()
+    token = generate_token({'user_id': 1, 'role': 'admin', 'email': 'admin@test.local'}, expires_in=60)
+    headers = {'Authorization': f'Bearer {token}'}
+    assert client.get('/api/usuarios/999999', headers=headers).status_code == 404
+
+    # simulate a logout handled by a different process: row only, no cache update
+    from backend.auth import decode_token
+    with app.app_context():
+        db.session.add(RevokedToken(jti=decode_token(token)['jti']))
+        db.session.commit()
+
+    interval = revocation_index.refresh_interval
+    revocation_index.refresh_interval = 0
+    try:
+        resp = client.get('/api/usuarios/999999', headers=headers)
+    finally:
+        revocation_index.refresh_interval = interval
+    assert resp.status_code == 401
+
+
+def test_purge_removes_only_expired_rows(client):
+    from database.database import RevokedToken
+    with app.app_context():
+        db.session.add(RevokedToken(jti='old', revoked_at=datetime.utcnow() - timedelta(days=2)))
+        db.session.add(RevokedToken(jti='fresh'))
+        db.session.commit()
+        assert purge_expired_revocations() == 1
+        remaining = {r.jti for r in RevokedToken.query.all()}
+    assert 'fresh' in remaining and 'old' not in remaining
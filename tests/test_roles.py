@@ -0,0 +1,78 @@
+import json
+
+from werkzeug.security import generate_password_hash
+
+from backend import app, db
+from backend.roles import UserRoles, user_with_roles
+from helpers import auth_headers, seed_usuario
+
+
+def _seed():
+    with app.app_context():
+        users = {key: seed_usuario(f'roles-{key}@test.local', key, entrenador=key == 'ambos',
+                                   cliente=key in ('ambos', 'cliente'),
+                                   hashed_password=generate_password_hash('pw1234'))[0].id
+                 for key in ('ambos', 'cliente', 'nada')}
+        db.session.commit()
+        return users
+
+
+def test_primary_role_precedence():
+    assert UserRoles().primary() == 'usuario'
+    assert UserRoles(cliente_id=1).primary() == 'cliente'
+    assert UserRoles(entrenador_id=1, cliente_id=2).primary() == 'entrenador'
+    assert UserRoles(entrenador_id=1, cliente_id=2).primary(prefer='cliente') == 'cliente'
+    assert UserRoles(cliente_id=2).primary(prefer='entrenador') == 'cliente'
+    assert UserRoles(is_admin=True, cliente_id=2).primary(prefer='cliente') == 'admin'
+    assert UserRoles(is_admin=True, entrenador_id=1, cliente_id=2).roles == ['admin', 'entrenador', 'cliente']
+
+
+def test_login_resolves_role_with_the_user_lookup(client, sql_statements):
+    _seed()
+    expected = {'roles-ambos@test.local': 'entrenador', 'roles-cliente@test.local': 'cliente',
+                'roles-nada@test.local': 'usuario', 'admin@test.local': 'admin'}
+    for email, role in expected.items():
+        password = 'admin123' if email == 'admin@test.local' else 'pw1234'
+        with sql_statements:
+            rv = client.post('/api/usuarios/login', data=json.dumps({'email': email, 'password': password}),
+                             content_type='application/json')
+        assert rv.status_code == 200
+        assert rv.get_json()['role'] == role
+        # usuario and both role tables come from the same statement
+        role_reads = [s for s in sql_statements.statements if 'entrenadores' in s or 'clientes' in s]
+        assert len(role_reads) == 1 and 'usuarios' in role_reads[0], role_reads
+
+
+def test_profile_and_admin_list_agree(client):
+    users = _seed()
+    admin = auth_headers(1, 'admin')
+    listed = {u['id']: u['role'] for u in client.get('/api/admin/usuarios', headers=admin).get_json()}
+    assert listed[users['ambos']] == 'entrenador'
+    assert listed[users['cliente']] == 'cliente'
+    assert listed[users['nada']] == 'usuario'
+
+    perfil = client.get(f"/api/usuarios/{users['ambos']}", headers=admin).get_json()
+    assert perfil['roles'] == ['entrenador', 'cliente']
+    assert perfil['entrenador']['id'] and perfil['cliente']['id']
+    with app.app_context():
+        _, roles = user_with_roles(db.session, usuario_id=users['ambos'])
+        assert perfil['entrenador']['id'] == roles.entrenador_id
+        assert perfil['cliente']['id'] == roles.cliente_id
+
+
+def test_set_role_uses_current_roles(client):
+    users = _seed()
+    admin = auth_headers(1, 'admin')
+
+    def set_role(uid, role):
+        return client.post(f'/api/admin/usuarios/{uid}/set_role', data=json.dumps({'role': role}),
+                           content_type='application/json', headers=admin)
+
+    assert set_role(users['ambos'], 'entrenador').get_json()['message'] == 'already entrenador'
+    assert set_role(users['cliente'], 'entrenador').status_code == 201
+    assert set_role(users['ambos'], 'cliente').status_code == 200
+    assert set_role(users['nada'], 'usuario').status_code == 200
+    with app.app_context():
+        assert user_with_roles(db.session, usuario_id=users['ambos'])[1].roles == ['cliente']
+        assert user_with_roles(db.session, usuario_id=users['cliente'])[1].roles == ['entrenador', 'cliente']
+        assert user_with_roles(db.session, usuario_id=users['nada'])[1].roles == []
@@ -0,0 +1,72 @@
+from sqlalchemy import insert
+
+from backend import app, catalogo, db
+from database.database import Rutina
+from helpers import seed_usuario
+
+EXPECTED_KEYS = {
+    'id', 'nombre', 'descripcion', 'objetivo_principal', 'enfoque_rutina', 'cualidades_clave',
+    'duracion_frecuencia', 'material_requerido', 'instrucciones_estructurales', 'seccion_descripcion',
+    'nivel', 'es_publica', 'creado_en', 'entrenador_nombre', 'entrenador_id', 'entrenador_usuario_id',
+    'link_url',
+}
+
+
+def _seed_trainer(email, activo=True):
+    user, ent, _ = seed_usuario(email, f'Coach {email}', entrenador=True, activo=activo)
+    return user, ent
+
+
+def _seed_rutinas(entrenador_id, n, es_publica=True):
+    rows = [{'entrenador_id': entrenador_id, 'nombre': f'R{i}', 'descripcion': 'd',
+             'nivel': 'Básico', 'es_publica': es_publica} for i in range(n)]
+    db.session.execute(insert(Rutina), rows)
+    # inserción directa: el catálogo público se rehace a mano
+    catalogo.rebuild(db.session)
+
+
+def test_public_rutinas_fields_and_inactive_trainers(client):
+    with app.app_context():
+        user, ent = _seed_trainer('activo@test.local')
+        _, ent_off = _seed_trainer('inactivo@test.local', activo=False)
+        _seed_rutinas(ent.id, 2)
+        _seed_rutinas(ent.id, 1, es_publica=False)
+        _seed_rutinas(ent_off.id, 3)
+        db.session.commit()
+        user_id, user_nombre, ent_id = user.id, user.nombre, ent.id
+
+    resp = client.get('/api/rutinas/public')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert len(data) == 2
+    for item in data:
+        assert set(item) == EXPECTED_KEYS
+        assert item['entrenador_nombre'] == user_nombre
+        assert item['entrenador_id'] == ent_id
+        assert item['entrenador_usuario_id'] == user_id
+
+    assert client.get('/api/rutinas/public?nivel=Avanzado').get_json() == []
+
+
+def test_public_rutinas_query_count_is_constant(client, monkeypatch, sql_statements):
+    from backend.app import response_cache
+    monkeypatch.setattr(response_cache, 'enabled', False)
+    with app.app_context():
+        _, ent = _seed_trainer('bench@test.local')
+        _seed_rutinas(ent.id, 10)
+        db.session.commit()
+        ent_id = ent.id
+    with sql_statements:
+        small = client.get('/api/rutinas/public').get_json()
+    small_queries = len(sql_statements.statements)
+    assert len(small) == 10
+
+    with app.app_context():
+        _seed_rutinas(ent_id, 10000 - 10)
+        db.session.commit()
+    with sql_statements:
+        large = client.get('/api/rutinas/public').get_json()
+    large_queries = len(sql_statements.statements)
+    assert len(large) == 10000
+    # the listing itself is one statement; the ETag fingerprint adds one more
+    assert large_queries == small_queries <= 2
@@ -0,0 +1,77 @@
+import json
+import re
+
+from sqlalchemy import create_engine, inspect, text
+
+from backend import app, db
+from database.schema_sync import sync_schema
+from helpers import auth_headers, seed_usuario
+
+
+def _legacy_engine(tmp_path):
+    # an old dev DB: usuarios/entrenadores/rutinas without the later columns
+    engine = create_engine(f"sqlite:///{(tmp_path / 'legacy.sqlite').as_posix()}")
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE usuarios (id INTEGER PRIMARY KEY, email VARCHAR(255) NOT NULL, '
+                          'nombre VARCHAR(120) NOT NULL, hashed_password VARCHAR(255) NOT NULL, legacy_flag INTEGER)'))
+        conn.execute(text('CREATE TABLE entrenadores (id INTEGER PRIMARY KEY, usuario_id INTEGER NOT NULL)'))
+        conn.execute(text('CREATE TABLE rutinas (id INTEGER PRIMARY KEY, entrenador_id INTEGER NOT NULL, '
+                          'nombre VARCHAR(200) NOT NULL)'))
+        conn.execute(text("INSERT INTO usuarios (email, nombre, hashed_password) VALUES ('a@x', 'A', 'h')"))
+    return engine
+
+
+def test_sync_adds_missing_tables_columns_and_indexes(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    report = sync_schema(engine, db.metadata)
+    assert report.errors == []
+
+    insp = inspect(engine)
+    tables = set(insp.get_table_names())
+    assert {'revoked_tokens', 'cliente_rutina', 'solicitudes_plan', 'content_review'} <= tables
+    usuarios = {c['name'] for c in insp.get_columns('usuarios')}
+    assert {'activo', 'failed_attempts', 'locked_until', 'creado_en'} <= usuarios
+    rutinas = {c['name'] for c in insp.get_columns('rutinas')}
+    assert {'link_url', 'objetivo_principal', 'instrucciones_estructurales', 'es_publica'} <= rutinas
+    entrenadores = {c['name'] for c in insp.get_columns('entrenadores')}
+    assert {'instagram_url', 'youtube_url', 'bio', 'telefono'} <= entrenadores
+    assert 'ix_revoked_tokens_revoked_at' in {ix['name'] for ix in insp.get_indexes('revoked_tokens')}
+
+    # scalar model defaults are applied to existing rows
+    with engine.connect() as conn:
+        row = conn.execute(text('SELECT activo, failed_attempts FROM usuarios')).one()
+    assert (row[0], row[1]) == (1, 0)
+    # legacy columns are reported, never dropped
+    assert any('usuarios.legacy_flag' in w for w in report.warnings)
+
+
+def test_sync_is_idempotent(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    sync_schema(engine, db.metadata)
+    report = sync_schema(engine, db.metadata)
+    assert not report.changed
+    assert report.errors == []
+
+
+def test_handlers_issue_no_ddl(client, sql_statements):
+    from database.database import Rutina, PlanAlimenticio
+
+    with app.app_context():
+        user, ent, _ = seed_usuario('ddl@test.local', 'T', entrenador=True)
+        rutina = Rutina(entrenador_id=ent.id, nombre='R', es_publica=True)
+        plan = PlanAlimenticio(entrenador_id=ent.id, nombre='P', es_publico=True)
+        db.session.add_all([rutina, plan])
+        db.session.commit()
+        user_id, rutina_id, plan_id = user.id, rutina.id, plan.id
+
+    headers = auth_headers(user_id, 'entrenador', 'ddl@test.local')
+    with sql_statements:
+        assert client.get('/api/rutinas/public').status_code == 200
+        assert client.get('/api/planes').status_code == 200
+        assert client.get(f'/api/rutinas/{user_id}', headers=headers).status_code == 200
+        assert client.post(f'/api/rutinas/{rutina_id}/solicitar', headers=headers).status_code == 201
+        rv = client.post(f'/api/planes/{plan_id}/solicitar', data=json.dumps({}),
+                         content_type='application/json', headers=headers)
+        assert rv.status_code == 201
+    ddl = [s for s in sql_statements.statements if re.match(r'\s*(CREATE|ALTER|DROP)\b', s, re.IGNORECASE)]
+    assert ddl == []
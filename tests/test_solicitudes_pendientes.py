@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from backend import app, db
+from helpers import auth_headers, seed_usuario
+
+
+def _seed(n_pending):
+    from database.database import Usuario, Cliente, Rutina, PlanAlimenticio, SolicitudPlan
+    base = datetime(2025, 1, 1)
+    with app.app_context():
+        trainer, ent, _ = seed_usuario('pend-t@test.local', 'Trainer', entrenador=True)
+        _, other_ent, _ = seed_usuario('pend-o@test.local', 'Other', entrenador=True)
+        rutina = Rutina(entrenador_id=ent.id, nombre='Mi rutina')
+        plan = PlanAlimenticio(entrenador_id=ent.id, nombre='Mi plan')
+        foreign = Rutina(entrenador_id=other_ent.id, nombre='Ajena')
+        db.session.add_all([rutina, plan, foreign])
+        db.session.flush()
+
+        db.session.execute(insert(Usuario), [
+            {'email': f'pend-c{i}@test.local', 'nombre': f'Cliente {i}', 'hashed_password': 'x'}
+            for i in range(n_pending)
+        ])
+        user_ids = [u.id for u in Usuario.query.filter(Usuario.email.like('pend-c%')).order_by(Usuario.id)]
+        db.session.execute(insert(Cliente), [{'usuario_id': u} for u in user_ids])
+        cliente_ids = [c.id for c in Cliente.query.filter(Cliente.usuario_id.in_(user_ids)).order_by(Cliente.id)]
+        rows = []
+        for i, cid in enumerate(cliente_ids):
+            target = {'rutina_id': rutina.id} if i % 2 else {'plan_id': plan.id}
+            rows.append({'cliente_id': cid, 'estado': 'pendiente', 'creado_en': base + timedelta(minutes=i), **target})
+        # noise: accepted requests and requests for another trainer's rutina
+        rows.append({'cliente_id': cliente_ids[0], 'rutina_id': rutina.id, 'estado': 'aceptado', 'creado_en': base})
+        rows.append({'cliente_id': cliente_ids[0], 'rutina_id': foreign.id, 'estado': 'pendiente', 'creado_en': base})
+        db.session.execute(insert(SolicitudPlan), rows)
+        db.session.commit()
+        return trainer.id, rutina.id, plan.id
+
+
+def _headers(usuario_id):
+    return auth_headers(usuario_id, 'entrenador', 'pend-t@test.local')
+
+
+def test_pendientes_single_query_with_1k_requests(client, sql_statements):
+    trainer_user, rutina_id, plan_id = _seed(1000)
+    headers = _headers(trainer_user)
+    client.get('/api/solicitudes/pendientes?limit=1', headers=headers)  # warm the auth caches
+
+    with sql_statements:
+        rv = client.get('/api/solicitudes/pendientes', headers=headers)
+
+    assert rv.status_code == 200
+    statements = sql_statements.statements
+    data = rv.get_json()
+    assert len(data) == 1000
+    # entrenador lookup + the listing itself
+    assert len(statements) <= 2, statements
+    assert data[0]['creado_en'] > data[-1]['creado_en']
+    by_target = {(d['rutina_id'], d['plan_id'], d['rutina_nombre']) for d in data}
+    assert by_target == {(rutina_id, None, 'Mi rutina'), (None, plan_id, 'Mi plan')}
+    assert all(d['estado'] == 'pendiente' and d['cliente_nombre'].startswith('Cliente ') for d in data)
+
+
+def test_pendientes_pagination(client):
+    trainer_user, _, _ = _seed(25)
+    headers = _headers(trainer_user)
+    seen = []
+    url = '/api/solicitudes/pendientes?limit=10&fields=id,cliente_nombre'
+    while url:
+        rv = client.get(url, headers=headers)
+        assert rv.status_code == 200
+        page = rv.get_json()
+        assert all(set(item) == {'id', 'cliente_nombre'} for item in page)
+        seen.extend(item['id'] for item in page)
+        cursor = rv.headers.get('X-Next-Cursor')
+        url = f'/api/solicitudes/pendientes?limit=10&fields=id,cliente_nombre&cursor={cursor}' if cursor else None
+    assert len(seen) == len(set(seen)) == 25
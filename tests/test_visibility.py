@@ -0,0 +1,58 @@
+from sqlalchemy import insert
+
+from backend import app, catalogo, db
+from backend.roles import ADMIN_EMAIL
+from database.database import Entrenador, PlanAlimenticio, Rutina, Usuario
+from helpers import seed_usuario
+
+
+def _seed_trainer(email, activo=True):
+    return seed_usuario(email, f'Coach {email}', entrenador=True, activo=activo)[1]
+
+
+def _seed_content(entrenador_id, tag):
+    db.session.execute(insert(Rutina), [{'entrenador_id': entrenador_id, 'nombre': f'R {tag}',
+                                         'nivel': 'Básico', 'es_publica': True}])
+    db.session.execute(insert(PlanAlimenticio), [{'entrenador_id': entrenador_id, 'nombre': f'P {tag}',
+                                                  'es_publico': True}])
+
+
+def _seed_mixed():
+    with app.app_context():
+        admin_ent = db.session.execute(
+            db.select(Entrenador.id).join(Usuario, Usuario.id == Entrenador.usuario_id)
+            .where(Usuario.email == ADMIN_EMAIL)
+        ).scalar_one()
+        _seed_content(admin_ent, 'admin')
+        _seed_content(_seed_trainer('visible@test.local').id, 'visible')
+        _seed_content(_seed_trainer('legacy@test.local', activo=None).id, 'legacy')
+        _seed_content(_seed_trainer('off@test.local', activo=False).id, 'off')
+        catalogo.rebuild(db.session)
+        db.session.commit()
+
+
+def test_public_listings_hide_inactive_and_admin_owners(client, monkeypatch, sql_statements):
+    from backend.app import response_cache
+    monkeypatch.setattr(response_cache, 'enabled', False)
+    _seed_mixed()
+
+    def _get_counting(url):
+        with sql_statements:
+            resp = client.get(url)
+        assert resp.status_code == 200
+        return resp.get_json(), sql_statements.statements
+
+    rutinas, statements = _get_counting('/api/rutinas/public')
+    assert sorted(r['nombre'] for r in rutinas) == ['R legacy', 'R visible']
+    # el filtro se aplica al llenar catalogo_publico; el listado no hace joins
+    assert not [s for s in statements if 'JOIN' in s]
+
+    planes, statements = _get_counting('/api/planes')
+    assert sorted(p['nombre'] for p in planes) == ['P legacy', 'P visible']
+    assert not [s for s in statements if 'JOIN' in s]
+
+    for url in ('/api/entrenadores', '/api/public/entrenadores'):
+        body, statements = _get_counting(url)
+        assert len([s for s in statements if 'JOIN usuarios' in s]) == 1
+        items = body['items'] if isinstance(body, dict) else body
+        assert sorted(e['nombre'] for e in items) == ['Coach legacy@test.local', 'Coach visible@test.local']